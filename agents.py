@@ -1,10 +1,73 @@
 # agents.py
+import asyncio
+import hashlib
 import json
-import re
-from flight_api import FlightAPI
+import os
+import threading
+from flight_record import FlightRecord
+from metrics import ERRORS, REGISTRY, timed
+from query_parser import QueryParser
+from render_cache import RenderCache
 
-# Initialize the FlightAPI
-flight_api = FlightAPI()
+# The process-wide FlightAPI and its asyncio view, built on first use (see get_flight_api)
+_flight_api = None
+_async_flight_api = None
+_flight_api_lock = threading.Lock()
+# Live-update fan-out for streaming endpoints, also built on first use (see get_flight_tracker)
+_flight_tracker = None
+_flight_tracker_lock = threading.Lock()
+
+def get_flight_api():
+    """Return the shared FlightAPI, building it on first use.
+
+    Construction reads the API key and opens the cache, so it is deferred
+    until a lookup needs it; importing this module stays cheap and offline.
+    .env is loaded here too, so servers that import the app without running
+    its start-up (gunicorn api:app, flask run) still see its settings.
+    """
+    if _flight_api is None:
+        with _flight_api_lock:
+            if _flight_api is None:
+                from dotenv import load_dotenv
+                from flight_api import FlightAPI
+                load_dotenv()
+                set_flight_api(FlightAPI())
+    return _flight_api
+
+def get_async_flight_api():
+    """Return the non-blocking view over the shared FlightAPI's cache for asyncio servers."""
+    if _async_flight_api is None:
+        get_flight_api()
+    return _async_flight_api
+
+def set_flight_api(api):
+    """Install the FlightAPI every lookup in this process uses (e.g. one built by a test or tool)."""
+    global _flight_api, _async_flight_api
+    from async_flight_api import AsyncFlightAPI
+    _async_flight_api = AsyncFlightAPI(api)
+    _flight_api = api
+
+def get_flight_tracker():
+    """Return this process's FlightTracker over the shared FlightAPI, building it on first use."""
+    global _flight_tracker
+    if _flight_tracker is None:
+        with _flight_tracker_lock:
+            if _flight_tracker is None:
+                from flight_tracker import FlightTracker
+                # LIVE_POLL_INTERVAL caps seconds between polls of a followed flight (default: cache TTL schedule)
+                poll_interval = os.getenv('LIVE_POLL_INTERVAL')
+                _flight_tracker = FlightTracker(get_flight_api(),
+                                                max_per_minute=int(os.getenv('REFRESH_MAX_PER_MINUTE', '30')),
+                                                poll_interval=float(poll_interval) if poll_interval else None)
+    return _flight_tracker
+
+def __getattr__(name):
+    # agents.flight_api / agents.async_flight_api still work, built lazily on first access
+    if name == 'flight_api':
+        return get_flight_api()
+    if name == 'async_flight_api':
+        return get_async_flight_api()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Define airline codes with their full names
 AIRLINE_CODES = {
@@ -180,7 +243,6 @@ AIRLINE_CODES = {
     'ID': 'Batik Air',
     'Z2': 'AirAsia Philippines',
     'PQ': 'SkyUp Airlines',
-    'BT': 'Air Baltic',
     '6E': 'IndiGo',
     'SG': 'SpiceJet',
     'G8': 'GoAir',
@@ -193,15 +255,10 @@ AIRLINE_CODES = {
     'KZ': 'Nippon Cargo Airlines',
     'CK': 'China Cargo Airlines',
     'CV': 'Cargolux',
-    'LH': 'Lufthansa Cargo',
-    'KE': 'Korean Air Cargo',
-    'SQ': 'Singapore Airlines Cargo',
-    'CX': 'Cathay Pacific Cargo',
     
     # Charter Airlines
     'MT': 'Thomas Cook Airlines',
     'TCX': 'Thomas Cook UK',
-    'BY': 'TUI Airways',
     'TB': 'TUI fly Belgium',
     'OR': 'TUI fly Netherlands',
     '6B': 'TUI fly Nordic',
@@ -213,23 +270,103 @@ AIRLINE_CODES = {
     'DI': 'Norwegian Air UK',
 }
 
+# Extra names that map onto an existing designator (cargo divisions fly under the parent's code)
+AIRLINE_NAME_ALIASES = {
+    'Lufthansa Cargo': 'LH',
+    'Korean Air Cargo': 'KE',
+    'Singapore Airlines Cargo': 'SQ',
+    'Cathay Pacific Cargo': 'CX',
+}
+
+# Precompiled flight-number patterns and airline-name index, built once at import
+query_parser = QueryParser(AIRLINE_CODES, AIRLINE_NAME_ALIASES)
+
+# Chat answers and REST bodies rendered once per flight and record version
+render_cache = RenderCache()
+
+def _metric_families():
+    stats = render_cache.stats()
+    # Scraping must not build the FlightAPI; until the first lookup there is nothing to report
+    api_families = _async_flight_api.metric_families() if _async_flight_api is not None else []
+    families = api_families + _tracker_metric_families()
+    return families + [
+        ('flight_render_cache_entries', 'gauge', 'Pre-rendered answers and bodies held.', [({}, stats["entries"])]),
+        ('flight_render_cache_events_total', 'counter', 'Render cache lookups by result.',
+         [({'result': 'hit'}, stats["hits"]), ({'result': 'miss'}, stats["misses"])]),
+    ]
+
+def _tracker_metric_families():
+    if _flight_tracker is None:
+        return []
+    stats = _flight_tracker.stats()
+    return [
+        ('flight_live_flights', 'gauge', 'Flights followed by at least one live subscriber.', [({}, stats["flights"])]),
+        ('flight_live_subscriptions', 'gauge', 'Open live-update subscriptions.', [({}, stats["subscriptions"])]),
+        ('flight_live_polls_total', 'counter', 'Upstream polls by the shared live refresher.',
+         [({'result': 'ok'}, stats["refresher"]["refreshes"]), ({'result': 'failed'}, stats["refresher"]["failures"])]),
+        ('flight_live_updates_total', 'counter', 'Polls that changed a tracked flight, by whether anything changed.',
+         [({'changed': 'true'}, stats["updates"]), ({'changed': 'false'}, stats["unchanged"])]),
+        ('flight_live_deliveries_total', 'counter', 'Events queued to live subscribers.', [({}, stats["deliveries"])]),
+        ('flight_live_overflows_total', 'counter', 'Subscribers closed for falling behind.', [({}, stats["overflows"])]),
+    ]
+
+# Component counters are read at scrape time, so they cost nothing between scrapes
+REGISTRY.add_collector(_metric_families)
+
+# Most flights answered per chat query; matches the FlightAPI batch pool so all lookups run at once
+MAX_FLIGHTS_PER_QUERY = 8
+
+def _validate_flight_number(flight_number):
+    """Return an error dict if the flight number is malformed or unknown, else None."""
+    # Extract airline code and flight number
+    airline_code = query_parser.airline_code(flight_number)
+    if not airline_code:
+        return {"error": "Invalid flight number format"}
+    
+    # Check if airline code exists
+    if airline_code not in AIRLINE_CODES:
+        return {"error": f"Unknown airline code: {airline_code}"}
+    return None
+
+def _to_response(result):
+    """Serialize a FlightRecord for callers; error dicts pass through."""
+    return result.to_dict() if isinstance(result, FlightRecord) else result
+
 def get_flight_info(flight_number):
     """Get flight information using the FlightAPI."""
+    return _to_response(get_flight_record(flight_number))
+
+async def get_flight_info_async(flight_number):
+    """Get flight information using the AsyncFlightAPI."""
+    return _to_response(await get_flight_record_async(flight_number))
+
+def get_flight_record(flight_number):
+    """Get a validated flight's FlightRecord, or an error dict."""
     try:
-        # Extract airline code and flight number
-        match = re.match(r'([A-Za-z]{2})(\d+)', flight_number)
-        if not match:
-            return {"error": "Invalid flight number format"}
+        # "ba117" and "BA117" share one cache entry and one upstream call
+        flight_number = str(flight_number).strip().upper()
+        error = _validate_flight_number(flight_number)
+        if error:
+            return error
         
-        airline_code = match.group(1).upper()
-        flight_num = match.group(2)
+        # Get flight information
+        flight_data = get_flight_api().get_flight_record(flight_number)
+        if not flight_data:
+            return {"error": "No flight information available"}
         
-        # Check if airline code exists
-        if airline_code not in AIRLINE_CODES:
-            return {"error": f"Unknown airline code: {airline_code}"}
+        return flight_data
+    except Exception as e:
+        return {"error": str(e)}
+
+async def get_flight_record_async(flight_number):
+    """Get a validated flight's FlightRecord without blocking the event loop."""
+    try:
+        flight_number = str(flight_number).strip().upper()
+        error = _validate_flight_number(flight_number)
+        if error:
+            return error
         
-        # Get flight information
-        flight_data = flight_api.get_flight_info(flight_number)
+        flight_data = await get_async_flight_api().get_flight_record(flight_number)
         if not flight_data:
             return {"error": "No flight information available"}
         
@@ -237,6 +374,72 @@ def get_flight_info(flight_number):
     except Exception as e:
         return {"error": str(e)}
 
+def get_flights_info(flight_numbers):
+    """Get flight information for several flights concurrently, keyed by flight number."""
+    return {
+        flight_number: _to_response(result)
+        for flight_number, result in get_flight_records(flight_numbers).items()
+    }
+
+def get_flight_records(flight_numbers):
+    """Get FlightRecords (or error dicts) for several flights concurrently, keyed by the caller's flight numbers."""
+    # FlightAPI keys its results by the stripped, upper-cased designator
+    normalized = {flight_number: str(flight_number).strip().upper() for flight_number in flight_numbers}
+    results = {}
+    valid = []
+    for flight_number in dict.fromkeys(normalized.values()):
+        error = _validate_flight_number(flight_number)
+        if error:
+            results[flight_number] = error
+        else:
+            valid.append(flight_number)
+    if valid:
+        # FlightAPI fans cache misses out over its batch pool
+        results.update(get_flight_api().get_flight_records(valid))
+    return {flight_number: results[normalized[flight_number]] for flight_number in flight_numbers}
+
+async def get_flight_records_async(flight_numbers):
+    """Get FlightRecords for several flights concurrently without blocking the event loop."""
+    records = await asyncio.gather(*(get_flight_record_async(flight_number) for flight_number in flight_numbers))
+    return dict(zip(flight_numbers, records))
+
+def warmup_flight_numbers():
+    """Flights listed in FLIGHT_WARMUP (comma-separated) to prefetch when a server worker starts."""
+    return list(dict.fromkeys(n.strip().upper() for n in os.getenv('FLIGHT_WARMUP', '').split(',') if n.strip()))
+
+def validate_flight_numbers(flight_numbers):
+    """Normalize and validate flight numbers.
+
+    Returns the unique normalized flight numbers, and errors keyed by flight
+    number for those that are malformed or unknown (empty if all are valid).
+    """
+    flight_numbers = list(dict.fromkeys(str(n).strip().upper() for n in flight_numbers if str(n).strip()))
+    errors = {}
+    for flight_number in flight_numbers:
+        error = _validate_flight_number(flight_number)
+        if error:
+            errors[flight_number] = error["error"]
+    return flight_numbers, errors
+
+def track_flights(flight_numbers, loop=None):
+    """Subscribe to live updates for flight_numbers.
+
+    Returns (subscription, None), or (None, errors) keyed by flight number if
+    any flight number is invalid. Pass the running event loop to read the
+    subscription from asyncio.
+    """
+    flight_numbers, errors = validate_flight_numbers(flight_numbers)
+    if errors:
+        return None, errors
+    return get_flight_tracker().subscribe(flight_numbers, loop=loop), None
+
+def render_flight_json(flight_number, record):
+    """Return the REST JSON body and its ETag for a record, rendered once per record version."""
+    def build():
+        body = json.dumps(record.to_dict()).encode()
+        return body, hashlib.blake2b(body, digest_size=8).hexdigest()
+    return render_cache.get(('json', str(flight_number).strip().upper()), record.version, build)
+
 def info_agent_request(query):
     """Process a query about flight information."""
     try:
@@ -253,7 +456,7 @@ def info_agent_request(query):
         # Format the response
         response = {
             "flight_number": flight_number,
-            "airline": AIRLINE_CODES.get(flight_number[:2], "Unknown"),
+            "airline": query_parser.airline_name(flight_number),
             "status": flight_info.get("status", "Unknown"),
             "departure_time": flight_info.get("departure_time", "Unknown"),
             "arrival_time": flight_info.get("arrival_time", "Unknown"),
@@ -266,29 +469,19 @@ def info_agent_request(query):
         return {"error": str(e)}
 
 def extract_flight_number(text):
-    """Extract flight number from text using regex."""
-    # Pattern to match airline code (2 letters) followed by numbers
-    pattern = r'([A-Za-z]{2}\d+)'
-    match = re.search(pattern, text)
-    return match.group(1) if match else None
+    """Extract the first flight number mentioned in text."""
+    flight_numbers = query_parser.extract_flight_numbers(text)
+    return flight_numbers[0] if flight_numbers else None
 
-def qa_agent_respond(query):
-    """Generate a response to a flight information query."""
-    try:
-        # Extract flight number
-        flight_number = extract_flight_number(query)
-        if not flight_number:
-            return json.dumps({"error": "No flight number found in query"})
-        
-        # Get flight information
-        flight_info = get_flight_info(flight_number)
-        if "error" in flight_info:
-            return json.dumps(flight_info)
-        
-        # Format the response
-        airline_name = AIRLINE_CODES.get(flight_number[:2], "Unknown")
-        response = {
-            "answer": f"""Flight {flight_number} ({airline_name}) Information:
+def extract_flight_numbers(text):
+    """Extract every flight number mentioned in text, in order."""
+    return query_parser.extract_flight_numbers(text)
+
+def _format_answer(flight_number, flight_info):
+    """Render flight information as the chat answer payload."""
+    airline_name = query_parser.airline_name(flight_number)
+    return {
+        "answer": f"""Flight {flight_number} ({airline_name}) Information:
 Time: {flight_info.get('departure_time', 'Unknown')}
 Destination: {flight_info.get('destination', 'Unknown')}
 Status: {flight_info.get('status', 'Unknown')}
@@ -298,8 +491,76 @@ Aircraft: {flight_info.get('aircraft', 'Unknown')}
 Estimated Arrival: {flight_info.get('estimated_arrival', 'Unknown')}
 Delay: {flight_info.get('delay', 'Unknown')} minutes
 Codeshare: {flight_info.get('codeshare', 'Unknown')} ({flight_info.get('codeshare_flight', 'Unknown')})"""
-        }
-        
-        return json.dumps(response)
+    }
+
+def _rendered_answer(flight_number, record):
+    """Return the chat answer dict and its JSON text for a record, rendered once per record version."""
+    def build():
+        answer = _format_answer(flight_number, record.to_dict())
+        return answer, json.dumps(answer)
+    return render_cache.get(('answer', flight_number), record.version, build)
+
+def _format_answers(results):
+    """Combine several flights into one chat answer, listing failed lookups inline."""
+    if not any(isinstance(flight_info, FlightRecord) for flight_info in results.values()):
+        return {"error": "; ".join(f"{flight_number}: {info['error']}" for flight_number, info in results.items())}
+    sections = []
+    for flight_number, flight_info in results.items():
+        if isinstance(flight_info, FlightRecord):
+            sections.append(_rendered_answer(flight_number, flight_info)[0]["answer"])
+        else:
+            sections.append(f"Flight {flight_number}: {flight_info['error']}")
+    return {"answer": "\n\n".join(sections)}
+
+def _chat_payload(results):
+    """Return (answer dict, JSON text or None) for resolved flights; single answers come pre-rendered."""
+    if len(results) > 1:
+        return _format_answers(results), None
+    (flight_number, flight_info), = results.items()
+    if isinstance(flight_info, FlightRecord):
+        return _rendered_answer(flight_number, flight_info)
+    return flight_info, None
+
+@timed('agent')
+def _answer_query(query):
+    try:
+        # Extract flight numbers
+        flight_numbers = extract_flight_numbers(query)[:MAX_FLIGHTS_PER_QUERY]
+        if not flight_numbers:
+            return {"error": "No flight number found in query"}, None
+        if len(flight_numbers) > 1:
+            # Lookups run concurrently, so latency is that of the slowest flight
+            return _chat_payload(get_flight_records(flight_numbers))
+        return _chat_payload({flight_numbers[0]: get_flight_record(flight_numbers[0])})
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        ERRORS.inc('agent', type(e).__name__)
+        return {"error": str(e)}, None
+
+@timed('agent')
+async def _answer_query_async(query):
+    try:
+        flight_numbers = extract_flight_numbers(query)[:MAX_FLIGHTS_PER_QUERY]
+        if not flight_numbers:
+            return {"error": "No flight number found in query"}, None
+        return _chat_payload(await get_flight_records_async(flight_numbers))
+    except Exception as e:
+        ERRORS.inc('agent', type(e).__name__)
+        return {"error": str(e)}, None
+
+def qa_agent_answer(query):
+    """Answer a flight information query as a dict, without JSON encoding."""
+    return _answer_query(query)[0]
+
+def qa_agent_respond(query):
+    """Generate a response to a flight information query."""
+    answer, text = _answer_query(query)
+    return text if text is not None else json.dumps(answer)
+
+async def qa_agent_answer_async(query):
+    """Answer a flight information query as a dict without blocking the event loop."""
+    return (await _answer_query_async(query))[0]
+
+async def qa_agent_respond_async(query):
+    """Generate a response to a flight information query without blocking the event loop."""
+    answer, text = await _answer_query_async(query)
+    return text if text is not None else json.dumps(answer)
@@ -1,35 +1,74 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
-from agents import qa_agent_respond
+from agents import qa_agent_answer, get_flight_api, AIRLINE_CODES
+from agents import get_flight_record as agent_get_flight_record, render_cache, render_flight_json
+from agents import get_flights_info as agent_get_flights_info
+from agents import get_flight_tracker, track_flights, validate_flight_numbers
 import os
-import json
 from dotenv import load_dotenv
+from logging_config import Sampler, configure_logging
+from flight_scheduler import RefreshScheduler
+from flight_tracker import MAX_TRACKED_FLIGHTS
+from metrics import (CONTENT_TYPE as METRICS_CONTENT_TYPE, ERRORS, HTTP_IN_FLIGHT, HTTP_REQUEST_SECONDS, REGISTRY,
+                     finish_request_timing, start_request_timing)
+from http_caching import (MIN_COMPRESS_SIZE, choose_encoding, compress, encoded_etag, gzip_stream,
+                          is_compressible, last_modified, not_modified, parse_http_date, parse_if_none_match)
+import json
 import logging
 import sys
-from flight_api import FlightAPI
-
-# Configure logging to output to both file and console
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('api.log')
-    ]
-)
+import threading
+import time
+
 logger = logging.getLogger(__name__)
+_sample_debug = Sampler()
 
-# Load environment variables
-load_dotenv()
+app = Flask(__name__)
 
-# Check if API key is set
-api_key = os.getenv('AVIATIONSTACK_API_KEY')
-if not api_key:
-    logger.error("AVIATIONSTACK_API_KEY environment variable is not set")
-    raise ValueError("AVIATIONSTACK_API_KEY environment variable is not set")
+# Largest number of flights accepted by a single batch request
+MAX_BATCH_SIZE = 500
 
-app = Flask(__name__)
-flight_api = FlightAPI()
+# Most flights the refresh scheduler may watch; each costs an upstream call per refresh
+MAX_WATCHLIST_SIZE = 100
+
+# Upper bound on upstream pages a single /api/flights stream may scan
+MAX_STREAM_PAGES = 100
+
+# Seconds between keep-alive comments on idle live streams, so dropped clients are noticed
+LIVE_HEARTBEAT = 15
+
+# SERVER_TIMING=1 adds a Server-Timing header with per-stage durations to every response
+SERVER_TIMING = os.getenv('SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+
+# Keeps watched flights warm in the cache; built on first use by get_refresh_scheduler
+_refresh_scheduler = None
+_refresh_scheduler_lock = threading.Lock()
+
+def get_refresh_scheduler():
+    """Return this process's RefreshScheduler over the shared FlightAPI."""
+    global _refresh_scheduler
+    with _refresh_scheduler_lock:
+        if _refresh_scheduler is None:
+            _refresh_scheduler = RefreshScheduler(get_flight_api(),
+                                                  max_per_minute=int(os.getenv('REFRESH_MAX_PER_MINUTE', '30')))
+        return _refresh_scheduler
+
+def init_app():
+    """Start-up for a process serving app: .env, logging, the shared FlightAPI and the watchlist.
+
+    Importing this module has no side effects; serve.py and __main__ call this
+    once per process. Raises ValueError if AVIATIONSTACK_API_KEY is not set.
+    """
+    load_dotenv()
+    # Configure logging (level from LOG_LEVEL) with a non-blocking queue handler
+    configure_logging(log_file=os.getenv('LOG_FILE', 'api.log'))
+    get_flight_api()
+    # Keep watched flights warm in the cache (FLIGHT_WATCHLIST="BA117,AA100")
+    if os.getenv('FLIGHT_WATCHLIST'):
+        scheduler = get_refresh_scheduler()
+        scheduler.watch(*os.getenv('FLIGHT_WATCHLIST').split(','))
+        # Multi-worker servers (serve.py) set a lock file so only one worker refreshes
+        scheduler.start(lock_path=os.getenv('REFRESH_SCHEDULER_LOCK'))
+    return app
 
 # Configure CORS with more permissive settings for development
 CORS(app, resources={
@@ -41,6 +80,72 @@ CORS(app, resources={
     }
 })
 
+@app.before_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    HTTP_IN_FLIGHT.inc('flask')
+    if SERVER_TIMING:
+        g.timing_token = start_request_timing()
+
+# Registered before compress_response so it runs after it and times the whole response
+@app.after_request
+def record_request_metrics(response):
+    elapsed = time.perf_counter() - g.request_start
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    HTTP_REQUEST_SECONDS.labels('flask', route, response.status_code).observe(elapsed)
+    if response.status_code >= 500:
+        ERRORS.inc('http', str(response.status_code))
+    if SERVER_TIMING:
+        response.headers['Server-Timing'] = finish_request_timing(g.pop('timing_token'), elapsed)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if 'request_start' in g:
+        HTTP_IN_FLIGHT.dec('flask')
+
+@app.after_request
+def compress_response(response):
+    """gzip/brotli-compress large JSON responses for clients that accept it."""
+    if response.status_code != 200 or 'Content-Encoding' in response.headers or not is_compressible(response.mimetype):
+        return response
+    response.vary.add('Accept-Encoding')
+    streaming = response.is_streamed
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'), streaming=streaming)
+    if encoding is None:
+        return response
+    if streaming:
+        # NDJSON streams are gzipped chunk by chunk so clients still see rows as they arrive
+        response.response = gzip_stream(response.response)
+    else:
+        body = response.get_data()
+        if len(body) < MIN_COMPRESS_SIZE:
+            return response
+        response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        # Strong ETags must differ between encodings of the same entity
+        response.set_etag(encoded_etag(etag, encoding), weak)
+    return response
+
+def _conditional_json(body, etag, modified):
+    """Return body with ETag/Last-Modified, or an empty 304 if the client's copy is current."""
+    current = not_modified(
+        etag, modified,
+        parse_if_none_match(request.headers.get('If-None-Match')),
+        parse_http_date(request.headers.get('If-Modified-Since'))
+    )
+    response = Response(b'' if current else body, status=304 if current else 200, mimetype='application/json')
+    if current:
+        # compress_response skips 304s; send the validator of the variant the client holds
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.headers.get('Accept-Encoding')) if len(body) >= MIN_COMPRESS_SIZE else None
+        etag = encoded_etag(etag, encoding) if encoding else etag
+    response.set_etag(etag)
+    response.last_modified = modified
+    return response
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint to verify the API is running."""
@@ -49,8 +154,8 @@ def health_check():
 @app.route('/api/flight/<flight_number>', methods=['GET'])
 def get_flight_info(flight_number):
     try:
-        logger.info(f"Processing request for flight {flight_number}")
-        logger.debug(f"Request headers: {dict(request.headers)}")
+        if logger.isEnabledFor(logging.DEBUG) and _sample_debug():
+            logger.debug("Processing request for flight %s, headers: %s", flight_number, dict(request.headers))
         
         # Get API key from headers or environment
         api_key = request.headers.get('X-API-Key') or os.getenv('AVIATIONSTACK_API_KEY')
@@ -71,99 +176,20 @@ def get_flight_info(flight_number):
                 "status": 400
             }), 400
         
-        # Create a query for the flight
-        query = f"What is the status of flight {flight_number}?"
-        logger.info(f"Generated query: {query}")
-        
-        # Get the response from the QA agent
-        response = qa_agent_respond(query)
-        logger.info(f"Received response from QA agent: {response}")
-        
-        # Parse the response
-        try:
-            response_data = json.loads(response)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse QA agent response: {str(e)}")
-            logger.error(f"Raw response: {response}")
-            return jsonify({
-                "error": "Invalid response format from QA agent",
-                "details": str(e),
-                "status": 500
-            }), 500
-        
-        # Check if there's an error in the response
-        if "error" in response_data:
-            logger.error(f"Error in QA agent response: {response_data['error']}")
+        # Resolve the flight directly; the text answer is only rendered for chat clients
+        flight_info = agent_get_flight_record(flight_number)
+        if isinstance(flight_info, dict):
+            logger.error(f"Error retrieving flight {flight_number}: {flight_info['error']}")
             return jsonify({
-                "error": response_data["error"],
+                "error": flight_info["error"],
                 "details": "Failed to retrieve flight information",
                 "status": 404
             }), 404
         
-        # Extract the answer from the response
-        answer = response_data.get("answer", "")
-        if not answer:
-            logger.warning("Empty answer received from QA agent")
-            return jsonify({
-                "error": "No flight information available",
-                "details": "The flight information could not be retrieved",
-                "status": 404
-            }), 404
-        
-        # Create a structured response
-        flight_info = {
-            "flight_number": flight_number,
-            "departure_time": "Unknown",
-            "destination": "Unknown",
-            "status": "Unknown",
-            "gate": "Unknown",
-            "terminal": "Unknown",
-            "aircraft": "Unknown",
-            "estimated_arrival": "Unknown",
-            "delay": "Unknown",
-            "codeshare": "Unknown",
-            "codeshare_flight": "Unknown"
-        }
-        
-        # Parse the answer to extract information
-        try:
-            lines = answer.split('\n')
-            for line in lines:
-                if 'Flight' in line and 'information' in line:
-                    continue
-                if 'Time:' in line:
-                    flight_info['departure_time'] = line.split('Time:')[1].strip()
-                elif 'Destination:' in line:
-                    flight_info['destination'] = line.split('Destination:')[1].strip()
-                elif 'Status:' in line:
-                    flight_info['status'] = line.split('Status:')[1].strip()
-                elif 'Gate:' in line:
-                    flight_info['gate'] = line.split('Gate:')[1].strip()
-                elif 'Terminal:' in line:
-                    flight_info['terminal'] = line.split('Terminal:')[1].strip()
-                elif 'Aircraft:' in line:
-                    flight_info['aircraft'] = line.split('Aircraft:')[1].strip()
-                elif 'Estimated Arrival:' in line:
-                    flight_info['estimated_arrival'] = line.split('Estimated Arrival:')[1].strip()
-                elif 'Delay:' in line:
-                    delay_str = line.split('Delay:')[1].strip()
-                    flight_info['delay'] = delay_str.split()[0]  # Get just the number
-                elif 'Codeshare:' in line:
-                    codeshare_info = line.split('Codeshare:')[1].strip()
-                    if '(' in codeshare_info:
-                        flight_info['codeshare'] = codeshare_info.split('(')[0].strip()
-                        flight_info['codeshare_flight'] = codeshare_info.split('(')[1].replace(')', '').strip()
+        # Body and ETag are rendered once per record version; unchanged records answer 304
+        body, etag = render_flight_json(flight_number, flight_info)
+        return _conditional_json(body, etag, last_modified(flight_info))
             
-            logger.info(f"Successfully processed flight info: {flight_info}")
-            return jsonify(flight_info)
-            
-        except Exception as e:
-            logger.error(f"Error parsing flight information: {str(e)}")
-            return jsonify({
-                "error": "Error processing flight information",
-                "details": str(e),
-                "status": 500
-            }), 500
             
     except Exception as e:
         logger.error(f"Unexpected error processing flight info: {str(e)}")
@@ -173,6 +199,172 @@ def get_flight_info(flight_number):
             "status": 500
         }), 500
 
+@app.route('/api/flights/batch', methods=['POST'])
+def get_flights_batch():
+    try:
+        data = request.get_json(silent=True) or {}
+        flight_numbers = data.get('flight_numbers')
+        if not isinstance(flight_numbers, list) or not all(isinstance(n, str) for n in flight_numbers):
+            return jsonify({
+                "error": "Invalid request body",
+                "details": "Expected a JSON object with a 'flight_numbers' list of strings",
+                "status": 400
+            }), 400
+        if len(flight_numbers) > MAX_BATCH_SIZE:
+            return jsonify({
+                "error": "Too many flights requested",
+                "details": f"A batch may contain at most {MAX_BATCH_SIZE} flight numbers",
+                "status": 400
+            }), 400
+
+        logger.info("Processing batch request for %d flights", len(flight_numbers))
+        # Validated per entry like /api/flight: malformed or unknown designators never reach the upstream API
+        flights = agent_get_flights_info(flight_numbers)
+        errors = sum(1 for info in flights.values() if "error" in info)
+        return jsonify({"flights": flights, "count": len(flights), "errors": errors})
+    except Exception as e:
+        logger.error(f"Error in /api/flights/batch: {str(e)}")
+        return jsonify({
+            "error": "Internal server error",
+            "details": str(e),
+            "status": 500
+        }), 500
+
+@app.route('/api/flights', methods=['GET'])
+def stream_flights():
+    """Stream matching flights as newline-delimited JSON, one flight per line."""
+    try:
+        max_pages = int(request.args.get('max_pages', 10))
+    except ValueError:
+        max_pages = 0
+    if not 1 <= max_pages <= MAX_STREAM_PAGES:
+        return jsonify({
+            "error": "Invalid max_pages parameter",
+            "details": f"max_pages must be an integer between 1 and {MAX_STREAM_PAGES}",
+            "status": 400
+        }), 400
+    # Deferred like the FlightAPI itself: flight_api pulls in requests and numpy
+    from flight_api import LIST_FILTERS
+    filters = {name: request.args[name] for name in LIST_FILTERS if request.args.get(name)}
+
+    def generate():
+        try:
+            for record in get_flight_api().iter_flight_records(max_pages=max_pages, **filters):
+                yield json.dumps(record.to_dict()) + '\n'
+        except Exception as e:
+            # Headers are already sent; report the failure in-band as the last line
+            logger.error(f"Error streaming /api/flights: {str(e)}")
+            yield json.dumps({"error": "Failed to fetch flight list", "details": str(e)}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/flights/live', methods=['GET'])
+def live_flights():
+    """Push updates for ?flights=BA117,AA100 as Server-Sent Events.
+
+    Each flight starts with a 'snapshot' event holding the full record; after
+    that 'update' events carry only the fields that changed. Every connection
+    holds a worker thread, so large audiences belong on api_server's WebSocket.
+    """
+    flight_numbers = [n for n in request.args.get('flights', '').split(',') if n.strip()]
+    if not 1 <= len(flight_numbers) <= MAX_TRACKED_FLIGHTS:
+        return jsonify({
+            "error": "Invalid flights parameter",
+            "details": f"Pass between 1 and {MAX_TRACKED_FLIGHTS} comma-separated flight numbers",
+            "status": 400
+        }), 400
+    subscription, errors = track_flights(flight_numbers)
+    if errors:
+        return jsonify({"error": "Invalid flight numbers", "details": errors, "status": 400}), 400
+
+    def generate():
+        # Browsers' EventSource reconnect after this many ms, e.g. when a slow stream is closed
+        yield "retry: 5000\n\n"
+        while not subscription.closed:
+            event = subscription.get(timeout=LIVE_HEARTBEAT)
+            if event is not None:
+                yield event.sse
+            elif not subscription.closed:
+                yield ": keep-alive\n\n"
+
+    response = Response(generate(), mimetype='text/event-stream')
+    # Runs even if the client goes away before the generator starts
+    response.call_on_close(lambda: get_flight_tracker().unsubscribe(subscription))
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    try:
+        group_by = request.args.get('group_by', 'airline')
+        try:
+            days = float(request.args.get('days', 7))
+        except ValueError:
+            return jsonify({
+                "error": "Invalid days parameter",
+                "details": "days must be a number",
+                "status": 400
+            }), 400
+
+        since = time.time() - days * 86400
+        try:
+            groups = get_flight_api().analytics.summary(group_by=group_by, since=since)
+        except ValueError as e:
+            return jsonify({"error": "Invalid group_by parameter", "details": str(e), "status": 400}), 400
+
+        if group_by == 'airline':
+            for group in groups:
+                group["airline"] = AIRLINE_CODES.get(group["key"], "Unknown")
+        return jsonify({"group_by": group_by, "days": days, "groups": groups})
+    except Exception as e:
+        logger.error(f"Error in /api/stats: {str(e)}")
+        return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Expose latency histograms, cache outcomes and error counts in the Prometheus text format."""
+    return Response(REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    try:
+        return jsonify({**get_flight_api().get_metrics(), "render_cache": render_cache.stats()})
+    except Exception as e:
+        logger.error(f"Error in /api/metrics: {str(e)}")
+        return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
+
+@app.route('/api/watchlist', methods=['GET', 'POST'])
+def watchlist():
+    try:
+        scheduler = get_refresh_scheduler()
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            flight_numbers = data.get('flight_numbers')
+            if not isinstance(flight_numbers, list) or not all(isinstance(n, str) for n in flight_numbers):
+                return jsonify({
+                    "error": "Invalid request body",
+                    "details": "Expected a JSON object with a 'flight_numbers' list of strings",
+                    "status": 400
+                }), 400
+            # Each watched flight is re-fetched for as long as it is watched, so only valid ones get in
+            flight_numbers, errors = validate_flight_numbers(flight_numbers)
+            if errors:
+                return jsonify({"error": "Invalid flight numbers", "details": errors, "status": 400}), 400
+            if len(set(scheduler.watchlist()).union(flight_numbers)) > MAX_WATCHLIST_SIZE:
+                return jsonify({
+                    "error": "Watchlist is full",
+                    "details": f"At most {MAX_WATCHLIST_SIZE} flights may be watched",
+                    "status": 400
+                }), 400
+            scheduler.watch(*flight_numbers)
+            scheduler.start()
+        return jsonify({"flights": scheduler.watchlist(), **scheduler.stats()})
+    except Exception as e:
+        logger.error(f"Error in /api/watchlist: {str(e)}")
+        return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
+
 @app.route('/api/query', methods=['POST'])
 def query():
     try:
@@ -180,12 +372,7 @@ def query():
         user_query = data.get('query', '')
         if not user_query:
             return jsonify({'error': 'No query provided'}), 400
-        response = qa_agent_respond(user_query)
-        try:
-            response_data = json.loads(response)
-        except Exception:
-            response_data = {'answer': response}
-        return jsonify(response_data)
+        return jsonify(qa_agent_answer(user_query))
     except Exception as e:
         logger.error(f"Error in /api/query: {str(e)}")
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
@@ -204,9 +391,11 @@ if __name__ == '__main__':
             print("Linux/Mac: export AVIATIONSTACK_API_KEY='your_api_key'")
             print("Note: The API will still work if the key is provided in the request headers.")
         
-        logger.info("Starting Flask server...")
-        # Run the Flask app
-        app.run(debug=True, port=5000, host='0.0.0.0')
+        init_app()
+        logger.info("Starting Flask development server (use serve.py in production)...")
+        # The stat reloader would import the app twice; opt in with FLASK_DEBUG=1
+        debug = os.getenv('FLASK_DEBUG') == '1'
+        app.run(debug=debug, use_reloader=debug, threaded=True, port=int(os.getenv('PORT', '5000')), host='0.0.0.0')
     except Exception as e:
         logger.error(f"Failed to start server: {str(e)}")
         sys.exit(1)
\ No newline at end of file
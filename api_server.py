@@ -1,9 +1,24 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from agents import qa_agent_respond
+from fastapi.responses import JSONResponse, PlainTextResponse
+import asyncio
+import os
+import time
+from agents import (get_async_flight_api, get_flight_record_async, get_flight_records_async, get_flight_tracker,
+                    qa_agent_respond_async, render_flight_json, track_flights, warmup_flight_numbers)
+from dotenv import load_dotenv
+from http_caching import (MIN_COMPRESS_SIZE, choose_encoding, compress, encoded_etag, http_date,
+                          is_compressible, last_modified, not_modified, parse_http_date, parse_if_none_match)
+from flight_tracker import MAX_TRACKED_FLIGHTS
+from logging_config import configure_logging
+from metrics import (CONTENT_TYPE as METRICS_CONTENT_TYPE, ERRORS, HTTP_IN_FLIGHT, HTTP_REQUEST_SECONDS, REGISTRY,
+                     finish_request_timing, start_request_timing)
 
 app = FastAPI()
 
+# SERVER_TIMING=1 adds a Server-Timing header with per-stage durations to every response
+SERVER_TIMING = os.getenv('SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -11,10 +26,131 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def compress_responses(request: Request, call_next):
+    """gzip/brotli-compress large JSON responses for clients that accept it."""
+    response = await call_next(request)
+    if (response.status_code != 200 or "content-encoding" in response.headers
+            or not is_compressible(response.headers.get("content-type"))):
+        return response
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    headers = dict(response.headers)
+    headers["vary"] = "Accept-Encoding"
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    if encoding and len(body) >= MIN_COMPRESS_SIZE:
+        body = compress(body, encoding)
+        headers["content-encoding"] = encoding
+        if "etag" in headers:
+            etag = headers["etag"].strip('"')
+            headers["etag"] = f'"{encoded_etag(etag, encoding)}"'
+    headers["content-length"] = str(len(body))
+    return Response(body, status_code=response.status_code, headers=headers)
+
+# Added after compress_responses so it wraps it and times the whole response
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    HTTP_IN_FLIGHT.inc("fastapi")
+    token = start_request_timing() if SERVER_TIMING else None
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - start
+        HTTP_IN_FLIGHT.dec("fastapi")
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.labels("fastapi", route.path if route else "unmatched", status).observe(elapsed)
+        if status >= 500:
+            ERRORS.inc("http", str(status))
+        timing = finish_request_timing(token, elapsed) if token is not None else None
+    if timing:
+        response.headers["server-timing"] = timing
+    return response
+
+@app.on_event("startup")
+async def startup():
+    # Start-up work lives here rather than at import, so importing the app stays side-effect free
+    load_dotenv()
+    configure_logging(log_file=os.getenv('LOG_FILE'))
+    get_async_flight_api()
+    # Each worker process has its own in-memory cache unless FLIGHT_CACHE_DB is shared
+    flight_numbers = warmup_flight_numbers()
+    if flight_numbers:
+        await get_flight_records_async(flight_numbers)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await get_async_flight_api().aclose()
+
 @app.get("/")
 def root():
     return {"status": "Airline API server is running."}
 
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/metrics/json")
+def metrics_json():
+    return get_async_flight_api().get_metrics()
+
+@app.get("/flight/{flight_number}")
+async def flight(flight_number: str, request: Request):
+    record = await get_flight_record_async(flight_number)
+    if isinstance(record, dict):
+        return JSONResponse({"error": record["error"], "status": 404}, status_code=404)
+    body, etag = render_flight_json(flight_number, record)
+    modified = last_modified(record)
+    headers = {"ETag": f'"{etag}"', "Last-Modified": http_date(modified)}
+    if not_modified(etag, modified, parse_if_none_match(request.headers.get("if-none-match")),
+                    parse_http_date(request.headers.get("if-modified-since"))):
+        # compress_responses skips 304s; send the validator of the variant the client holds
+        encoding = choose_encoding(request.headers.get("accept-encoding")) if len(body) >= MIN_COMPRESS_SIZE else None
+        if encoding:
+            headers["ETag"] = f'"{encoded_etag(etag, encoding)}"'
+        return Response(status_code=304, headers={**headers, "Vary": "Accept-Encoding"})
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.websocket("/flights/live")
+async def live_flights(websocket: WebSocket):
+    """Push updates for ?flights=BA117,AA100 as JSON messages.
+
+    Each flight starts with a 'snapshot' message holding the full record; after
+    that 'update' messages carry only the fields that changed.
+    """
+    await websocket.accept()
+    flight_numbers = [n for n in websocket.query_params.get("flights", "").split(",") if n.strip()]
+    if not 1 <= len(flight_numbers) <= MAX_TRACKED_FLIGHTS:
+        await websocket.send_json({"error": "Invalid flights parameter",
+                                   "details": f"Pass between 1 and {MAX_TRACKED_FLIGHTS} comma-separated flight numbers"})
+        await websocket.close(code=1008)
+        return
+    # Subscribing may fetch uncached flights, so keep it off the event loop
+    subscription, errors = await asyncio.to_thread(track_flights, flight_numbers, asyncio.get_running_loop())
+    if errors:
+        await websocket.send_json({"error": "Invalid flight numbers", "details": errors})
+        await websocket.close(code=1008)
+        return
+
+    async def push():
+        while (event := await subscription.get()) is not None:
+            await websocket.send_text(event.data)
+        # Fell too far behind: the client should reconnect and start from a fresh snapshot
+        await websocket.close(code=1013)
+
+    sender = asyncio.create_task(push())
+    try:
+        # Clients only send to close; reading is how a disconnect is noticed
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        # No awaits here: this also runs when the handler is cancelled at shutdown
+        get_flight_tracker().unsubscribe(subscription)
+        sender.cancel()
+        if sender.done() and not sender.cancelled():
+            sender.exception()  # A send that failed because the client had already gone
+
 @app.get("/chat")
 def chat_get():
     return {"detail": "Use POST /chat with a JSON body { 'query': 'your question' }."}
@@ -23,5 +159,5 @@ def chat_get():
 async def chat(request: Request):
     data = await request.json()
     user_query = data.get("query", "")
-    response = qa_agent_respond(user_query)
+    response = await qa_agent_respond_async(user_query)
     return {"response": response}
@@ -0,0 +1,264 @@
+import asyncio
+import functools
+import json
+import logging
+import time
+
+import httpx
+
+from flight_api import MAX_PAGE_SIZE, FlightAPI
+from flight_cache import FlightCache
+from flight_record import FlightRecord
+from flight_transport import RETRY_STATUS_CODES, FlightTransport, observe_attempt, status_outcome
+from logging_config import Sampler
+from metrics import CACHE_HIT, CACHE_MISS, CACHE_NEGATIVE, CACHE_STALE, ERRORS, UPSTREAM_IN_FLIGHT, timed
+from rate_limiter import QuotaExhausted
+from single_flight import AsyncSingleFlight
+
+logger = logging.getLogger(__name__)
+_sample_debug = Sampler()
+
+
+class AsyncFlightTransport(FlightTransport):
+    """Non-blocking counterpart of FlightTransport built on httpx.AsyncClient."""
+
+    def __init__(self, max_connections=100, max_keepalive_connections=32, connect_timeout=3.05,
+                 read_timeout=10, max_retries=3, backoff_base=0.25, backoff_max=8.0, limiter=None):
+        super().__init__(connect_timeout=connect_timeout, read_timeout=read_timeout,
+                         max_retries=max_retries, backoff_base=backoff_base, backoff_max=backoff_max,
+                         limiter=limiter)
+        # The sync session from the base class is unused here
+        self.session.close()
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive_connections)
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self._client = None
+        self._loop = None
+
+    @property
+    def client(self):
+        # Created lazily (and per event loop) since pooled connections are loop-bound
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            self._loop = loop
+        return self._client
+
+    @timed('upstream')
+    async def get(self, url, params=None):
+        """GET url, retrying timeouts, connection errors and 429/5xx responses."""
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                await self.limiter.acquire_async()
+            self._count("requests")
+            UPSTREAM_IN_FLIGHT.inc()
+            start = time.perf_counter()
+            try:
+                response = await self.client.get(url, params=params)
+            except httpx.TimeoutException:
+                observe_attempt(start, 'timeout')
+                self._count("timeouts")
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            except httpx.TransportError:
+                observe_attempt(start, 'connection_error')
+                self._count("connection_errors")
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                observe_attempt(start, status_outcome(response.status_code))
+                if response.status_code not in RETRY_STATUS_CODES:
+                    return response
+                self._count("http_errors")
+                if attempt >= self.max_retries:
+                    return response
+                delay = self._backoff(attempt, response)
+            finally:
+                UPSTREAM_IN_FLIGHT.dec()
+
+            attempt += 1
+            self._count("retries")
+            logger.warning(f"Retrying {url} in {delay:.2f}s (attempt {attempt}/{self.max_retries})")
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        """Close pooled connections."""
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+
+class AsyncFlightAPI:
+    """asyncio front end for FlightAPI sharing its cache, parsing and history.
+
+    The in-memory cache is used inline; any other backend (e.g. SQLite) does
+    blocking I/O, so its calls run in a worker thread to keep the loop free.
+    """
+
+    def __init__(self, flight_api=None, transport=None):
+        self.api = flight_api or FlightAPI()
+        self.transport = transport or AsyncFlightTransport(limiter=self.api.limiter)
+        self.inflight = AsyncSingleFlight()
+        self._revalidations = {}  # cache_key -> background refresh task
+        self._offload_cache = not isinstance(self.api.cache, FlightCache)
+
+    async def _cache_call(self, fn, *args):
+        """Run fn, which touches the cache, inline or in a worker thread depending on the backend."""
+        if self._offload_cache:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    @property
+    def cache(self):
+        return self.api.cache
+
+    async def get_flight_info(self, flight_number):
+        """Get current flight information without blocking the event loop."""
+        return self.api._to_response(await self.get_flight_record(flight_number))
+
+    @timed('lookup')
+    async def get_flight_record(self, flight_number):
+        """Get current flight information as a FlightRecord, or an error dict."""
+        try:
+            cache_key = self.api._cache_key(flight_number)
+            cached_data = await self._cache_call(self.api.cache.get, cache_key)
+            if cached_data is not None:
+                (CACHE_HIT if isinstance(cached_data, FlightRecord) else CACHE_NEGATIVE).inc()
+                if logger.isEnabledFor(logging.DEBUG) and _sample_debug():
+                    logger.debug("Using cached data for flight %s", flight_number)
+                return cached_data
+
+            stale = await self._cache_call(self.api._revalidatable, cache_key)
+            if stale is not None:
+                CACHE_STALE.inc()
+                self._revalidate_in_background(flight_number, cache_key)
+                return stale
+
+            CACHE_MISS.inc()
+            return await self.inflight.do(cache_key, lambda: self._fetch_flight_info(flight_number, cache_key))
+
+        except httpx.HTTPError as e:
+            ERRORS.inc('lookup', type(e).__name__)
+            logger.error(f"API request failed: {str(e)}")
+            return {"error": "Failed to fetch flight information"}
+        except Exception as e:
+            ERRORS.inc('lookup', type(e).__name__)
+            logger.error(f"Unexpected error: {str(e)}")
+            return {"error": "An unexpected error occurred"}
+
+    def _revalidate_in_background(self, flight_number, cache_key):
+        """Start one refresh task per key; repeat calls while it runs are no-ops."""
+        if cache_key in self._revalidations:
+            return
+        self.api.revalidations += 1
+        task = asyncio.ensure_future(
+            self.inflight.do(cache_key, lambda: self._fetch_flight_info(flight_number, cache_key))
+        )
+        self._revalidations[cache_key] = task
+        task.add_done_callback(lambda t, key=cache_key: self._revalidated(key, t))
+
+    def _revalidated(self, cache_key, task):
+        self._revalidations.pop(cache_key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Background refresh of {cache_key} failed: {str(task.exception())}")
+
+    async def _fetch_flight_info(self, flight_number, cache_key):
+        """Fetch flight information from the API and cache it."""
+        cached_data = await self._cache_call(self.api.cache.peek, cache_key)
+        if cached_data is not None:
+            return cached_data
+
+        params = {
+            'access_key': self.api.api_key,
+            'flight_iata': flight_number
+        }
+
+        logger.info("Making API request to %s/flights for %s", self.api.base_url, flight_number)
+        try:
+            response = await self.transport.get(f"{self.api.base_url}/flights", params=params)
+            response.raise_for_status()
+        except QuotaExhausted as e:
+            return await self._cache_call(self.api._serve_stale, flight_number, cache_key, e,
+                                          "Upstream rate limit reached, please retry shortly")
+        except httpx.HTTPError as e:
+            logger.error(f"API request failed: {str(e)}")
+            return await self._cache_call(functools.partial(self.api._serve_stale, negative_ttl=self.api.error_ttl),
+                                          flight_number, cache_key, e, "Failed to fetch flight information")
+        data = response.json()
+        if logger.isEnabledFor(logging.DEBUG) and _sample_debug():
+            logger.debug("API Response status: %s", response.status_code)
+            logger.debug("API Response data: %s", json.dumps(data, indent=2))
+
+        return await self._cache_call(self.api._handle_flight_response, flight_number, cache_key, data)
+
+    async def _fetch_page(self, params):
+        """Fetch one page of the /flights listing as a parsed payload."""
+        response = await self.transport.get(f"{self.api.base_url}/flights", params=params)
+        response.raise_for_status()
+        return response.json()
+
+    async def iter_flights(self, page_size=MAX_PAGE_SIZE, max_pages=None, ingest=True, **filters):
+        """Async-iterate raw flight objects page by page, prefetching the next page.
+
+        With ingest, each page warms the shared cache and history as it arrives.
+        """
+        params = self.api._list_params(0, page_size, filters)
+        pages = 0
+        task = asyncio.ensure_future(self._fetch_page(params))
+        try:
+            while task is not None:
+                data = await task
+                pages += 1
+                offset = self.api._next_offset(data, params)
+                task = None
+                if offset is not None and (max_pages is None or pages < max_pages):
+                    params = {**params, 'offset': offset}
+                    task = asyncio.ensure_future(self._fetch_page(params))
+                page = (data or {}).get('data') or []
+                if ingest:
+                    await self._cache_call(self.api.ingest_flights, page)
+                for flight in page:
+                    yield flight
+        finally:
+            if task is not None:
+                task.cancel()
+
+    async def get_all_flights(self, max_pages=1, **filters) -> list:
+        """Get a list of all available flights (the first max_pages pages)."""
+        try:
+            logger.info("Fetching all flights")
+            flights = [flight async for flight in self.iter_flights(max_pages=max_pages, **filters)]
+            if not flights:
+                logger.warning("No flight data available")
+            return flights
+
+        except Exception as e:
+            logger.error(f"Error fetching all flights: {str(e)}")
+            return []
+
+    def get_historical_data(self, flight_number, days=7):
+        """Get historical flight data for the specified number of days."""
+        return self.api.get_historical_data(flight_number, days)
+
+    def get_metrics(self):
+        """Get cache and upstream transport counters."""
+        metrics = self.api.get_metrics()
+        metrics["async_upstream"] = self.transport.stats()
+        return metrics
+
+    def metric_families(self):
+        """Prometheus metric families of the shared FlightAPI plus the async transport."""
+        families = self.api.metric_families()
+        for name, _, _, samples in families:
+            if name == 'flight_upstream_events_total':
+                samples.extend(({'transport': 'async', 'event': event}, value)
+                               for event, value in self.transport.stats().items())
+        return families
+
+    async def aclose(self):
+        """Release the underlying HTTP connections."""
+        await self.transport.aclose()
@@ -0,0 +1,84 @@
+"""Per-request CPU of /api/flight/<flight_number>: text round-trip versus the structured path.
+
+The legacy path renders the chat answer, JSON-encodes it, decodes it again and
+re-parses the text line by line; the structured path returns the FlightAPI dict.
+Both run against a warm cache so only local CPU is measured.
+
+Usage: python benchmarks/bench_flight_endpoint.py [iterations]
+"""
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('AVIATIONSTACK_API_KEY', 'benchmark-key')
+
+import agents  # noqa: E402
+from stub_aviationstack import StubAviationStack  # noqa: E402
+
+FLIGHTS = [f"BA{n}" for n in range(100, 150)]
+
+
+def legacy_flight_payload(flight_number):
+    """The pre-structured api.py handler body: query -> text -> JSON -> text parsing."""
+    response_data = json.loads(agents.qa_agent_respond(f"What is the status of flight {flight_number}?"))
+    flight_info = {
+        "flight_number": flight_number, "departure_time": "Unknown", "destination": "Unknown",
+        "status": "Unknown", "gate": "Unknown", "terminal": "Unknown", "aircraft": "Unknown",
+        "estimated_arrival": "Unknown", "delay": "Unknown", "codeshare": "Unknown",
+        "codeshare_flight": "Unknown",
+    }
+    for line in response_data.get("answer", "").split('\n'):
+        if 'Flight' in line and 'information' in line:
+            continue
+        if 'Time:' in line:
+            flight_info['departure_time'] = line.split('Time:')[1].strip()
+        elif 'Destination:' in line:
+            flight_info['destination'] = line.split('Destination:')[1].strip()
+        elif 'Status:' in line:
+            flight_info['status'] = line.split('Status:')[1].strip()
+        elif 'Gate:' in line:
+            flight_info['gate'] = line.split('Gate:')[1].strip()
+        elif 'Terminal:' in line:
+            flight_info['terminal'] = line.split('Terminal:')[1].strip()
+        elif 'Aircraft:' in line:
+            flight_info['aircraft'] = line.split('Aircraft:')[1].strip()
+        elif 'Estimated Arrival:' in line:
+            flight_info['estimated_arrival'] = line.split('Estimated Arrival:')[1].strip()
+        elif 'Delay:' in line:
+            flight_info['delay'] = line.split('Delay:')[1].strip().split()[0]
+        elif 'Codeshare:' in line:
+            codeshare_info = line.split('Codeshare:')[1].strip()
+            if '(' in codeshare_info:
+                flight_info['codeshare'] = codeshare_info.split('(')[0].strip()
+                flight_info['codeshare_flight'] = codeshare_info.split('(')[1].replace(')', '').strip()
+    return json.dumps(flight_info)
+
+
+def structured_flight_payload(flight_number):
+    return json.dumps(agents.get_flight_info(flight_number))
+
+
+def measure(label, fn, iterations):
+    start = time.process_time()
+    for i in range(iterations):
+        fn(FLIGHTS[i % len(FLIGHTS)])
+    cpu = time.process_time() - start
+    print(f"{label:<11} {cpu / iterations * 1e6:8.1f} us CPU/request")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    logging.disable(logging.CRITICAL)
+    with StubAviationStack() as stub:
+        agents.flight_api.base_url = stub.base_url
+        for flight_number in FLIGHTS:
+            agents.get_flight_info(flight_number)
+    measure("legacy", legacy_flight_payload, iterations)
+    measure("structured", structured_flight_payload, iterations)
+
+
+if __name__ == '__main__':
+    main()
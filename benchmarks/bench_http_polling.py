@@ -0,0 +1,84 @@
+"""Bytes on the wire for polling clients, with and without HTTP validators and compression.
+
+Polls one flight repeatedly (plain GETs versus If-None-Match revalidation)
+and fetches large JSON bodies (identity versus gzip/br) from the Flask app
+(api.py) and the FastAPI app (api_server.py), all through their test
+clients and a local stub upstream.
+Usage: python benchmarks/bench_http_polling.py [polls] [batch_size]
+"""
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('AVIATIONSTACK_API_KEY', 'benchmark-key')
+logging.disable(logging.CRITICAL)
+
+from stub_aviationstack import StubAviationStack  # noqa: E402
+
+
+def poll_flask(client, path, polls, revalidate):
+    total = 0
+    etag = None
+    statuses = set()
+    for _ in range(polls):
+        headers = {'If-None-Match': etag} if revalidate and etag else {}
+        response = client.get(path, headers=headers)
+        etag = response.headers.get('ETag') or etag
+        statuses.add(response.status_code)
+        total += len(response.data)
+    return total, statuses
+
+
+def poll_fastapi(client, path, polls, revalidate):
+    total = 0
+    etag = None
+    statuses = set()
+    for _ in range(polls):
+        headers = {'If-None-Match': etag} if revalidate and etag else {}
+        response = client.get(path, headers=headers)
+        etag = response.headers.get('etag') or etag
+        statuses.add(response.status_code)
+        total += response.num_bytes_downloaded
+    return total, statuses
+
+
+def main():
+    polls = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    import agents
+    import api
+    import api_server
+    from fastapi.testclient import TestClient
+
+    flights = [f"BA{n}" for n in range(batch_size)]
+    with StubAviationStack() as stub:
+        agents.flight_api.base_url = stub.base_url
+        flask_client = api.app.test_client()
+
+        print(f"{'server':<8} {'case':<28} {'bytes':>10}  statuses")
+        for revalidate in (False, True):
+            total, statuses = poll_flask(flask_client, '/api/flight/BA117', polls, revalidate)
+            case = f"{polls} polls, {'If-None-Match' if revalidate else 'plain GET'}"
+            print(f"{'flask':<8} {case:<28} {total:>10}  {sorted(statuses)}")
+        for encoding in ('identity', 'gzip', 'br'):
+            response = flask_client.post('/api/flights/batch', json={'flight_numbers': flights},
+                                         headers={'Accept-Encoding': encoding})
+            case = f"batch of {batch_size}, {response.headers.get('Content-Encoding', 'identity')}"
+            print(f"{'flask':<8} {case:<28} {len(response.data):>10}  [{response.status_code}]")
+
+        with TestClient(api_server.app) as fastapi_client:
+            for revalidate in (False, True):
+                total, statuses = poll_fastapi(fastapi_client, '/flight/BA117', polls, revalidate)
+                case = f"{polls} polls, {'If-None-Match' if revalidate else 'plain GET'}"
+                print(f"{'fastapi':<8} {case:<28} {total:>10}  {sorted(statuses)}")
+            query = {'query': 'status of ' + ', '.join(flights[:8])}
+            for encoding in ('identity', 'gzip', 'br'):
+                response = fastapi_client.post('/chat', json=query, headers={'Accept-Encoding': encoding})
+                case = f"8-flight chat, {response.headers.get('content-encoding', 'identity')}"
+                print(f"{'fastapi':<8} {case:<28} {response.num_bytes_downloaded:>10}  [{response.status_code}]")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Upstream cost and fan-out latency of live flight tracking as subscribers grow.
+
+Subscribes N asyncio readers (as the WebSocket endpoint does) spread over a
+few flights on a moving StubAviationStack, lets the tracker poll for a fixed
+time, and reports upstream polls, events delivered, publish-to-receive
+latency and the size of change events against full snapshots. Upstream polls
+should stay flat as subscribers grow.
+
+Usage: python benchmarks/bench_live.py [--subscribers 10,100,1000,5000] [--flights 5]
+       [--seconds 5] [--interval 0.5]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+logging.disable(logging.CRITICAL)
+
+from stub_aviationstack import StubAviationStack  # noqa: E402
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def mean(values):
+    return sum(values) / len(values) if values else 0.0
+
+
+async def measure(subscriber_count, args):
+    from flight_api import FlightAPI
+    from flight_tracker import FlightTracker
+
+    flights = [f"BA{100 + n}" for n in range(args.flights)]
+    with StubAviationStack(latency=0.02, moving=True) as stub:
+        api = FlightAPI(api_key='benchmark-key', base_url=stub.base_url)
+        tracker = FlightTracker(api, max_per_minute=60000, poll_interval=args.interval, max_pending=10000)
+        published = {}  # flight_number -> perf_counter when its latest poll was published
+        on_refresh = tracker.scheduler.on_refresh
+
+        def timed_refresh(flight_number, record):
+            published[flight_number] = time.perf_counter()
+            on_refresh(flight_number, record)
+
+        tracker.scheduler.on_refresh = timed_refresh
+        loop = asyncio.get_running_loop()
+        subscriptions = [
+            await asyncio.to_thread(tracker.subscribe, [flights[n % len(flights)]], loop)
+            for n in range(subscriber_count)
+        ]
+        stub.reset()
+        latencies = []
+        sizes = {'snapshot': [], 'update': []}
+
+        async def read(subscription):
+            while (event := await subscription.get()) is not None:
+                if event.kind == 'update':
+                    latencies.append(time.perf_counter() - published[event.flight_number])
+                sizes.setdefault(event.kind, []).append(len(event.data))
+
+        readers = [asyncio.create_task(read(s)) for s in subscriptions]
+        await asyncio.sleep(args.seconds)
+        for subscription in subscriptions:
+            tracker.unsubscribe(subscription)
+        for reader in readers:
+            reader.cancel()
+        tracker.stop()
+        polls = stub.calls
+
+    latencies.sort()
+    return {
+        "subscribers": subscriber_count,
+        "polls": polls,
+        "deliveries": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "snapshot_bytes": mean(sizes['snapshot']),
+        "update_bytes": mean(sizes['update']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--subscribers', default='10,100,1000,5000')
+    parser.add_argument('--flights', type=int, default=5)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--interval', type=float, default=0.5, help='seconds between polls of each flight')
+    args = parser.parse_args()
+    os.environ.setdefault('LOG_FILE', os.devnull)
+
+    print(f"flights={args.flights} seconds={args.seconds} interval={args.interval}s")
+    print(f"{'subscribers':>11} {'polls':>6} {'deliveries':>10} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'snapshot B':>10} {'update B':>9}")
+    for count in (int(n) for n in args.subscribers.split(',')):
+        row = asyncio.run(measure(count, args))
+        print(f"{row['subscribers']:>11} {row['polls']:>6} {row['deliveries']:>10} {row['p50_ms']:>8.2f} "
+              f"{row['p99_ms']:>8.2f} {row['snapshot_bytes']:>10.0f} {row['update_bytes']:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""FlightAPI.get_flight_info throughput under the old and new logging setups.
+
+legacy: root logger forced to DEBUG with synchronous stream + file handlers
+        and every debug line emitted (LOG_SAMPLE_RATE=1), as the modules used
+        to configure at import time.
+queued: configure_logging() at INFO with the queue-backed handlers.
+
+Each mode runs in its own process since logging configuration is global.
+Usage: python benchmarks/bench_logging.py [requests]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def run_mode(mode, n):
+    import logging
+
+    log_file = os.path.join(tempfile.mkdtemp(), 'bench.log')
+    if mode == 'legacy':
+        os.environ['LOG_SAMPLE_RATE'] = '1'
+        logging.basicConfig(
+            level=logging.DEBUG,
+            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            handlers=[logging.StreamHandler(open(os.devnull, 'w')), logging.FileHandler(log_file)]
+        )
+    else:
+        from logging_config import configure_logging
+        configure_logging(level='INFO', log_file=log_file, console=False)
+
+    os.environ.setdefault('AVIATIONSTACK_API_KEY', 'benchmark-key')
+    from flight_api import FlightAPI
+    from stub_aviationstack import StubAviationStack
+
+    with StubAviationStack() as stub:
+        api = FlightAPI()
+        api.base_url = stub.base_url
+        flights = [f"BA{i}" for i in range(200)]
+        for flight_number in flights:
+            api.get_flight_info(flight_number)
+        start = time.perf_counter()
+        for i in range(n):
+            flight_number = flights[i % len(flights)]
+            if i % 20 == 0:
+                # One request in twenty misses the cache and goes upstream
+                api.cache.delete(api._cache_key(flight_number))
+            api.get_flight_info(flight_number)
+        elapsed = time.perf_counter() - start
+    print(f"{mode:<7} {n / elapsed:10.1f} req/s  log size {os.path.getsize(log_file) / 1024:8.1f} KiB")
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == '--mode':
+        run_mode(sys.argv[2], int(sys.argv[3]))
+        return
+    n = sys.argv[1] if len(sys.argv) > 1 else '20000'
+    for mode in ('legacy', 'queued'):
+        subprocess.run([sys.executable, __file__, '--mode', mode, n], check=True, cwd=tempfile.gettempdir())
+
+
+if __name__ == '__main__':
+    main()
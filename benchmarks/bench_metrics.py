@@ -0,0 +1,51 @@
+"""Per-event cost of the metrics instrumentation, and of a cached lookup with it.
+
+Times counter increments, histogram observations and the timed() stage
+wrapper in nanoseconds per event (an empty call is subtracted), then cached
+FlightAPI.get_flight_record calls, which pay for a cache-outcome counter and
+the lookup stage timer. Finally renders the registry once to show scrape cost.
+Usage: python benchmarks/bench_metrics.py [events]
+"""
+import logging
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('AVIATIONSTACK_API_KEY', 'benchmark-key')
+logging.disable(logging.CRITICAL)
+
+from flight_record import FlightRecord  # noqa: E402
+from metrics import CACHE_HIT, REGISTRY, STAGE_SECONDS, timed  # noqa: E402
+
+
+def per_event_ns(fn, events):
+    baseline = timeit.timeit(lambda: None, number=events)
+    return (timeit.timeit(fn, number=events) - baseline) / events * 1e9
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    from flight_api import FlightAPI
+
+    series = STAGE_SECONDS.labels('bench')
+    noop = timed('bench')(lambda: None)
+    print(f"{'event':<32} {'ns/event':>10}")
+    print(f"{'counter inc (pre-bound)':<32} {per_event_ns(CACHE_HIT.inc, events):>10.0f}")
+    print(f"{'histogram observe (pre-bound)':<32} {per_event_ns(lambda: series.observe(0.002), events):>10.0f}")
+    print(f"{'timed() stage wrapper':<32} {per_event_ns(noop, events):>10.0f}")
+
+    api = FlightAPI()
+    api.cache.set(api._cache_key('BA117'), FlightRecord(flight_number='BA117', status='active'))
+    lookup_ns = timeit.timeit(lambda: api.get_flight_record('BA117'), number=events) / events * 1e9
+    print(f"{'cached get_flight_record':<32} {lookup_ns:>10.0f}")
+
+    start = time.perf_counter()
+    body = REGISTRY.render()
+    print(f"scrape: {len(body)} bytes in {(time.perf_counter() - start) * 1000:.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Chat query parsing throughput: the old per-call regex versus QueryParser.
+
+legacy: re.search(r'([A-Za-z]{2}\d+)') per query, first match only, as
+        agents.extract_flight_number used to do.
+parser: QueryParser.parse over the real AIRLINE_CODES index (every flight
+        number, ICAO codes, airline names).
+
+The corpus mixes single and multi-flight questions, airline names, ICAO
+designators and queries with no flight at all. Prints queries/second and how
+many flight numbers each approach found.
+Usage: python benchmarks/bench_query_parser.py [queries]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('AVIATIONSTACK_API_KEY', 'benchmark-key')
+
+from agents import AIRLINE_CODES, query_parser  # noqa: E402
+
+TEMPLATES = [
+    "What is the status of {f1}?",
+    "status of {f1}",
+    "is {f1} delayed today",
+    "Compare {f1} and {f2}",
+    "status of {f1}, {f2}, {f3}",
+    "When does {name} flight {n1} land?",
+    "Is the {name} {n1} on time?",
+    "Which gate is {f1} leaving from, and is {f2} still boarding?",
+    "My connection is {f1} then {f2} - will I make it?",
+    "Any delays at Heathrow this morning?",
+    "I'm on an A320 to Dubai, is it late?",
+    "hi, can you check {lower}",
+    "{icao} flight {n1} arrival time",
+]
+
+
+def build_corpus(size, seed=7):
+    rng = random.Random(seed)
+    codes = sorted(AIRLINE_CODES)
+    two_letter = [code for code in codes if len(code) == 2]
+    icao = [code for code in codes if len(code) == 3]
+    corpus = []
+    for _ in range(size):
+        flights = [f"{rng.choice(two_letter)}{rng.randrange(1, 9999)}" for _ in range(3)]
+        corpus.append(rng.choice(TEMPLATES).format(
+            f1=flights[0], f2=flights[1], f3=flights[2], lower=flights[0].lower(),
+            name=AIRLINE_CODES[rng.choice(two_letter)], n1=rng.randrange(1, 9999),
+            icao=rng.choice(icao),
+        ))
+    return corpus
+
+
+def legacy_extract(text):
+    match = re.search(r'([A-Za-z]{2}\d+)', text)
+    return [match.group(1)] if match else []
+
+
+def run(label, extract, corpus):
+    found = 0
+    start = time.perf_counter()
+    for text in corpus:
+        found += len(extract(text))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<7} {len(corpus) / elapsed:12.0f} queries/s  {found:7d} flight numbers found")
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    corpus = build_corpus(size)
+    run('legacy', legacy_extract, corpus)
+    run('parser', query_parser.extract_flight_numbers, corpus)
+
+
+if __name__ == '__main__':
+    main()
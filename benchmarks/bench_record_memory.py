@@ -0,0 +1,73 @@
+"""Bytes per cached and historical flight: legacy dicts versus slotted FlightRecord.
+
+Usage: python benchmarks/bench_record_memory.py [records]
+"""
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flight_record import FlightRecord  # noqa: E402
+from stub_aviationstack import make_flight  # noqa: E402
+
+
+def _get(data, *keys):
+    for key in keys:
+        data = data.get(key) if isinstance(data, dict) else None
+        if data is None:
+            return None
+    return data
+
+
+def raw_values(flight):
+    return dict(
+        flight_number=_get(flight, 'flight', 'iata'), status=_get(flight, 'flight_status'),
+        departure_time=_get(flight, 'departure', 'scheduled'), arrival_time=_get(flight, 'arrival', 'scheduled'),
+        gate=_get(flight, 'departure', 'gate'), terminal=_get(flight, 'departure', 'terminal'),
+        aircraft=_get(flight, 'aircraft', 'iata'), estimated_arrival=_get(flight, 'arrival', 'estimated'),
+        delay=_get(flight, 'departure', 'delay'), codeshare=_get(flight, 'airline', 'name'),
+        codeshare_flight=_get(flight, 'flight', 'codeshared', 'flight_iata'),
+        destination=_get(flight, 'arrival', 'airport'), departure_airport=_get(flight, 'departure', 'airport'),
+        departure_timezone=_get(flight, 'departure', 'timezone'), arrival_timezone=_get(flight, 'arrival', 'timezone'),
+        ground_speed=_get(flight, 'live', 'speed_horizontal'), altitude=_get(flight, 'live', 'altitude'),
+    )
+
+
+def legacy(values):
+    cached = {k: ('Unknown' if v is None else v) for k, v in values.items()}
+    historical = {'timestamp': datetime.now().isoformat(), **cached}
+    return cached, historical
+
+
+def slotted(values):
+    record = FlightRecord.from_values(**values)
+    # The historical store keeps a reference to the same immutable record
+    return record, record
+
+
+def measure(label, build, inputs):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [build(values) for values in inputs]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    # Subtract the list holding the results and the (cached, historical) tuples
+    total -= sys.getsizeof(kept) + sum(sys.getsizeof(pair) for pair in kept)
+    print(f"{label:<9} {total / len(inputs):8.1f} bytes per cached+historical record")
+    return kept
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    # Each record gets its own strings, as it would after json decoding
+    inputs = [raw_values(make_flight(f"BA{i}")) for i in range(n)]
+    inputs = [{k: (''.join(v) if isinstance(v, str) else v) for k, v in values.items()} for values in inputs]
+    measure("legacy", legacy, inputs)
+    measure("slotted", slotted, inputs)
+
+
+if __name__ == '__main__':
+    main()
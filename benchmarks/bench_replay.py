@@ -0,0 +1,305 @@
+"""Replay a query trace against the flight lookup stack with no real API quota spent.
+
+Each target runs in its own process against a local StubAviationStack:
+
+  flightapi  FlightAPI.get_flight_record / get_flight_records
+  agents     agents.get_flight_info and qa_agent_respond
+  flask      api.py through the Flask test client (/api/flight, /api/query)
+  fastapi    api_server.py in-process over ASGI (/flight, /chat)
+
+A trace is JSONL with one operation per line, either {"flight_number": "BA117"}
+or {"query": "is BA117 delayed?"}. Without --trace one is generated with
+Zipf-distributed flight popularity (--save-trace writes it out for reuse).
+Reports throughput, p50/p95/p99 latency, upstream calls and peak RSS per
+target; --baseline compares against an earlier --json run and exits non-zero
+when throughput or p95 regress by more than --max-regression.
+
+Usage: python benchmarks/bench_replay.py [--targets flightapi,agents,flask,fastapi]
+       [--trace trace.jsonl | --operations 5000 --flights 2000 --zipf 1.1]
+       [--concurrency 8] [--latency 0.02] [--error-rate 0.01] [--throttle-rate 0.01]
+       [--json] [--baseline results.json]
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('AVIATIONSTACK_API_KEY', 'benchmark-key')
+os.environ.setdefault('LOG_FILE', os.devnull)
+logging.disable(logging.CRITICAL)
+
+from stub_aviationstack import StubAviationStack  # noqa: E402
+
+TARGETS = ('flightapi', 'agents', 'flask', 'fastapi')
+AIRLINES = ['BA', 'AA', 'DL', 'UA', 'LH', 'AF', 'KL', 'EK', 'SQ', 'NH', 'QR', 'TK']
+QUERY_TEMPLATES = [
+    "What is the status of {0}?",
+    "is {0} delayed today",
+    "When does {0} land?",
+    "Compare {0} and {1}",
+    "status of {0}, {1}, {2}",
+]
+
+
+def generate_trace(operations, flights, zipf_s, chat_ratio, seed):
+    """Build operations whose flight popularity follows a Zipf(s) distribution."""
+    rng = random.Random(seed)
+    catalogue = [f"{AIRLINES[n % len(AIRLINES)]}{100 + n // len(AIRLINES)}" for n in range(flights)]
+    rng.shuffle(catalogue)
+    weights = [1 / rank ** zipf_s for rank in range(1, flights + 1)]
+    trace = []
+    for _ in range(operations):
+        if rng.random() < chat_ratio:
+            template = rng.choice(QUERY_TEMPLATES)
+            picks = rng.choices(catalogue, weights, k=template.count('{'))
+            trace.append({"query": template.format(*picks)})
+        else:
+            trace.append({"flight_number": rng.choices(catalogue, weights)[0]})
+    return trace
+
+
+def load_trace(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_trace(trace, path):
+    with open(path, 'w') as f:
+        for op in trace:
+            f.write(json.dumps(op) + '\n')
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_threaded(trace, concurrency, lookup, query):
+    """Replay trace over a thread pool; returns per-operation latencies and error count."""
+    errors = 0
+    lock = threading.Lock()
+
+    def run(op):
+        nonlocal errors
+        start = time.perf_counter()
+        ok = lookup(op["flight_number"]) if "flight_number" in op else query(op["query"])
+        elapsed = time.perf_counter() - start
+        if not ok:
+            with lock:
+                errors += 1
+        return elapsed
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(run, trace)), errors
+
+
+def replay_flightapi(trace, concurrency, stub):
+    from flight_api import FlightAPI
+    from flight_record import FlightRecord
+    from query_parser import QueryParser
+    from agents import AIRLINE_CODES
+
+    api = FlightAPI()
+    api.base_url = stub.base_url
+    parser = QueryParser(AIRLINE_CODES)
+
+    def query(text):
+        results = api.get_flight_records(parser.extract_flight_numbers(text))
+        return all(isinstance(r, FlightRecord) for r in results.values())
+
+    return run_threaded(trace, concurrency, lambda fn: isinstance(api.get_flight_record(fn), FlightRecord), query)
+
+
+def replay_agents(trace, concurrency, stub):
+    import agents
+
+    agents.flight_api.base_url = stub.base_url
+    return run_threaded(trace, concurrency,
+                        lambda fn: "error" not in agents.get_flight_info(fn),
+                        lambda text: '"error"' not in agents.qa_agent_respond(text))
+
+
+def replay_flask(trace, concurrency, stub):
+    import agents
+    import api
+
+    agents.flight_api.base_url = stub.base_url
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, 'client'):
+            local.client = api.app.test_client()
+        return local.client
+
+    return run_threaded(trace, concurrency,
+                        lambda fn: client().get(f'/api/flight/{fn}').status_code == 200,
+                        lambda text: client().post('/api/query', json={'query': text}).status_code == 200)
+
+
+def replay_fastapi(trace, concurrency, stub):
+    import asyncio
+
+    import httpx
+
+    import agents
+    import api_server
+
+    agents.flight_api.base_url = stub.base_url
+
+    async def replay():
+        semaphore = asyncio.Semaphore(concurrency)
+        transport = httpx.ASGITransport(app=api_server.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            async def run(op):
+                async with semaphore:
+                    start = time.perf_counter()
+                    if "flight_number" in op:
+                        response = await client.get(f"/flight/{op['flight_number']}")
+                        ok = response.status_code == 200
+                    else:
+                        response = await client.post('/chat', json={'query': op["query"]})
+                        ok = response.status_code == 200 and '"error"' not in response.json()["response"]
+                    return time.perf_counter() - start, ok
+
+            results = await asyncio.gather(*(run(op) for op in trace))
+        await agents.async_flight_api.aclose()
+        return [elapsed for elapsed, _ in results], sum(1 for _, ok in results if not ok)
+
+    return asyncio.run(replay())
+
+
+REPLAYERS = {
+    'flightapi': replay_flightapi,
+    'agents': replay_agents,
+    'flask': replay_flask,
+    'fastapi': replay_fastapi,
+}
+
+
+def run_target(target, trace, args):
+    """Replay trace against one target in this process and summarise it."""
+    with StubAviationStack(latency=args.latency, error_rate=args.error_rate,
+                           throttle_rate=args.throttle_rate) as stub:
+        start = time.perf_counter()
+        latencies, errors = REPLAYERS[target](trace, args.concurrency, stub)
+        wall = time.perf_counter() - start
+        upstream_calls = stub.calls
+    latencies.sort()
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        rss_kb //= 1024
+    return {
+        "target": target,
+        "operations": len(trace),
+        "seconds": round(wall, 3),
+        "ops_per_sec": round(len(trace) / wall, 1) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "errors": errors,
+        "upstream_calls": upstream_calls,
+        "peak_rss_mb": round(rss_kb / 1024, 1),
+    }
+
+
+def run_isolated(target, trace_path, args):
+    """Run one target in a fresh interpreter so caches and RSS are not shared."""
+    command = [sys.executable, os.path.abspath(__file__), '--target', target, '--trace', trace_path,
+               '--concurrency', str(args.concurrency), '--latency', str(args.latency),
+               '--error-rate', str(args.error_rate), '--throttle-rate', str(args.throttle_rate)]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare(results, baseline, max_regression):
+    """Return descriptions of targets that regressed against baseline results."""
+    previous = {row["target"]: row for row in baseline}
+    regressions = []
+    for row in results:
+        old = previous.get(row["target"])
+        if old is None:
+            continue
+        if row["ops_per_sec"] < old["ops_per_sec"] * (1 - max_regression):
+            regressions.append(f"{row['target']}: throughput {old['ops_per_sec']} -> {row['ops_per_sec']} ops/s")
+        if row["p95_ms"] > old["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{row['target']}: p95 {old['p95_ms']} -> {row['p95_ms']} ms")
+    return regressions
+
+
+def print_table(results):
+    print(f"{'target':<10} {'ops':>6} {'ops/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'errors':>6} {'upstream':>8} {'rss MB':>7}")
+    for row in results:
+        print(f"{row['target']:<10} {row['operations']:>6} {row['ops_per_sec']:>9.1f} {row['p50_ms']:>8.3f} "
+              f"{row['p95_ms']:>8.3f} {row['p99_ms']:>8.3f} {row['errors']:>6} {row['upstream_calls']:>8} "
+              f"{row['peak_rss_mb']:>7.1f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--targets', default=','.join(TARGETS), help='comma-separated subset of ' + ', '.join(TARGETS))
+    parser.add_argument('--target', choices=TARGETS, help=argparse.SUPPRESS)  # Child process mode
+    parser.add_argument('--trace', help='JSONL trace of {"flight_number"} / {"query"} operations')
+    parser.add_argument('--save-trace', help='write the generated trace here')
+    parser.add_argument('--operations', type=int, default=5000)
+    parser.add_argument('--flights', type=int, default=2000, help='distinct flights in a generated trace')
+    parser.add_argument('--zipf', type=float, default=1.1, help='Zipf exponent of flight popularity')
+    parser.add_argument('--chat-ratio', type=float, default=0.2, help='fraction of chat queries')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.02, help='stub upstream latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.2)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.target:
+        print(json.dumps(run_target(args.target, load_trace(args.trace), args)))
+        return
+
+    targets = [t.strip() for t in args.targets.split(',') if t.strip()]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        sys.exit(f"Unknown targets: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        trace_path = args.trace
+        if trace_path is None:
+            trace = generate_trace(args.operations, args.flights, args.zipf, args.chat_ratio, args.seed)
+            trace_path = args.save_trace or os.path.join(tmp, 'trace.jsonl')
+            save_trace(trace, trace_path)
+        results = [run_isolated(target, trace_path, args) for target in targets]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
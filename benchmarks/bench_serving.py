@@ -0,0 +1,161 @@
+"""Requests/second of serve.py as worker processes are added.
+
+Starts serve.py (flask on gunicorn, fastapi on uvicorn) for each worker count,
+pointed at a local StubAviationStack, and hammers the single-flight endpoint
+with keep-alive clients for a fixed time. Flights follow a Zipf popularity, so
+most requests are cache hits, the CPU-bound path that extra workers should
+scale. Load is generated by separate processes so the client is not the
+bottleneck; on a small machine, use fewer --clients than cores.
+
+Usage: python benchmarks/bench_serving.py [--apps flask,fastapi] [--workers 1,2,4]
+       [--seconds 10] [--clients 4] [--connections 8] [--flights 200]
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from stub_aviationstack import StubAviationStack  # noqa: E402
+
+PATHS = {'flask': '/api/flight/{}', 'fastapi': '/flight/{}'}
+HEALTH = {'flask': '/api/health', 'fastapi': '/'}
+
+
+def flight_catalogue(count):
+    airlines = ['BA', 'AA', 'DL', 'UA', 'LH', 'AF', 'EK', 'SQ']
+    return [f"{airlines[n % len(airlines)]}{100 + n // len(airlines)}" for n in range(count)]
+
+
+def wait_until_ready(port, path, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', path)
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError('server did not become ready')
+
+
+def client_process(port, path_template, flights, seconds, connections, seed, results):
+    """Issue keep-alive GETs from several threads until the deadline; report (requests, errors)."""
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, len(flights) + 1)]
+    paths = [path_template.format(f) for f in rng.choices(flights, weights, k=5000)]
+    deadline = time.monotonic() + seconds
+    counts = []
+    lock = threading.Lock()
+
+    def worker(offset):
+        done = errors = 0
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        i = offset
+        while time.monotonic() < deadline:
+            try:
+                conn.request('GET', paths[i % len(paths)])
+                response = conn.getresponse()
+                response.read()
+                done += 1
+                if response.status != 200:
+                    errors += 1
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+            i += 1
+        conn.close()
+        with lock:
+            counts.append((done, errors))
+
+    threads = [threading.Thread(target=worker, args=(n * 997,)) for n in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put((sum(c[0] for c in counts), sum(c[1] for c in counts)))
+
+
+def measure(app, workers, args, stub, flights):
+    port = 18000 + workers
+    state_dir = tempfile.mkdtemp(prefix='bench-serving-')
+    env = {
+        **os.environ,
+        'AVIATIONSTACK_API_KEY': os.environ.get('AVIATIONSTACK_API_KEY', 'benchmark-key'),
+        'AVIATIONSTACK_BASE_URL': stub.base_url,
+        'LOG_LEVEL': 'WARNING',
+        'LOG_FILE': os.devnull,
+        'FLIGHT_WARMUP': ','.join(flights),
+        'FLIGHT_STATE_DIR': state_dir,
+        # Shared SQLite cache even for one worker, so every row measures the same cache path
+        'FLIGHT_CACHE_DB': os.path.join(state_dir, 'flight_cache.db'),
+        'RATE_LIMIT_DB': os.path.join(state_dir, 'rate_limit.db'),
+    }
+    command = [sys.executable, os.path.join(ROOT, 'serve.py'), app, '--workers', str(workers),
+               '--bind', f'127.0.0.1:{port}', '--threads', str(args.threads)]
+    server = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(port, HEALTH[app], server)
+        # Let every worker finish its warm-up before timing
+        time.sleep(1 + 0.2 * workers)
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(target=client_process, args=(port, PATHS[app], flights, args.seconds,
+                                                                  args.connections, seed, results))
+            for seed in range(args.clients)
+        ]
+        start = time.perf_counter()
+        for client in clients:
+            client.start()
+        totals = [results.get() for _ in clients]
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        shutil.rmtree(state_dir, ignore_errors=True)
+    done = sum(t[0] for t in totals)
+    errors = sum(t[1] for t in totals)
+    return done / elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--apps', default='flask,fastapi')
+    parser.add_argument('--workers', default=','.join(str(n) for n in (1, 2, 4, 8) if n <= (os.cpu_count() or 1)) or '1')
+    parser.add_argument('--threads', type=int, default=4, help='threads per Flask worker')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--clients', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--connections', type=int, default=8, help='keep-alive connections per client process')
+    parser.add_argument('--flights', type=int, default=200)
+    args = parser.parse_args()
+
+    flights = flight_catalogue(args.flights)
+    print(f"cores={os.cpu_count()} clients={args.clients}x{args.connections} seconds={args.seconds}")
+    print(f"{'app':<8} {'workers':>7} {'req/s':>10} {'speedup':>8} {'errors':>7}")
+    with StubAviationStack(latency=0.02) as stub:
+        for app in args.apps.split(','):
+            baseline = None
+            for workers in (int(n) for n in args.workers.split(',')):
+                rps, errors = measure(app, workers, args, stub, flights)
+                baseline = baseline or rps
+                print(f"{app:<8} {workers:>7} {rps:>10.1f} {rps / baseline:>7.2f}x {errors:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Compare upstream latency with the pooled FlightTransport versus one-shot requests.get.
+
+Usage: python benchmarks/bench_transport.py [requests] [threads]
+"""
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flight_transport import FlightTransport  # noqa: E402
+from stub_aviationstack import StubAviationStack  # noqa: E402
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def run(label, get, url, n, threads):
+    def one(i):
+        start = time.perf_counter()
+        get(url, params={'access_key': 'bench', 'flight_iata': f"BA{i % 500}"}).json()
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(threads) as pool:
+        start = time.perf_counter()
+        latencies = list(pool.map(one, range(n)))
+        elapsed = time.perf_counter() - start
+    print(f"{label:<10} p50={statistics.median(latencies) * 1000:7.2f}ms "
+          f"p99={percentile(latencies, 99) * 1000:7.2f}ms  {n / elapsed:8.1f} req/s")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    with StubAviationStack() as stub:
+        url = f"{stub.base_url}/flights"
+        run("unpooled", requests.get, url, n, threads)
+        transport = FlightTransport(pool_maxsize=threads)
+        run("pooled", transport.get, url, n, threads)
+        transport.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Cold-import budget for the entry points: main.py (CLI), api.py (Flask) and api_server.py (FastAPI).
+
+Imports each module in a fresh interpreter under `python -X importtime`, with
+AVIATIONSTACK_API_KEY unset and an empty working directory, and takes the
+median cumulative import time over several runs. The import must succeed
+offline and leave no files behind (no log files, no cache databases).
+Exits non-zero when a module is over budget or has import-time side effects,
+so it can gate CI.
+
+Usage: python benchmarks/check_import_time.py [--runs 5] [--budget main=150 --budget api=400 ...]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Milliseconds of cumulative import time allowed per module
+DEFAULT_BUDGETS = {'main': 150, 'api': 400, 'api_server': 800}
+
+
+def import_once(module, cwd):
+    """Import module in a fresh interpreter; return (milliseconds, error text or None)."""
+    env = {key: value for key, value in os.environ.items()
+           if not key.startswith(('AVIATIONSTACK_', 'FLIGHT_', 'RATE_LIMIT_', 'LOG_'))}
+    env['PYTHONPATH'] = ROOT
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=cwd, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1]
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000, None
+    return None, f'{module} missing from -X importtime output'
+
+
+def check(module, budget, runs):
+    """Return (median ms, problems) for one module."""
+    problems = []
+    timings = []
+    with tempfile.TemporaryDirectory() as cwd:
+        for _ in range(runs):
+            elapsed, error = import_once(module, cwd)
+            if error:
+                return None, [f'import failed: {error}']
+            timings.append(elapsed)
+        leftovers = os.listdir(cwd)
+    if leftovers:
+        problems.append(f"import created files: {', '.join(sorted(leftovers))}")
+    median = statistics.median(timings)
+    if median > budget:
+        problems.append(f'{median:.0f}ms exceeds the {budget}ms budget')
+    return median, problems
+
+
+def parse_budgets(values):
+    budgets = dict(DEFAULT_BUDGETS)
+    for value in values or ():
+        module, _, ms = value.partition('=')
+        budgets[module] = float(ms)
+    return budgets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', action='append', metavar='MODULE=MS', help='override a budget')
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<12} {'median ms':>10} {'budget ms':>10}  result")
+    for module, budget in parse_budgets(args.budget).items():
+        median, problems = check(module, budget, args.runs)
+        shown = f'{median:.1f}' if median is not None else '-'
+        print(f"{module:<12} {shown:>10} {budget:>10.0f}  {'; '.join(problems) or 'ok'}")
+        failed = failed or bool(problems)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""Local stand-in for the AviationStack /v1/flights endpoint used by the benchmarks.
+
+Run it standalone to point real servers at it (AVIATIONSTACK_BASE_URL):
+Usage: python benchmarks/stub_aviationstack.py [--port 8089] [--latency 0.02]
+       [--error-rate 0.01] [--throttle-rate 0.01] [--moving]
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+STATUSES = ['scheduled', 'active', 'landed', 'cancelled', 'diverted']
+AIRPORTS = [
+    ('LHR', 'Heathrow', 'Europe/London'),
+    ('JFK', 'John F Kennedy International', 'America/New_York'),
+    ('DXB', 'Dubai', 'Asia/Dubai'),
+    ('SIN', 'Changi', 'Asia/Singapore'),
+    ('FRA', 'Frankfurt International Airport', 'Europe/Berlin'),
+    ('HND', 'Tokyo Haneda', 'Asia/Tokyo'),
+]
+
+
+def make_flight(flight_iata, seed=None, tick=0):
+    """Build a realistic AviationStack flight record for flight_iata.
+
+    tick advances the live position (altitude, speed) while the rest of the
+    record stays the same.
+    """
+    rng = random.Random(seed if seed is not None else flight_iata)
+    dep, arr = rng.sample(AIRPORTS, 2)
+    hour = rng.randrange(24)
+    delay = rng.choice([None, 0, 5, 12, 25, 45, 90])
+    return {
+        "flight_date": "2026-10-18",
+        "flight_status": rng.choice(STATUSES),
+        "departure": {
+            "airport": dep[1], "timezone": dep[2], "iata": dep[0], "icao": None,
+            "terminal": str(rng.randrange(1, 6)), "gate": f"{rng.choice('ABCD')}{rng.randrange(1, 40)}",
+            "delay": delay, "scheduled": f"2026-10-18T{hour:02d}:00:00+00:00",
+            "estimated": f"2026-10-18T{hour:02d}:00:00+00:00", "actual": None,
+        },
+        "arrival": {
+            "airport": arr[1], "timezone": arr[2], "iata": arr[0], "icao": None,
+            "terminal": None, "gate": None, "baggage": None, "delay": None,
+            "scheduled": f"2026-10-18T{(hour + 7) % 24:02d}:30:00+00:00",
+            "estimated": f"2026-10-18T{(hour + 7) % 24:02d}:40:00+00:00", "actual": None,
+        },
+        "airline": {"name": "Stub Airways", "iata": flight_iata[:2], "icao": None},
+        "flight": {"number": flight_iata[2:], "iata": flight_iata, "icao": None, "codeshared": None},
+        "aircraft": {"registration": "G-STUB", "iata": "B77W", "icao": "B77W", "icao24": "400000"},
+        "live": {
+            "updated": "2026-10-18T12:00:00+00:00", "latitude": 51.47, "longitude": -0.45,
+            "altitude": rng.randrange(0, 12000) + 10 * tick, "direction": rng.randrange(360),
+            "speed_horizontal": round(rng.uniform(0, 950) + tick, 1), "speed_vertical": 0, "is_ground": False,
+        },
+    }
+
+
+class StubAviationStack:
+    """Threaded HTTP server answering /v1/flights with synthetic data.
+
+    latency: seconds to sleep per request; error_rate / throttle_rate: fraction
+    of requests answered with 500 / 429; total: size of the unfiltered dataset;
+    moving: each lookup of a flight moves it, so live fields change between polls.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, throttle_rate=0.0, total=1000, port=0, moving=False):
+        self.latency = latency
+        self.moving = moving
+        self.lookups = {}  # flight_iata -> single-flight lookups served
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.total = total
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.lookups.clear()
+
+    def _respond(self, query):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        roll = random.random()
+        if roll < self.throttle_rate:
+            return 429, {"error": {"code": "rate_limit_reached"}}
+        if roll < self.throttle_rate + self.error_rate:
+            return 500, {"error": {"code": "internal_error"}}
+
+        flight_iata = query.get('flight_iata', [None])[0]
+        if flight_iata:
+            flight_iata = flight_iata.upper()
+            with self._lock:
+                self.lookups[flight_iata] = tick = self.lookups.get(flight_iata, 0) + 1
+            data = [] if flight_iata.startswith('ZZ') else [make_flight(flight_iata, tick=tick if self.moving else 0)]
+            total = len(data)
+            offset = 0
+        else:
+            offset = int(query.get('offset', ['0'])[0])
+            limit = min(int(query.get('limit', ['100'])[0]), 100)
+            data = [make_flight(f"SA{n}") for n in range(offset, min(offset + limit, self.total))]
+            for key, path in (('airline_iata', ('airline', 'iata')), ('flight_status', ('flight_status',)),
+                              ('dep_iata', ('departure', 'iata')), ('arr_iata', ('arrival', 'iata'))):
+                if key in query:
+                    wanted = query[key][0]
+                    data = [f for f in data if _dig(f, path) == wanted]
+            total = self.total
+        return 200, {
+            "pagination": {"limit": 100, "offset": offset, "count": len(data), "total": total},
+            "data": data,
+        }
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path != '/v1/flights':
+                    status, payload = 404, {"error": {"code": "not_found"}}
+                else:
+                    status, payload = stub._respond(parse_qs(parsed.query))
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def _dig(data, path):
+    for key in path:
+        data = data.get(key) if isinstance(data, dict) else None
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local AviationStack stand-in')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--total', type=int, default=1000)
+    parser.add_argument('--moving', action='store_true', help='change live fields on every lookup')
+    args = parser.parse_args()
+    stub = StubAviationStack(latency=args.latency, error_rate=args.error_rate,
+                             throttle_rate=args.throttle_rate, total=args.total, port=args.port,
+                             moving=args.moving)
+    print(f"Serving {stub.base_url}/flights", flush=True)
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        stub._server.server_close()
+
+
+if __name__ == '__main__':
+    main()
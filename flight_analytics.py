@@ -0,0 +1,210 @@
+import threading
+
+import numpy as np
+
+from flight_history import ON_TIME_THRESHOLD
+
+GROUP_BY = ('airline', 'departure_airport', 'destination', 'hour')
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+
+
+def airline_prefix(flight_number):
+    """Return the airline code of a flight number (3-letter ICAO or 2-character IATA)."""
+    if not flight_number:
+        return None
+    prefix = flight_number[:3]
+    if len(prefix) == 3 and prefix.isalpha():
+        return prefix.upper()
+    return flight_number[:2].upper()
+
+
+def departure_hour(departure_time):
+    """Return the scheduled departure hour from an ISO timestamp, or -1."""
+    if isinstance(departure_time, str) and len(departure_time) >= 13 and departure_time[11:13].isdigit():
+        return int(departure_time[11:13])
+    return -1
+
+
+class _Categories:
+    """Dictionary encoding of one string column into int32 codes (-1 = missing)."""
+
+    __slots__ = ('codes', 'labels')
+
+    def __init__(self):
+        self.codes = {}
+        self.labels = []
+
+    def encode(self, value):
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.labels)
+            self.labels.append(value)
+        return code
+
+
+class FlightAnalytics:
+    """Columnar store of historical samples with vectorized fleet-wide statistics.
+
+    Samples are appended as they are stored in FlightAPI.historical_data; every
+    query works on NumPy arrays (masking, bincount, lexsort) rather than
+    looping over records. Only the newest max_rows samples are retained.
+    """
+
+    def __init__(self, max_rows=5_000_000, initial_capacity=4096):
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._size = 0
+        self._categories = {name: _Categories() for name in ('airline', 'departure_airport', 'destination')}
+        self._columns = self._allocate(initial_capacity)
+
+    @staticmethod
+    def _allocate(capacity):
+        return {
+            'timestamp': np.empty(capacity, dtype=np.float64),
+            'delay': np.empty(capacity, dtype=np.float64),
+            'airline': np.empty(capacity, dtype=np.int32),
+            'departure_airport': np.empty(capacity, dtype=np.int32),
+            'destination': np.empty(capacity, dtype=np.int32),
+            'hour': np.empty(capacity, dtype=np.int32),
+        }
+
+    @classmethod
+    def from_history(cls, history, **kwargs):
+        """Build an engine from every sample in a FlightHistory."""
+        analytics = cls(**kwargs)
+        analytics.extend(history.iter_records())
+        return analytics
+
+    def __len__(self):
+        return self._size
+
+    def add(self, record):
+        """Append one FlightRecord sample."""
+        self.extend((record,))
+
+    def extend(self, records):
+        """Append many FlightRecord samples."""
+        categories = self._categories
+        rows = [
+            (
+                record.fetched_at,
+                np.nan if record.delay is None else record.delay,
+                categories['airline'].encode(airline_prefix(record.flight_number)),
+                categories['departure_airport'].encode(record.departure_airport),
+                categories['destination'].encode(record.destination),
+                departure_hour(record.departure_time),
+            )
+            for record in records
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._reserve(len(rows))
+            start, end = self._size, self._size + len(rows)
+            for name, values in zip(('timestamp', 'delay', 'airline', 'departure_airport', 'destination', 'hour'),
+                                    zip(*rows)):
+                self._columns[name][start:end] = values
+            self._size = end
+            if self._size > self.max_rows * 1.25:
+                self._trim()
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        capacity = len(self._columns['timestamp'])
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        # Always reallocate (never resize in place) so query snapshots stay valid
+        columns = self._allocate(capacity)
+        for name, column in self._columns.items():
+            columns[name][:self._size] = column[:self._size]
+        self._columns = columns
+
+    def _trim(self):
+        drop = self._size - self.max_rows
+        columns = self._allocate(len(self._columns['timestamp']))
+        for name, column in self._columns.items():
+            columns[name][:self.max_rows] = column[drop:self._size]
+        self._columns = columns
+        self._size = self.max_rows
+
+    def _snapshot(self, since, until):
+        with self._lock:
+            size = self._size
+            columns = {name: column[:size] for name, column in self._columns.items()}
+            labels = {name: list(cat.labels) for name, cat in self._categories.items()}
+        timestamps = columns['timestamp']
+        mask = np.ones(size, dtype=bool)
+        if since is not None:
+            mask &= timestamps >= since
+        if until is not None:
+            mask &= timestamps < until
+        return columns, labels, mask
+
+    def summary(self, group_by='airline', since=None, until=None, percentiles=DEFAULT_PERCENTILES):
+        """Return per-group sample count, average delay, on-time % and delay percentiles.
+
+        since/until are epoch seconds bounding the sample window; groups are
+        ordered by sample count, largest first.
+        """
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+
+        columns, labels, mask = self._snapshot(since, until)
+        codes = columns[group_by][mask]
+        delays = columns['delay'][mask]
+        known = codes >= 0
+        codes, delays = codes[known], delays[known]
+        if not len(codes):
+            return []
+
+        n_groups = 24 if group_by == 'hour' else len(labels[group_by])
+        has_delay = ~np.isnan(delays)
+        counts = np.bincount(codes, minlength=n_groups)
+        delay_counts = np.bincount(codes, weights=has_delay, minlength=n_groups)
+        delay_sums = np.bincount(codes, weights=np.where(has_delay, delays, 0.0), minlength=n_groups)
+        on_time = np.bincount(codes, weights=~(delays > ON_TIME_THRESHOLD), minlength=n_groups)
+        pct_values = self._group_percentiles(codes[has_delay], delays[has_delay], n_groups, percentiles)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg_delay = delay_sums / delay_counts
+            on_time_pct = on_time / counts * 100
+
+        results = []
+        for code in np.flatnonzero(counts)[np.argsort(-counts[counts > 0], kind='stable')]:
+            key = int(code) if group_by == 'hour' else labels[group_by][code]
+            results.append({
+                "key": key,
+                "count": int(counts[code]),
+                "average_delay": None if np.isnan(avg_delay[code]) else round(float(avg_delay[code]), 2),
+                "on_time_percentage": round(float(on_time_pct[code]), 2),
+                "delay_percentiles": {
+                    f"p{p}": None if np.isnan(values[code]) else round(float(values[code]), 2)
+                    for p, values in zip(percentiles, pct_values)
+                },
+            })
+        return results
+
+    @staticmethod
+    def _group_percentiles(codes, delays, n_groups, percentiles):
+        """Linear-interpolated percentiles of delays within each group, vectorized."""
+        order = np.lexsort((delays, codes))
+        sorted_delays = delays[order]
+        sizes = np.bincount(codes, minlength=n_groups)
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        present = sizes > 0
+        results = []
+        for p in percentiles:
+            values = np.full(n_groups, np.nan)
+            position = (sizes[present] - 1) * (p / 100.0)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.ceil(position).astype(np.int64)
+            base = starts[present]
+            low_values = sorted_delays[base + lower]
+            high_values = sorted_delays[base + upper]
+            values[present] = low_values + (high_values - low_values) * (position - lower)
+            results.append(values)
+        return results
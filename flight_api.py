@@ -1,37 +1,94 @@
 import requests
 import logging
 import os
+import time
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
+import contextvars
 import json
-from collections import defaultdict
-
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('flight_api.log')
-    ]
-)
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flight_analytics import FlightAnalytics
+from flight_cache import FlightCache
+from flight_history import FlightHistory
+from flight_record import NO_FLIGHT_DATA, FlightRecord
+from flight_transport import FlightTransport
+from logging_config import Sampler
+from metrics import CACHE_HIT, CACHE_MISS, CACHE_NEGATIVE, CACHE_STALE, ERRORS, timed
+from rate_limiter import QuotaExhausted, RateLimiter
+from single_flight import SingleFlight
+from sqlite_cache import SQLiteCacheBackend
+
+# Logging is configured by the entry point (see logging_config.configure_logging)
 logger = logging.getLogger(__name__)
+# Per-request debug lines are sampled so DEBUG stays affordable under load
+_sample_debug = Sampler()
+
+# AviationStack returns at most this many flights per list request
+MAX_PAGE_SIZE = 100
+# iter_flights filter names and the upstream parameters they map to
+LIST_FILTERS = {
+    'airline': 'airline_iata',
+    'status': 'flight_status',
+    'departure_airport': 'dep_iata',
+    'arrival_airport': 'arr_iata',
+}
 
 class FlightAPI:
-    def __init__(self):
-        """Initialize the FlightAPI with the API key from environment variables."""
-        load_dotenv()
-        self.api_key = os.getenv('AVIATIONSTACK_API_KEY')
+    def __init__(self, cache_max_entries=10000, cache_max_bytes=32 * 1024 * 1024, transport=None,
+                 batch_concurrency=8, cache_backend=None, limiter=None, api_key=None, base_url=None):
+        """Initialize the FlightAPI with the API key from environment variables.
+
+        Entry points load .env before building one; api_key and base_url
+        override the environment.
+        """
+        self.api_key = api_key or os.getenv('AVIATIONSTACK_API_KEY')
         if not self.api_key:
             logger.error("AVIATIONSTACK_API_KEY environment variable is not set")
             raise ValueError("AVIATIONSTACK_API_KEY environment variable is not set")
-        self.base_url = "http://api.aviationstack.com/v1"
-        self.cache = {}
+        # Overridable so load tests can point at benchmarks/stub_aviationstack.py
+        self.base_url = (base_url or os.getenv('AVIATIONSTACK_BASE_URL', "http://api.aviationstack.com/v1")).rstrip('/')
         self.cache_timeout = timedelta(minutes=5)
-        self.historical_data = defaultdict(list)  # Store historical data
+        self.stale_grace = timedelta(hours=1)  # How long expired records may be served when upstream refuses
+        self.revalidate_window = timedelta(minutes=10)  # Expired records this recent are served while refreshing
+        self.negative_ttl = timedelta(minutes=1)  # How long "no flight data" answers are cached
+        self.error_ttl = timedelta(seconds=15)  # How long upstream failures are cached
+        self.cache = cache_backend or self._default_cache_backend(cache_max_entries, cache_max_bytes)
+        self.limiter = limiter or RateLimiter.from_env()  # Shared AviationStack rate limit and quota
+        self.transport = transport or FlightTransport(limiter=self.limiter)
+        self.stale_served = 0
+        self.revalidations = 0
+        self._revalidating = set()
+        self._revalidate_lock = threading.Lock()
+        self.inflight = SingleFlight()  # Coalesce concurrent upstream fetches
+        self.batch_executor = ThreadPoolExecutor(max_workers=batch_concurrency, thread_name_prefix='flight-batch')
+        # Lookups one batch call may have queued at once: a 500-flight batch holds one pool's worth of
+        # tasks, so a chat query arriving behind it waits for at most that many rather than all 500
+        self.batch_window = batch_concurrency
+        # Background work gets pools of its own so a large batch cannot starve it
+        self.revalidate_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='flight-revalidate')
+        self.prefetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='flight-prefetch')
+        self.historical_data = FlightHistory(capacity=30)  # Store historical data
+        self.analytics = FlightAnalytics()  # Columnar copy for fleet-wide statistics
         self.setup_logging()
         logger.info("FlightAPI initialized successfully")
-        logger.debug(f"Using API key: {self.api_key[:5]}...{self.api_key[-5:]}")
+        logger.debug("Using API key: %s...%s", self.api_key[:5], self.api_key[-5:])
+
+    def _default_cache_backend(self, max_entries, max_bytes):
+        """Use a shared SQLite cache when FLIGHT_CACHE_DB is set, else an in-process LRU."""
+        cache_db = os.getenv('FLIGHT_CACHE_DB')
+        if cache_db:
+            logger.info(f"Using SQLite flight cache at {cache_db}")
+            return SQLiteCacheBackend(
+                cache_db,
+                default_ttl=self.cache_timeout.total_seconds(),
+                stale_grace=self.stale_grace.total_seconds()
+            )
+        return FlightCache(
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            default_ttl=self.cache_timeout.total_seconds(),
+            stale_grace=self.stale_grace.total_seconds()
+        )
 
     def setup_logging(self):
         self.logger = logging.getLogger(__name__)
@@ -41,84 +98,129 @@ class FlightAPI:
         try:
             for key in keys:
                 if not isinstance(data, dict):
-                    logger.debug(f"Expected dict, got {type(data)} for key {key}")
+                    logger.debug("Expected dict, got %s for key %s", type(data), key)
                     return default
                 data = data.get(key)
                 if data is None:
-                    logger.debug(f"Key {key} not found in data")
+                    logger.debug("Key %s not found in data", key)
                     return default
             return data
         except (AttributeError, TypeError) as e:
-            logger.debug(f"Error accessing nested data: {str(e)}")
+            logger.debug("Error accessing nested data: %s", e)
             return default
 
     def get_flight_info(self, flight_number):
         """Get current flight information."""
+        return self._to_response(self.get_flight_record(flight_number))
+
+    @timed('lookup')
+    def get_flight_record(self, flight_number):
+        """Get current flight information as a FlightRecord, or an error dict."""
         try:
-            logger.info(f"Processing request for flight {flight_number}")
-            
             # Check cache first
-            cache_key = f"{flight_number}_{datetime.now().strftime('%Y%m%d')}"
-            if cache_key in self.cache:
-                cached_data, timestamp = self.cache[cache_key]
-                if datetime.now() - timestamp < self.cache_timeout:
-                    logger.info(f"Using cached data for flight {flight_number}")
-                    return cached_data
-
-            # Make API request
-            params = {
-                'access_key': self.api_key,
-                'flight_iata': flight_number
-            }
-            
-            logger.info(f"Making API request to {self.base_url}/flights")
-            logger.debug(f"Request params: {params}")
-            
-            response = requests.get(f"{self.base_url}/flights", params=params)
-            logger.debug(f"API Response status: {response.status_code}")
-            logger.debug(f"API Response headers: {response.headers}")
-            logger.debug(f"API Response content: {response.text}")
-            
-            response.raise_for_status()
-            data = response.json()
-            logger.debug(f"API Response data: {json.dumps(data, indent=2)}")
-
-            if not data or 'data' not in data or not data['data']:
-                logger.warning(f"No flight data found for {flight_number}")
-                return {"error": "No flight data available"}
-
-            flight_data = data['data'][0]
-
-            # Extract flight information
-            flight_info = {
-                "flight_number": self._safe_get(flight_data, 'flight', 'iata'),
-                "status": self._safe_get(flight_data, 'flight_status'),
-                "departure_time": self._safe_get(flight_data, 'departure', 'scheduled'),
-                "arrival_time": self._safe_get(flight_data, 'arrival', 'scheduled'),
-                "gate": self._safe_get(flight_data, 'departure', 'gate'),
-                "terminal": self._safe_get(flight_data, 'departure', 'terminal'),
-                "aircraft": self._safe_get(flight_data, 'aircraft', 'iata'),
-                "estimated_arrival": self._safe_get(flight_data, 'arrival', 'estimated'),
-                "delay": self._safe_get(flight_data, 'departure', 'delay'),
-                "codeshare": self._safe_get(flight_data, 'airline', 'name'),
-                "codeshare_flight": self._safe_get(flight_data, 'flight', 'codeshared', 'flight_iata'),
-                "destination": self._safe_get(flight_data, 'arrival', 'airport'),
-                "departure_airport": self._safe_get(flight_data, 'departure', 'airport'),
-                "departure_timezone": self._safe_get(flight_data, 'departure', 'timezone'),
-                "arrival_timezone": self._safe_get(flight_data, 'arrival', 'timezone'),
-                "ground_speed": self._safe_get(flight_data, 'live', 'speed_horizontal'),
-                "altitude": self._safe_get(flight_data, 'live', 'altitude')
-            }
+            cache_key = self._cache_key(flight_number)
+            cached_data = self.cache.get(cache_key)
+            if cached_data is not None:
+                (CACHE_HIT if isinstance(cached_data, FlightRecord) else CACHE_NEGATIVE).inc()
+                if logger.isEnabledFor(logging.DEBUG) and _sample_debug():
+                    logger.debug("Using cached data for flight %s", flight_number)
+                return cached_data
+            return self._resolve_miss(flight_number, cache_key)
+        except Exception as e:
+            return self._lookup_error(e)
 
-            # Store historical data
-            self._store_historical_data(flight_info)
+    @timed('lookup')
+    def _get_missed_record(self, flight_number):
+        """get_flight_record for a flight the caller has just missed in the cache, without probing it again."""
+        try:
+            return self._resolve_miss(flight_number, self._cache_key(flight_number))
+        except Exception as e:
+            return self._lookup_error(e)
 
-            # Cache the result
-            self.cache[cache_key] = (flight_info, datetime.now())
-            logger.info(f"Successfully retrieved and cached flight info for {flight_number}")
-            
-            return flight_info
+    def _resolve_miss(self, flight_number, cache_key):
+        # Recently expired: answer now and refresh in the background
+        stale = self._revalidatable(cache_key)
+        if stale is not None:
+            CACHE_STALE.inc()
+            self._revalidate_in_background(flight_number, cache_key)
+            return stale
+
+        # Only one caller per key goes upstream; the rest wait for its result
+        CACHE_MISS.inc()
+        return self.inflight.do(cache_key, lambda: self._fetch_flight_info(flight_number, cache_key))
+
+    @staticmethod
+    def _lookup_error(e):
+        ERRORS.inc('lookup', type(e).__name__)
+        if isinstance(e, requests.exceptions.RequestException):
+            logger.error(f"API request failed: {str(e)}")
+            return {"error": "Failed to fetch flight information"}
+        logger.error(f"Unexpected error: {str(e)}")
+        return {"error": "An unexpected error occurred"}
+
+    def get_flights_info(self, flight_numbers):
+        """Get current information for several flights, keyed by flight number."""
+        return {
+            flight_number: self._to_response(result)
+            for flight_number, result in self.get_flight_records(flight_numbers).items()
+        }
+
+    def get_flight_records(self, flight_numbers):
+        """Get FlightRecords (or error dicts) for several flights, keyed by flight number."""
+        # Dedupe while keeping the caller's order
+        unique = list(dict.fromkeys(str(n).strip().upper() for n in flight_numbers if str(n).strip()))
+        results = {}
+        misses = []
+        for flight_number in unique:
+            cached_data = self.cache.get(self._cache_key(flight_number))
+            if cached_data is not None:
+                (CACHE_HIT if isinstance(cached_data, FlightRecord) else CACHE_NEGATIVE).inc()
+                results[flight_number] = cached_data
+            else:
+                misses.append(flight_number)
+
+        logger.info("Batch lookup: %d flights, %d cached, %d to fetch", len(unique), len(unique) - len(misses), len(misses))
+        # Misses were counted above, so the pool skips the fresh-cache probe. It never raises;
+        # failures come back as per-flight error dicts
+        for flight_number, flight_info in zip(misses, self._map_batch(self._get_missed_record, misses)):
+            results[flight_number] = flight_info
+
+        return {flight_number: results[flight_number] for flight_number in unique}
+
+    def _map_batch(self, fn, items):
+        """Run fn over items on the batch pool, with at most batch_window of them queued at a time."""
+        window = threading.BoundedSemaphore(self.batch_window)
+
+        def run(item):
+            try:
+                return fn(item)
+            finally:
+                window.release()
+
+        futures = []
+        for item in items:
+            window.acquire()
+            # Each item runs in a copy of the caller's context so its stage timings reach the request's Server-Timing
+            futures.append(self.batch_executor.submit(contextvars.copy_context().run, run, item))
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def _to_response(result):
+        """Serialize a FlightRecord for callers; error dicts pass through."""
+        return result.to_dict() if isinstance(result, FlightRecord) else result
+
+    def _cache_key(self, flight_number):
+        """Build the per-day cache key for a flight."""
+        return f"{flight_number}_{datetime.now().strftime('%Y%m%d')}"
 
+    def refresh_flight_info(self, flight_number):
+        """Fetch a flight from the API even if cached, replacing the cached record.
+
+        Returns the new FlightRecord, or an error dict.
+        """
+        try:
+            cache_key = self._cache_key(flight_number)
+            return self.inflight.do(cache_key, lambda: self._fetch_flight_info(flight_number, cache_key, force=True))
         except requests.exceptions.RequestException as e:
             logger.error(f"API request failed: {str(e)}")
             return {"error": "Failed to fetch flight information"}
@@ -126,21 +228,167 @@ class FlightAPI:
             logger.error(f"Unexpected error: {str(e)}")
             return {"error": "An unexpected error occurred"}
 
+    def _revalidatable(self, cache_key):
+        """Return a cached record that expired within revalidate_window, or None."""
+        stale = self.cache.get_stale(cache_key, self.revalidate_window.total_seconds())
+        return stale if isinstance(stale, FlightRecord) else None
+
+    def _revalidate_in_background(self, flight_number, cache_key):
+        """Queue one background refresh per key; repeat calls while it runs are no-ops."""
+        with self._revalidate_lock:
+            if cache_key in self._revalidating:
+                return
+            self._revalidating.add(cache_key)
+            self.revalidations += 1
+        self.revalidate_executor.submit(self._revalidate, flight_number, cache_key)
+
+    def _revalidate(self, flight_number, cache_key):
+        try:
+            self.inflight.do(cache_key, lambda: self._fetch_flight_info(flight_number, cache_key))
+        except Exception as e:
+            logger.warning(f"Background refresh of {flight_number} failed: {str(e)}")
+        finally:
+            with self._revalidate_lock:
+                self._revalidating.discard(cache_key)
+
+    def _fetch_flight_info(self, flight_number, cache_key, force=False):
+        """Fetch flight information from the API and cache it."""
+        # A previous leader may have filled the cache while we were queued
+        cached_data = None if force else self.cache.peek(cache_key)
+        if cached_data is not None:
+            return cached_data
+
+        # Make API request
+        params = {
+            'access_key': self.api_key,
+            'flight_iata': flight_number
+        }
+        
+        logger.info("Making API request to %s/flights for %s", self.base_url, flight_number)
+        
+        try:
+            response = self.transport.get(f"{self.base_url}/flights", params=params)
+            response.raise_for_status()
+        except QuotaExhausted as e:
+            return self._serve_stale(flight_number, cache_key, e, "Upstream rate limit reached, please retry shortly")
+        except requests.exceptions.RequestException as e:
+            logger.error(f"API request failed: {str(e)}")
+            return self._serve_stale(flight_number, cache_key, e, "Failed to fetch flight information",
+                                     negative_ttl=self.error_ttl)
+        data = response.json()
+        # Full payload dumps are expensive; only build them for sampled DEBUG requests
+        if logger.isEnabledFor(logging.DEBUG) and _sample_debug():
+            logger.debug("API Response status: %s headers: %s", response.status_code, response.headers)
+            logger.debug("API Response data: %s", json.dumps(data, indent=2))
+
+        return self._handle_flight_response(flight_number, cache_key, data)
+
+    def _serve_stale(self, flight_number, cache_key, reason, error, negative_ttl=None):
+        """Fall back to an expired cached record when the upstream call is refused or fails.
+
+        Without one, the error dict is returned, and cached for negative_ttl when given.
+        """
+        ERRORS.inc('lookup', type(reason).__name__)
+        stale = self.cache.get_stale(cache_key)
+        if not isinstance(stale, FlightRecord):
+            logger.warning("Upstream call for %s failed (%s) and no stale data cached", flight_number, reason)
+            result = {"error": error}
+            if negative_ttl is not None:
+                self.cache.set(cache_key, result, ttl=negative_ttl.total_seconds())
+            return result
+        self.stale_served += 1
+        logger.warning("Upstream call for %s failed (%s); serving stale data", flight_number, reason)
+        return stale
+
+    def _handle_flight_response(self, flight_number, cache_key, data):
+        """Extract, record and cache flight information from an API payload."""
+        if not data or 'data' not in data or not data['data']:
+            logger.warning("No flight data found for %s", flight_number)
+            ERRORS.inc('lookup', 'no_data')
+            # Cache the miss briefly so unknown flight numbers do not hit the API every time
+            result = {"error": NO_FLIGHT_DATA}
+            self.cache.set(cache_key, result, ttl=self.negative_ttl.total_seconds())
+            return result
+
+        flight_info = self._extract_flight_record(data['data'][0])
+
+        # Store historical data
+        self._store_historical_data(flight_info)
+
+        # Cache the result
+        self.cache.set(cache_key, flight_info)
+        logger.info("Successfully retrieved and cached flight info for %s", flight_number)
+        
+        return flight_info
+
+    def _extract_flight_record(self, flight_data):
+        """Build a FlightRecord from one AviationStack flight object."""
+        return FlightRecord.from_values(
+            flight_number=self._safe_get(flight_data, 'flight', 'iata', default=None),
+            status=self._safe_get(flight_data, 'flight_status', default=None),
+            departure_time=self._safe_get(flight_data, 'departure', 'scheduled', default=None),
+            arrival_time=self._safe_get(flight_data, 'arrival', 'scheduled', default=None),
+            gate=self._safe_get(flight_data, 'departure', 'gate', default=None),
+            terminal=self._safe_get(flight_data, 'departure', 'terminal', default=None),
+            aircraft=self._safe_get(flight_data, 'aircraft', 'iata', default=None),
+            estimated_arrival=self._safe_get(flight_data, 'arrival', 'estimated', default=None),
+            delay=self._safe_get(flight_data, 'departure', 'delay', default=None),
+            codeshare=self._safe_get(flight_data, 'airline', 'name', default=None),
+            codeshare_flight=self._safe_get(flight_data, 'flight', 'codeshared', 'flight_iata', default=None),
+            destination=self._safe_get(flight_data, 'arrival', 'airport', default=None),
+            departure_airport=self._safe_get(flight_data, 'departure', 'airport', default=None),
+            departure_timezone=self._safe_get(flight_data, 'departure', 'timezone', default=None),
+            arrival_timezone=self._safe_get(flight_data, 'arrival', 'timezone', default=None),
+            ground_speed=self._safe_get(flight_data, 'live', 'speed_horizontal', default=None),
+            altitude=self._safe_get(flight_data, 'live', 'altitude', default=None)
+        )
+
+    def get_cache_stats(self):
+        """Get cache hit/miss/eviction counters and occupancy."""
+        stats = self.cache.stats()
+        stats["coalesced"] = self.inflight.coalesced
+        return stats
+
+    def get_metrics(self):
+        """Get cache, upstream transport and rate limiter counters."""
+        return {
+            "cache": self.get_cache_stats(),
+            "upstream": self.transport.stats(),
+            "rate_limit": self.limiter.stats(),
+            "stale_served": self.stale_served,
+            "revalidations": self.revalidations
+        }
+
+    def metric_families(self):
+        """Describe get_metrics() as Prometheus metric families (see metrics.Registry)."""
+        metrics = self.get_metrics()
+        cache, upstream, limit = metrics["cache"], metrics["upstream"], metrics["rate_limit"]
+        cache_events = ('hits', 'misses', 'evictions', 'expirations', 'coalesced')
+        return [
+            ('flight_cache_entries', 'gauge', 'Live entries in the flight cache.', [({}, cache["entries"])]),
+            ('flight_cache_bytes', 'gauge', 'Approximate bytes held by the flight cache.', [({}, cache.get("bytes"))]),
+            ('flight_cache_events_total', 'counter', 'Flight cache backend events.',
+             [({'event': event}, cache.get(event)) for event in cache_events]),
+            ('flight_upstream_events_total', 'counter', 'AviationStack transport events.',
+             [({'transport': 'sync', 'event': event}, value) for event, value in upstream.items()]),
+            ('flight_rate_limit_events_total', 'counter', 'Rate limiter decisions.',
+             [({'event': event}, limit[event]) for event in ('granted', 'throttled', 'rejected')]),
+            ('flight_quota_calls', 'gauge', 'Upstream calls counted in the current quota period.',
+             [({}, limit["calls"])]),
+            ('flight_quota_remaining', 'gauge', 'Upstream calls left in the current quota period.',
+             [({}, limit["remaining"])]),
+            ('flight_stale_served_total', 'counter', 'Expired records served because upstream failed.',
+             [({}, metrics["stale_served"])]),
+            ('flight_revalidations_total', 'counter', 'Background refreshes of recently expired records.',
+             [({}, metrics["revalidations"])]),
+        ]
+
     def _store_historical_data(self, flight_info):
         """Store historical flight data."""
         try:
-            flight_number = flight_info['flight_number']
-            timestamp = datetime.now().isoformat()
-            
-            # Add timestamp to flight info
-            historical_entry = {
-                'timestamp': timestamp,
-                **flight_info
-            }
-            
-            # Store last 30 days of data
-            self.historical_data[flight_number].append(historical_entry)
-            self.historical_data[flight_number] = self.historical_data[flight_number][-30:]  # Keep last 30 entries
+            # Records carry their own fetch timestamp, so they are stored as-is
+            self.historical_data.add(flight_info)  # Keeps the last 30 entries per flight
+            self.analytics.add(flight_info)
             
         except Exception as e:
             self.logger.error(f"Error storing historical data: {str(e)}")
@@ -151,56 +399,146 @@ class FlightAPI:
             if flight_number not in self.historical_data:
                 return {"error": "No historical data available"}
             
-            cutoff_date = datetime.now() - timedelta(days=days)
-            historical_flights = [
-                flight for flight in self.historical_data[flight_number]
-                if datetime.fromisoformat(flight['timestamp']) >= cutoff_date
-            ]
+            cutoff = time.time() - timedelta(days=days).total_seconds()
+            # Window aggregates come from prefix sums; no per-sample pass needed
+            stats = self.historical_data.stats(flight_number, cutoff)
             
-            if not historical_flights:
+            if not stats or not stats["count"]:
                 return {"error": f"No historical data available for the last {days} days"}
             
             # Calculate statistics
-            delays = [int(flight['delay']) for flight in historical_flights if flight['delay'] != 'Unknown']
-            avg_delay = sum(delays) / len(delays) if delays else 0
-            
-            on_time_count = sum(1 for flight in historical_flights if flight['delay'] == 'Unknown' or int(flight['delay']) <= 15)
-            on_time_percentage = (on_time_count / len(historical_flights)) * 100
+            avg_delay = stats["delay_sum"] / stats["delay_count"] if stats["delay_count"] else 0
+            on_time_percentage = (stats["on_time"] / stats["count"]) * 100
+            historical_flights = self.historical_data.records(flight_number, cutoff)
             
             return {
-                "total_flights": len(historical_flights),
+                "total_flights": stats["count"],
                 "average_delay": round(avg_delay, 2),
                 "on_time_percentage": round(on_time_percentage, 2),
-                "flights": historical_flights
+                "flights": [flight.to_dict(include_timestamp=True) for flight in historical_flights]
             }
             
         except Exception as e:
             self.logger.error(f"Error retrieving historical data: {str(e)}")
             return {"error": "Failed to retrieve historical data"}
 
-    def get_all_flights(self) -> list:
-        """Get a list of all available flights."""
+    def _list_params(self, offset, page_size, filters):
+        """Build /flights list parameters, pushing supported filters upstream."""
+        params = {
+            'access_key': self.api_key,
+            'limit': min(page_size, MAX_PAGE_SIZE),
+            'offset': offset
+        }
+        for name, value in filters.items():
+            if name not in LIST_FILTERS:
+                raise ValueError(f"Unsupported filter {name!r}; expected one of {', '.join(LIST_FILTERS)}")
+            if value:
+                params[LIST_FILTERS[name]] = value
+        return params
+
+    @staticmethod
+    def _next_offset(data, params):
+        """Return the offset of the page after data, or None when the scan is done."""
+        data = data or {}
+        page = data.get('data') or []
+        pagination = data.get('pagination') or {}
+        next_offset = params['offset'] + params['limit']
+        total = pagination.get('total')
+        if total is not None:
+            return next_offset if next_offset < total else None
+        return next_offset if len(page) >= params['limit'] else None
+
+    def _fetch_page(self, params):
+        """Fetch one page of the /flights listing as a parsed payload."""
+        response = self.transport.get(f"{self.base_url}/flights", params=params)
+        response.raise_for_status()
+        return response.json()
+
+    def iter_flights(self, page_size=MAX_PAGE_SIZE, max_pages=None, ingest=True, **filters):
+        """Yield raw AviationStack flight objects, paging through /flights by offset.
+
+        filters (airline, status, departure_airport, arrival_airport) are sent
+        upstream. The next page is fetched in the background while the current
+        one is consumed, so at most two pages are held in memory. With ingest,
+        each page also warms the per-flight cache and history (see
+        ingest_flights). Upstream errors propagate to the caller.
+        """
+        for page in self._iter_pages(page_size, max_pages, filters):
+            if ingest:
+                self.ingest_flights(page)
+            yield from page
+
+    def iter_flight_records(self, page_size=MAX_PAGE_SIZE, max_pages=None, **filters):
+        """Like iter_flights, but yield the FlightRecords ingested from each page."""
+        for page in self._iter_pages(page_size, max_pages, filters):
+            yield from self.ingest_flights(page)
+
+    def _iter_pages(self, page_size, max_pages, filters):
+        """Yield successive /flights pages, prefetching the next while one is consumed."""
+        params = self._list_params(0, page_size, filters)
+        pages = 0
+        future = self.prefetch_executor.submit(self._fetch_page, params)
+        try:
+            while future is not None:
+                data = future.result()
+                pages += 1
+                offset = self._next_offset(data, params)
+                future = None
+                if offset is not None and (max_pages is None or pages < max_pages):
+                    params = {**params, 'offset': offset}
+                    future = self.prefetch_executor.submit(self._fetch_page, params)
+                if logger.isEnabledFor(logging.DEBUG) and _sample_debug():
+                    logger.debug("Fetched flights page %d (offset %s)", pages, params['offset'])
+                yield (data or {}).get('data') or []
+        finally:
+            # Abandoned scans should not leave a prefetch behind
+            if future is not None:
+                future.cancel()
+
+    def ingest_flights(self, flights):
+        """Cache and record every flight object from a /flights list page in one pass.
+
+        A list page carries the same fields as a single-flight lookup, so each
+        flight's entry becomes its cached answer and one history sample. When a
+        flight is listed more than once (several flight dates), the entry dated
+        today is used, else the first listed, as get_flight_info would pick.
+        Returns the FlightRecords built for every entry, in page order.
+        """
+        records = []
+        chosen = {}  # flight_number -> (dated today, record) to cache and sample
+        today = datetime.now().strftime('%Y-%m-%d')
+        for flight_data in flights:
+            record = self._extract_flight_record(flight_data)
+            if not record.flight_number:
+                continue
+            records.append(record)
+            dated_today = isinstance(flight_data, dict) and flight_data.get('flight_date') == today
+            previous = chosen.get(record.flight_number)
+            if previous is None or (dated_today and not previous[0]):
+                chosen[record.flight_number] = (dated_today, record)
+        if not chosen:
+            return records
+        unique = [record for _, record in chosen.values()]
+        # Every record lands under today's key, so build the suffix once
+        suffix = self._cache_key('')
+        self.cache.set_many((f"{record.flight_number}{suffix}", record) for record in unique)
+        try:
+            self.historical_data.extend(unique)
+            self.analytics.extend(unique)
+        except Exception as e:
+            self.logger.error(f"Error storing historical data: {str(e)}")
+        logger.info("Ingested %d flights from list page", len(unique))
+        return records
+
+    def get_all_flights(self, max_pages=1, **filters) -> list:
+        """Get a list of all available flights (the first max_pages pages)."""
         try:
-            params = {
-                'access_key': self.api_key,
-                'limit': 100,
-                'offset': 0
-            }
-            
             logger.info("Fetching all flights")
-            response = requests.get(f"{self.base_url}/flights", params=params)
-            
-            if response.status_code != 200:
-                logger.error(f"API request failed with status code {response.status_code}")
-                return []
-            
-            data = response.json()
-            if not data or not data.get('data'):
+            flights = list(self.iter_flights(max_pages=max_pages, **filters))
+            if not flights:
                 logger.warning("No flight data available")
-                return []
-                
-            return data['data']
-            
+            return flights
+
         except Exception as e:
             logger.error(f"Error fetching all flights: {str(e)}")
             return []
\ No newline at end of file
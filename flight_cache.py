@@ -0,0 +1,243 @@
+import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Cache lifetimes (in seconds) per AviationStack flight_status
+STATUS_TTLS = {
+    'scheduled': 300,
+    'active': 60,
+    'landed': 3600,
+    'cancelled': 3600,
+    'incident': 120,
+    'diverted': 600,
+}
+
+
+def estimate_size(value):
+    """Roughly estimate the memory footprint of a cached value in bytes."""
+    slots = getattr(type(value), '__slots__', None)
+    if slots:
+        return sys.getsizeof(value) + sum(sys.getsizeof(getattr(value, name, None)) for name in slots)
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return len(str(value))
+
+
+class CacheBackend:
+    """Storage interface behind FlightAPI.cache.
+
+    Backends own expiry and eviction; values are FlightRecords or plain dicts.
+    Expired entries are kept for stale_grace more seconds so get_stale() can
+    still serve them when the upstream is unavailable.
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=32 * 1024 * 1024,
+                 default_ttl=300, status_ttls=None, purge_interval=60, stale_grace=0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.status_ttls = dict(STATUS_TTLS if status_ttls is None else status_ttls)
+        self.purge_interval = purge_interval
+        self.stale_grace = stale_grace
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def ttl_for(self, value):
+        """Return the TTL in seconds for a value based on its flight status."""
+        status = value.get('status') if isinstance(value, dict) else getattr(value, 'status', None)
+        if isinstance(status, str):
+            return self.status_ttls.get(status.lower(), self.default_ttl)
+        return self.default_ttl
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired."""
+        raise NotImplementedError
+
+    def peek(self, key):
+        """Return the live value for key without touching recency or counters."""
+        raise NotImplementedError
+
+    def get_stale(self, key, grace=None):
+        """Return the value for key even if expired, up to grace (default stale_grace) seconds past expiry."""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        """Store value under key for ttl seconds (status-derived when None)."""
+        raise NotImplementedError
+
+    def set_many(self, items, ttl=None):
+        """Store every (key, value) pair in items; backends may batch the writes."""
+        for key, value in items:
+            self.set(key, value, ttl)
+
+    def delete(self, key):
+        """Remove key from the cache if present."""
+        raise NotImplementedError
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        raise NotImplementedError
+
+    def purge_expired(self):
+        """Drop every expired entry and return how many were removed."""
+        raise NotImplementedError
+
+    def stats(self):
+        """Return cache counters and current occupancy."""
+        raise NotImplementedError
+
+
+class FlightCache(CacheBackend):
+    """In-process LRU cache backend with status-aware TTLs and entry/byte limits."""
+
+    def __init__(self, max_entries=10000, max_bytes=32 * 1024 * 1024,
+                 default_ttl=300, status_ttls=None, purge_interval=60, stale_grace=0):
+        super().__init__(max_entries, max_bytes, default_ttl, status_ttls, purge_interval, stale_grace)
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._last_purge = time.monotonic()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[1] > time.monotonic()
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            self._maybe_purge(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[1] <= now:
+                if entry[1] + self.stale_grace <= now:
+                    self._remove(key)
+                    self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key):
+        """Return the live value for key without touching LRU order or counters."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return None
+            return entry[0]
+
+    def get_stale(self, key, grace=None):
+        """Return the value for key even if expired, up to grace (default stale_grace) seconds past expiry."""
+        if grace is None:
+            grace = self.stale_grace
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] + min(grace, self.stale_grace) <= time.monotonic():
+                return None
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        """Store value under key, evicting least recently used entries as needed."""
+        if ttl is None:
+            ttl = self.ttl_for(value)
+        size = estimate_size(value)
+        now = time.monotonic()
+        with self._lock:
+            self._store(key, value, now + ttl, size)
+            self._maybe_purge(now)
+            self._evict()
+
+    def set_many(self, items, ttl=None):
+        """Store every (key, value) pair in items under a single lock acquisition."""
+        entries = [
+            (key, value, self.ttl_for(value) if ttl is None else ttl, estimate_size(value))
+            for key, value in items
+        ]
+        now = time.monotonic()
+        with self._lock:
+            for key, value, entry_ttl, size in entries:
+                self._store(key, value, now + entry_ttl, size)
+            self._maybe_purge(now)
+            self._evict()
+
+    def _store(self, key, value, expires_at, size):
+        if key in self._entries:
+            self._remove(key)
+        if size > self.max_bytes:
+            logger.warning(f"Not caching {key}: {size} bytes exceeds cache budget")
+            return
+        self._entries[key] = (value, expires_at, size)
+        self._bytes += size
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            evicted, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+            logger.debug("Evicted %s from flight cache", evicted)
+
+    def delete(self, key):
+        """Remove key from the cache if present."""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def purge_expired(self, now=None):
+        """Drop every entry past its TTL and stale grace; return how many were removed."""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            cutoff = now - self.stale_grace
+            expired = [key for key, entry in self._entries.items() if entry[1] <= cutoff]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+            self._last_purge = now
+            return len(expired)
+
+    def stats(self):
+        """Return cache counters and current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _maybe_purge(self, now):
+        # Amortize expiry: sweep at most once per purge_interval
+        if now - self._last_purge >= self.purge_interval:
+            self.purge_expired(now)
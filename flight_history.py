@@ -0,0 +1,156 @@
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+# Departures delayed by at most this many minutes count as on time
+ON_TIME_THRESHOLD = 15
+
+
+class HistoryBuffer:
+    """Bounded, time-ordered samples for one flight with prefix-sum aggregates.
+
+    Each append stores running totals (count, delay sum, delays seen, on-time
+    count), so any trailing window's statistics are the difference of two
+    prefix entries found by binary search on the timestamps.
+    """
+
+    __slots__ = ('capacity', '_start', '_base', '_records', '_timestamps',
+                 '_delay_sum', '_delay_count', '_on_time')
+
+    def __init__(self, capacity=30):
+        self.capacity = capacity
+        self._start = 0
+        self._base = (0, 0, 0)  # Running totals of samples already compacted away
+        self._records = []
+        self._timestamps = array('d')
+        self._delay_sum = array('q')
+        self._delay_count = array('q')
+        self._on_time = array('q')
+
+    def __len__(self):
+        return len(self._records) - self._start
+
+    def append(self, record):
+        """Add a sample; timestamps are clamped so the buffer stays sorted."""
+        timestamp = record.fetched_at
+        if self._timestamps and timestamp < self._timestamps[-1]:
+            timestamp = self._timestamps[-1]
+        delay = record.delay
+        delay_sum, delay_count, on_time = self._totals_before(len(self._records))
+        if delay is not None:
+            delay_sum += delay
+            delay_count += 1
+        if delay is None or delay <= ON_TIME_THRESHOLD:
+            on_time += 1
+
+        self._records.append(record)
+        self._timestamps.append(timestamp)
+        self._delay_sum.append(delay_sum)
+        self._delay_count.append(delay_count)
+        self._on_time.append(on_time)
+
+        if len(self._records) - self._start > self.capacity:
+            self._start += 1
+            # Compact once the dead prefix reaches capacity, keeping appends amortized O(1)
+            if self._start >= self.capacity:
+                self._compact()
+
+    def _compact(self):
+        start = self._start
+        self._base = self._totals_before(start)
+        del self._records[:start]
+        del self._timestamps[:start]
+        del self._delay_sum[:start]
+        del self._delay_count[:start]
+        del self._on_time[:start]
+        self._start = 0
+
+    def _window_start(self, since):
+        return bisect_left(self._timestamps, since, self._start)
+
+    def _totals_before(self, index):
+        if index == 0:
+            return self._base
+        return self._delay_sum[index - 1], self._delay_count[index - 1], self._on_time[index - 1]
+
+    def stats(self, since=float('-inf')):
+        """Return count, delay sum, delays seen and on-time count for samples at or after since."""
+        end = len(self._records)
+        first = self._window_start(since)
+        if first >= end:
+            return {"count": 0, "delay_sum": 0, "delay_count": 0, "on_time": 0}
+        delay_sum, delay_count, on_time = self._totals_before(first)
+        return {
+            "count": end - first,
+            "delay_sum": self._delay_sum[-1] - delay_sum,
+            "delay_count": self._delay_count[-1] - delay_count,
+            "on_time": self._on_time[-1] - on_time,
+        }
+
+    def records(self, since=float('-inf')):
+        """Return the samples at or after since, oldest first."""
+        return self._records[self._window_start(since):]
+
+
+class FlightHistory:
+    """Per-flight HistoryBuffers, bounded in samples per flight and in flights tracked."""
+
+    def __init__(self, capacity=30, max_flights=50000):
+        self.capacity = capacity
+        self.max_flights = max_flights
+        self._buffers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, flight_number):
+        return flight_number in self._buffers
+
+    def __len__(self):
+        return len(self._buffers)
+
+    def __iter__(self):
+        return iter(list(self._buffers))
+
+    def add(self, record):
+        """Record a sample under its flight number."""
+        with self._lock:
+            self._add(record)
+
+    def _add(self, record):
+        buffer = self._buffers.get(record.flight_number)
+        if buffer is None:
+            buffer = self._buffers[record.flight_number] = HistoryBuffer(self.capacity)
+            if len(self._buffers) > self.max_flights:
+                self._buffers.popitem(last=False)
+        else:
+            self._buffers.move_to_end(record.flight_number)
+        buffer.append(record)
+
+    def extend(self, records):
+        """Record many samples under one lock acquisition."""
+        with self._lock:
+            for record in records:
+                self._add(record)
+
+    def get(self, flight_number):
+        """Return the HistoryBuffer for a flight, or None."""
+        return self._buffers.get(flight_number)
+
+    def stats(self, flight_number, since=float('-inf')):
+        """Return windowed aggregates for one flight (see HistoryBuffer.stats)."""
+        with self._lock:
+            buffer = self._buffers.get(flight_number)
+            return buffer.stats(since) if buffer is not None else None
+
+    def records(self, flight_number, since=float('-inf')):
+        """Return one flight's samples at or after since."""
+        with self._lock:
+            buffer = self._buffers.get(flight_number)
+            return buffer.records(since) if buffer is not None else []
+
+    def iter_records(self, since=float('-inf')):
+        """Yield every stored sample at or after since, flight by flight."""
+        with self._lock:
+            windows = [buffer.records(since) for buffer in self._buffers.values()]
+        for records in windows:
+            yield from records
@@ -0,0 +1,94 @@
+import json
+import time
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+
+# Placeholder used on the wire for fields the upstream API did not provide
+UNKNOWN = 'Unknown'
+# Error returned (and negatively cached) when AviationStack has no data for a flight number
+NO_FLIGHT_DATA = "No flight data available"
+
+
+def _to_int(value):
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(slots=True, frozen=True)
+class FlightRecord:
+    """Compact snapshot of one flight as returned by AviationStack."""
+
+    flight_number: str | None = None
+    status: str | None = None
+    departure_time: str | None = None
+    arrival_time: str | None = None
+    gate: str | None = None
+    terminal: str | None = None
+    aircraft: str | None = None
+    estimated_arrival: str | None = None
+    delay: int | None = None
+    codeshare: str | None = None
+    codeshare_flight: str | None = None
+    destination: str | None = None
+    departure_airport: str | None = None
+    departure_timezone: str | None = None
+    arrival_timezone: str | None = None
+    ground_speed: float | None = None
+    altitude: float | None = None
+    fetched_at: float = field(default_factory=time.time)  # Epoch seconds
+
+    @classmethod
+    def from_values(cls, **values):
+        """Build a record, coercing numeric fields from raw API values."""
+        values['delay'] = _to_int(values.get('delay'))
+        values['ground_speed'] = _to_float(values.get('ground_speed'))
+        values['altitude'] = _to_float(values.get('altitude'))
+        return cls(**values)
+
+    @property
+    def version(self):
+        """Identifies this snapshot; changes whenever the flight is re-fetched."""
+        return self.fetched_at
+
+    def to_dict(self, missing=UNKNOWN, include_timestamp=False):
+        """Serialize to the API dict shape, filling absent values with missing."""
+        data = {}
+        for name in _FIELD_NAMES:
+            value = getattr(self, name)
+            data[name] = missing if value is None else value
+        if include_timestamp:
+            data['timestamp'] = datetime.fromtimestamp(self.fetched_at).isoformat()
+        return data
+
+    def to_json(self, missing=UNKNOWN, include_timestamp=False):
+        """Serialize to a JSON string in the API dict shape."""
+        return json.dumps(self.to_dict(missing, include_timestamp))
+
+
+# Public fields in API order; fetched_at is exposed as 'timestamp' on demand
+_FIELD_NAMES = tuple(f.name for f in fields(FlightRecord) if f.name != 'fetched_at')
+_ALL_FIELDS = tuple(f.name for f in fields(FlightRecord))
+
+
+def dump_cached(value):
+    """Encode a FlightRecord (or plain JSON value) for an out-of-process cache."""
+    if isinstance(value, FlightRecord):
+        return json.dumps({"record": [getattr(value, name) for name in _ALL_FIELDS]})
+    return json.dumps({"value": value})
+
+
+def load_cached(text):
+    """Decode a value written by dump_cached."""
+    data = json.loads(text)
+    if "record" in data:
+        return FlightRecord(*data["record"])
+    return data["value"]
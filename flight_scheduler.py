@@ -0,0 +1,208 @@
+import heapq
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+from flight_record import NO_FLIGHT_DATA, FlightRecord
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshScheduler:
+    """Keeps a watchlist of flights warm in FlightAPI's cache (refresh-ahead).
+
+    Each watched flight is re-fetched at refresh_ahead of its cache TTL, so the
+    entry is replaced before it expires. Flights departing soon are refreshed
+    at least every imminent_interval seconds, and no flight waits longer than
+    max_interval if one is given. Refreshes are spaced at least
+    60 / max_per_minute seconds apart to stay within the upstream quota.
+    on_refresh, if given, is called with (flight_number, record) after each
+    successful refresh, on the scheduler thread. A flight the upstream API has
+    no data for max_misses times in a row is dropped from the watchlist.
+    """
+
+    def __init__(self, flight_api, max_per_minute=30, refresh_ahead=0.8, imminent_window=3600,
+                 imminent_interval=60, retry_interval=30, jitter=0.1, on_refresh=None, max_interval=None,
+                 max_misses=3):
+        self.flight_api = flight_api
+        self.max_interval = max_interval
+        self.on_refresh = on_refresh
+        self.min_spacing = 60.0 / max_per_minute
+        self.refresh_ahead = refresh_ahead
+        self.imminent_window = imminent_window
+        self.imminent_interval = imminent_interval
+        self.retry_interval = retry_interval
+        self.jitter = jitter
+        self.max_misses = max_misses
+        self._misses = {}  # flight_number -> consecutive "no flight data" refreshes
+        self._queue = []  # (due_at, flight_number)
+        # flight_number -> due_at of its live queue entry; older entries for the flight are skipped
+        self._watched = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._lock_file = None
+        self._stopping = False
+        self.refreshes = 0
+        self.failures = 0
+        self.dropped = 0
+
+    def watch(self, *flight_numbers, refresh_in=0):
+        """Add flights to the watchlist; new flights are refreshed after refresh_in seconds (right away by default).
+
+        Returns the flights that were not already watched.
+        """
+        added = []
+        with self._cond:
+            for flight_number in flight_numbers:
+                flight_number = flight_number.strip().upper()
+                if flight_number and flight_number not in self._watched:
+                    due_at = time.monotonic() + refresh_in
+                    self._watched[flight_number] = due_at
+                    heapq.heappush(self._queue, (due_at, flight_number))
+                    added.append(flight_number)
+            self._cond.notify()
+        return added
+
+    def unwatch(self, *flight_numbers):
+        """Remove flights from the watchlist."""
+        with self._cond:
+            for flight_number in flight_numbers:
+                flight_number = flight_number.strip().upper()
+                self._watched.pop(flight_number, None)
+                self._misses.pop(flight_number, None)
+
+    def watchlist(self):
+        with self._cond:
+            return sorted(self._watched)
+
+    def start(self, lock_path=None):
+        """Start the background refresh thread.
+
+        With lock_path, only the process holding an exclusive lock on that file
+        runs the scheduler, so multi-worker servers refresh each flight once;
+        processes that lose the race get False instead of the scheduler.
+        """
+        if lock_path and self._lock_file is None and not self._acquire_leadership(lock_path):
+            logger.info("Refresh scheduler already running in another worker (%s)", lock_path)
+            return False
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='flight-refresh', daemon=True)
+            self._thread.start()
+        return self
+
+    def _acquire_leadership(self, lock_path):
+        import fcntl  # Unix only, like the preforking servers that need it
+
+        lock_file = open(lock_path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        # Held for the life of the process; the OS releases it if the worker dies
+        self._lock_file = lock_file
+        return True
+
+    def stop(self, timeout=5):
+        """Stop the background refresh thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def next_interval(self, record):
+        """Seconds until a record should be refreshed, by status and departure proximity."""
+        interval = self.flight_api.cache.ttl_for(record) * self.refresh_ahead
+        departs_in = self._seconds_until_departure(record)
+        if departs_in is not None and -self.imminent_window < departs_in < self.imminent_window:
+            interval = min(interval, self.imminent_interval)
+        if self.max_interval is not None:
+            interval = min(interval, self.max_interval)
+        # Jitter so flights added together do not stay in lockstep
+        return interval * random.uniform(1 - self.jitter, 1)
+
+    @staticmethod
+    def _seconds_until_departure(record):
+        if not isinstance(record.departure_time, str):
+            return None
+        try:
+            departure = datetime.fromisoformat(record.departure_time)
+        except ValueError:
+            return None
+        if departure.tzinfo is None:
+            departure = departure.replace(tzinfo=timezone.utc)
+        return departure.timestamp() - time.time()
+
+    def _next_due(self):
+        """Wait until a watched flight is due and pop it, or return None when stopping."""
+        with self._cond:
+            while not self._stopping:
+                if not self._queue:
+                    self._cond.wait()
+                    continue
+                due_at, flight_number = self._queue[0]
+                delay = due_at - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                heapq.heappop(self._queue)
+                if self._watched.get(flight_number) == due_at:
+                    return flight_number
+            return None
+
+    def _run(self):
+        last_refresh = 0.0
+        while True:
+            flight_number = self._next_due()
+            if flight_number is None:
+                return
+            # Spread refreshes out to respect the upstream rate quota
+            wait = last_refresh + self.min_spacing - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            last_refresh = time.monotonic()
+            interval = self._refresh(flight_number)
+            with self._cond:
+                if flight_number in self._watched:
+                    due_at = time.monotonic() + interval
+                    self._watched[flight_number] = due_at
+                    heapq.heappush(self._queue, (due_at, flight_number))
+
+    def _refresh(self, flight_number):
+        record = self.flight_api.refresh_flight_info(flight_number)
+        if not isinstance(record, FlightRecord):
+            self.failures += 1
+            if isinstance(record, dict) and record.get("error") == NO_FLIGHT_DATA:
+                misses = self._misses[flight_number] = self._misses.get(flight_number, 0) + 1
+                if misses >= self.max_misses:
+                    # Retrying forever would spend upstream quota on a flight that does not exist
+                    logger.warning("No data for watched flight %s after %d refreshes; no longer watching it",
+                                   flight_number, misses)
+                    self.dropped += 1
+                    self.unwatch(flight_number)
+                    return self.retry_interval
+            logger.warning("Refresh of watched flight %s failed; retrying in %ss", flight_number, self.retry_interval)
+            return self.retry_interval
+        self.refreshes += 1
+        self._misses.pop(flight_number, None)
+        if self.on_refresh is not None:
+            try:
+                self.on_refresh(flight_number, record)
+            except Exception as e:
+                logger.error(f"Refresh listener failed for {flight_number}: {str(e)}")
+        return self.next_interval(record)
+
+    def stats(self):
+        """Return watchlist size and refresh counters."""
+        with self._cond:
+            return {
+                "watched": len(self._watched),
+                "queued": len(self._queue),
+                "refreshes": self.refreshes,
+                "failures": self.failures,
+                "dropped": self.dropped,
+            }
@@ -0,0 +1,271 @@
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+
+from flight_record import FlightRecord
+from flight_scheduler import RefreshScheduler
+
+logger = logging.getLogger(__name__)
+
+# Most flights one live subscription may follow
+MAX_TRACKED_FLIGHTS = 50
+
+
+@dataclass(slots=True, frozen=True)
+class TrackerEvent:
+    """One update for a tracked flight, encoded once and shared by every subscriber."""
+
+    kind: str  # 'snapshot', 'update' or 'error'
+    flight_number: str
+    data: str  # JSON payload (WebSocket message)
+    sse: str  # The same payload framed as a Server-Sent Event
+
+    @classmethod
+    def build(cls, kind, flight_number, **payload):
+        data = json.dumps({"type": kind, "flight_number": flight_number, **payload})
+        return cls(kind, flight_number, data, f"event: {kind}\ndata: {data}\n\n")
+
+
+class Subscription:
+    """Events for one client's set of flights, read by a single thread (e.g. an SSE response).
+
+    A subscriber that falls max_pending events behind is closed rather than
+    sent a partial history; it reconnects and starts again from a snapshot.
+    """
+
+    loop = None
+
+    def __init__(self, flight_numbers, max_pending=256):
+        self.flight_numbers = tuple(flight_numbers)
+        self.closed = False
+        self._events = queue.Queue(max_pending)
+
+    def offer(self, event):
+        """Queue an event without blocking; returns False if the subscriber is too far behind."""
+        try:
+            self._events.put_nowait(event)
+            return True
+        except queue.Full:
+            return False
+
+    def get(self, timeout=None):
+        """Return the next event, or None on timeout or once closed."""
+        if self.closed:
+            return None
+        try:
+            event = self._events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        return None if self.closed else event
+
+    def close(self):
+        self.closed = True
+        # Wake a reader blocked in get()
+        while not self.offer(None):
+            try:
+                self._events.get_nowait()
+            except queue.Empty:
+                pass
+
+
+class AsyncSubscription(Subscription):
+    """A Subscription read from an asyncio event loop (e.g. a WebSocket handler).
+
+    Events are handed to the loop with call_soon_threadsafe; offer and close
+    must run on the loop itself.
+    """
+
+    def __init__(self, flight_numbers, loop, max_pending=256):
+        self.flight_numbers = tuple(flight_numbers)
+        self.closed = False
+        self.loop = loop
+        self._events = asyncio.Queue(max_pending)
+
+    def offer(self, event):
+        try:
+            self._events.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def get(self, timeout=None):
+        if self.closed:
+            return None
+        try:
+            event = await asyncio.wait_for(self._events.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return None if self.closed else event
+
+    def close(self):
+        self.closed = True
+        while not self.offer(None):
+            self._events.get_nowait()
+
+
+class FlightTracker:
+    """Fans live flight updates out to subscribers from one shared refresher.
+
+    Each tracked flight is polled once per refresh interval by a private
+    RefreshScheduler however many clients follow it: at least every
+    poll_interval seconds if given, else on the cache TTL schedule. A new
+    subscriber gets a snapshot of the flight; after that only fields that
+    changed since the previous poll are sent, and polls that change nothing
+    send nothing.
+    """
+
+    def __init__(self, flight_api, max_per_minute=30, poll_interval=None, max_pending=256):
+        self.flight_api = flight_api
+        self.max_pending = max_pending
+        self.scheduler = RefreshScheduler(flight_api, max_per_minute=max_per_minute, max_interval=poll_interval,
+                                          on_refresh=self._on_refresh)
+        self._subscribers = {}  # flight_number -> set of Subscriptions
+        self._state = {}  # flight_number -> last published record dict
+        self._lock = threading.Lock()
+        self.updates = 0
+        self.unchanged = 0
+        self.deliveries = 0
+        self.overflows = 0
+
+    def subscribe(self, flight_numbers, loop=None):
+        """Follow flight_numbers; pass the running event loop to read events from asyncio.
+
+        May fetch flights that are not cached yet, so asyncio callers should
+        run it in a thread.
+        """
+        flight_numbers = list(dict.fromkeys(n.strip().upper() for n in flight_numbers if n.strip()))
+        if loop is None:
+            subscription = Subscription(flight_numbers, self.max_pending)
+        else:
+            subscription = AsyncSubscription(flight_numbers, loop, self.max_pending)
+        for flight_number in flight_numbers:
+            self._add(subscription, flight_number)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Stop delivering to subscription; flights nobody follows any more stop being polled."""
+        with self._lock:
+            self._remove(subscription)
+
+    def _add(self, subscription, flight_number):
+        with self._lock:
+            known = flight_number in self._state
+        # A cache hit for flights nobody is tracking yet; one coalesced upstream call otherwise
+        record = None if known else self.flight_api.get_flight_record(flight_number)
+        with self._lock:
+            if subscription.closed:
+                return
+            if isinstance(record, FlightRecord):
+                self._state.setdefault(flight_number, record.to_dict())
+            subscribers = self._subscribers.setdefault(flight_number, set())
+            if not subscribers:
+                self.scheduler.watch(flight_number, refresh_in=self._refresh_in(record))
+                self.scheduler.start()
+            subscribers.add(subscription)
+            # Queued under the lock so no update can overtake the snapshot it applies to
+            if flight_number in self._state:
+                event = TrackerEvent.build('snapshot', flight_number, flight=self._state[flight_number])
+            else:
+                error = record.get("error") if isinstance(record, dict) else None
+                event = TrackerEvent.build('error', flight_number, error=error or "Flight information unavailable")
+            self._fan_out((subscription,), event)
+
+    def _refresh_in(self, record):
+        """Seconds until the first poll: when the record we already hold is due, or now if there is none."""
+        if not isinstance(record, FlightRecord):
+            return 0
+        return max(0.0, self.scheduler.next_interval(record) - (time.time() - record.fetched_at))
+
+    def _remove(self, subscription):
+        # Caller holds self._lock
+        for flight_number in subscription.flight_numbers:
+            subscribers = self._subscribers.get(flight_number)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[flight_number]
+                self._state.pop(flight_number, None)
+                self.scheduler.unwatch(flight_number)
+
+    def _on_refresh(self, flight_number, record):
+        """RefreshScheduler callback: publish what changed since the last poll of flight_number."""
+        current = record.to_dict()
+        with self._lock:
+            subscribers = self._subscribers.get(flight_number)
+            if not subscribers:
+                return
+            previous = self._state.get(flight_number)
+            self._state[flight_number] = current
+            if previous is None:
+                event = TrackerEvent.build('snapshot', flight_number, flight=current)
+            else:
+                changes = {name: value for name, value in current.items() if previous.get(name) != value}
+                if not changes:
+                    self.unchanged += 1
+                    return
+                event = TrackerEvent.build('update', flight_number, changes=changes)
+            self.updates += 1
+            self._fan_out(tuple(subscribers), event)
+
+    def _fan_out(self, subscriptions, event):
+        # Caller holds self._lock. Thread subscribers are queued directly; asyncio
+        # subscribers are handed over in one call_soon_threadsafe per event loop.
+        by_loop = {}
+        for subscription in subscriptions:
+            if subscription.loop is None:
+                if subscription.offer(event):
+                    self.deliveries += 1
+                else:
+                    self._overflow(subscription)
+            else:
+                by_loop.setdefault(subscription.loop, []).append(subscription)
+        for loop, waiting in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(self._deliver, waiting, event)
+            except RuntimeError:
+                # The subscribers' event loop has shut down
+                for subscription in waiting:
+                    subscription.closed = True
+                    self._remove(subscription)
+
+    def _deliver(self, subscriptions, event):
+        # Runs on the subscribers' event loop
+        for subscription in subscriptions:
+            if subscription.closed:
+                continue
+            if subscription.offer(event):
+                self.deliveries += 1
+            else:
+                with self._lock:
+                    self._overflow(subscription)
+
+    def _overflow(self, subscription):
+        # Caller holds self._lock
+        self.overflows += 1
+        logger.warning("Closing live subscription to %s: %d events behind",
+                       ','.join(subscription.flight_numbers), self.max_pending)
+        subscription.close()
+        self._remove(subscription)
+
+    def stats(self):
+        """Return subscriber and publishing counters, plus the shared refresher's."""
+        with self._lock:
+            subscriptions = set().union(*self._subscribers.values()) if self._subscribers else set()
+            counts = {
+                "flights": len(self._subscribers),
+                "subscriptions": len(subscriptions),
+                "subscribers": sum(len(s) for s in self._subscribers.values()),
+                "updates": self.updates,
+                "unchanged": self.unchanged,
+                "deliveries": self.deliveries,
+                "overflows": self.overflows,
+            }
+        return {**counts, "refresher": self.scheduler.stats()}
+
+    def stop(self):
+        self.scheduler.stop()
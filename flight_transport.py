@@ -0,0 +1,121 @@
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import ERRORS, UPSTREAM_IN_FLIGHT, UPSTREAM_SECONDS, timed
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+def status_outcome(status_code):
+    """Bucket an upstream status code into a low-cardinality metrics label."""
+    if status_code < 400:
+        return 'ok'
+    if status_code == 429:
+        return 'http_429'
+    return 'http_4xx' if status_code < 500 else 'http_5xx'
+
+
+def observe_attempt(start, outcome):
+    """Record one upstream attempt's latency, outcome and (for failures) error type."""
+    UPSTREAM_SECONDS.labels(outcome).observe(time.perf_counter() - start)
+    if outcome != 'ok':
+        ERRORS.inc('upstream', outcome)
+
+
+class FlightTransport:
+    """Pooled keep-alive HTTP transport with timeouts and jittered retry/backoff."""
+
+    def __init__(self, pool_connections=4, pool_maxsize=32, connect_timeout=3.05,
+                 read_timeout=10, max_retries=3, backoff_base=0.25, backoff_max=8.0, limiter=None):
+        self.limiter = limiter  # Optional RateLimiter consulted before every attempt
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._lock = threading.Lock()
+        self.counters = {
+            "requests": 0,
+            "retries": 0,
+            "timeouts": 0,
+            "connection_errors": 0,
+            "http_errors": 0,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _backoff(self, attempt, response=None):
+        """Return the delay before the next attempt, honouring Retry-After."""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        # Full jitter: uniform over [0, base * 2^attempt]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @timed('upstream')
+    def get(self, url, params=None):
+        """GET url, retrying timeouts, connection errors and 429/5xx responses.
+
+        Raises QuotaExhausted if the rate limiter refuses an attempt.
+        """
+        timeout = (self.connect_timeout, self.read_timeout)
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                self.limiter.acquire()
+            self._count("requests")
+            UPSTREAM_IN_FLIGHT.inc()
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=timeout)
+            except requests.exceptions.Timeout:
+                observe_attempt(start, 'timeout')
+                self._count("timeouts")
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            except requests.exceptions.ConnectionError:
+                observe_attempt(start, 'connection_error')
+                self._count("connection_errors")
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                observe_attempt(start, status_outcome(response.status_code))
+                if response.status_code not in RETRY_STATUS_CODES:
+                    return response
+                self._count("http_errors")
+                if attempt >= self.max_retries:
+                    return response
+                delay = self._backoff(attempt, response)
+                response.close()
+            finally:
+                UPSTREAM_IN_FLIGHT.dec()
+
+            attempt += 1
+            self._count("retries")
+            logger.warning(f"Retrying {url} in {delay:.2f}s (attempt {attempt}/{self.max_retries})")
+            time.sleep(delay)
+
+    def stats(self):
+        """Return request, retry and timeout counters."""
+        with self._lock:
+            return dict(self.counters)
+
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
@@ -0,0 +1,116 @@
+import gzip
+import zlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+try:
+    import brotli  # Optional: enables the br content-coding
+except ImportError:
+    brotli = None
+
+# Responses smaller than this are sent uncompressed; headers would eat the savings
+MIN_COMPRESS_SIZE = 1024
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/plain', 'text/html')
+
+
+def _accepted_codings(accept_encoding):
+    """Return the content-codings a client accepts (q > 0) from Accept-Encoding."""
+    codings = set()
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        params = params.replace(' ', '')
+        if name and params not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            codings.add(name.strip().lower())
+    return codings
+
+
+def choose_encoding(accept_encoding, streaming=False):
+    """Pick br or gzip for a response, or None; streamed bodies only use gzip."""
+    codings = _accepted_codings(accept_encoding)
+    if brotli is not None and not streaming and 'br' in codings:
+        return 'br'
+    if 'gzip' in codings or '*' in codings:
+        return 'gzip'
+    return None
+
+
+def is_compressible(content_type):
+    """Return True for the text and JSON media types worth compressing."""
+    return bool(content_type) and content_type.split(';')[0].strip().lower() in COMPRESSIBLE_TYPES
+
+
+def compress(body, encoding):
+    """Compress a complete response body with the chosen content-coding."""
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def gzip_stream(chunks):
+    """Gzip an iterable of byte chunks, flushing after each so streaming clients see lines promptly."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def encoded_etag(etag, encoding):
+    """Return the strong ETag of a compressed representation of an entity."""
+    return f"{etag}-{encoding}" if encoding else etag
+
+
+def base_etag(etag):
+    """Strip the content-coding suffix added by encoded_etag."""
+    for encoding in ('br', 'gzip'):
+        if etag.endswith(f"-{encoding}"):
+            return etag[:-len(encoding) - 1]
+    return etag
+
+
+def last_modified(record):
+    """Return a record's fetch time as a second-precision UTC datetime for Last-Modified."""
+    return datetime.fromtimestamp(int(record.fetched_at), tz=timezone.utc)
+
+
+def not_modified(etag, modified, if_none_match, if_modified_since):
+    """Decide a conditional GET: True if the client's copy is current.
+
+    if_none_match is an iterable of unquoted entity tags (any encoding suffix
+    is ignored) or None; If-Modified-Since only applies without If-None-Match.
+    """
+    if if_none_match:
+        return any(tag == '*' or base_etag(tag) == etag for tag in if_none_match)
+    return if_modified_since is not None and modified <= if_modified_since
+
+
+def parse_if_none_match(header):
+    """Return the entity tags listed in an If-None-Match header, unquoted (weak or strong)."""
+    if not header:
+        return []
+    tags = []
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        tags.append(tag.strip('"'))
+    return [tag for tag in tags if tag]
+
+
+def parse_http_date(header):
+    """Parse an HTTP date header into an aware datetime, or None if absent or malformed."""
+    if not header:
+        return None
+    try:
+        value = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def http_date(value):
+    """Format an aware datetime as an HTTP date."""
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
@@ -0,0 +1,57 @@
+import atexit
+import itertools
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener = None
+
+
+class Sampler:
+    """Callable that returns True for one in every `every` calls."""
+
+    def __init__(self, every=None):
+        if every is None:
+            every = int(os.getenv('LOG_SAMPLE_RATE', '100'))
+        self.every = max(1, every)
+        self._counter = itertools.count()
+
+    def __call__(self):
+        # next() on itertools.count is atomic under the GIL
+        return next(self._counter) % self.every == 0
+
+
+def configure_logging(level=None, log_file=None, console=True):
+    """Route logging through a queue so handlers never block request threads.
+
+    level defaults to $LOG_LEVEL (INFO) and log_file to $LOG_FILE; records are
+    formatted and written by a background QueueListener. Safe to call more
+    than once: later calls only adjust the level.
+    """
+    global _listener
+    root = logging.getLogger()
+    if level is None:
+        level = os.getenv('LOG_LEVEL', 'INFO')
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    if _listener is not None:
+        return
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
+    if console:
+        handlers.append(logging.StreamHandler(sys.stdout))
+    log_file = log_file or os.getenv('LOG_FILE')
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -1,11 +1,13 @@
-from agents import qa_agent_respond
+from agents import get_flight_api, qa_agent_respond
 import os
 import json
 from datetime import datetime
 import time
 from typing import Dict, Any
 import sys
+import threading
 from dotenv import load_dotenv
+from logging_config import configure_logging
 
 def check_api_key() -> bool:
     """Check if the AviationStack API key is set in environment variables."""
@@ -63,9 +65,14 @@ def process_response(response: str) -> None:
 def main() -> None:
     """Main function to run the airline assistant."""
     try:
+        # Keep the console for the conversation; diagnostics go to the log file
+        configure_logging(log_file=os.getenv('LOG_FILE', 'flight_api.log'), console=False)
+
         if not check_api_key():
             sys.exit(1)
 
+        # Build the flight client while the user reads the welcome message and types
+        threading.Thread(target=get_flight_api, daemon=True).start()
         display_welcome_message()
         query_history: list[str] = []
 
@@ -0,0 +1,296 @@
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from threading import get_ident
+
+# Latency buckets in seconds, from cache hits to slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    rendered = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + rendered + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Child:
+    """One labelled series. Updates go to a per-thread shard keyed by thread id.
+
+    Each thread only ever writes its own shard, so updates need no lock and
+    are never lost; a scrape sums the shards. This keeps an update to a few
+    hundred nanoseconds, which matters on the cache-hit path.
+    """
+
+    __slots__ = ('_shards',)
+
+    def __init__(self):
+        self._shards = {}
+
+    def inc(self, amount=1):
+        tid = get_ident()
+        shards = self._shards
+        shards[tid] = shards.get(tid, 0) + amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        # Collapses the shards; only meant for gauges set from one place
+        self._shards = {get_ident(): value}
+
+    def value(self):
+        return sum(list(self._shards.values()))
+
+
+class _HistogramChild:
+    """One labelled histogram series, sharded per thread like _Child.
+
+    Each thread finds its shard through a threading.local rather than a
+    get_ident() dict lookup, and the count is summed from the buckets at
+    scrape time, so an observation is a bisect and two list updates.
+    """
+
+    __slots__ = ('_buckets', '_shards', '_local')
+
+    def __init__(self, buckets):
+        self._buckets = buckets
+        self._shards = {}
+        self._local = threading.local()
+
+    def observe(self, value):
+        try:
+            state = self._local.state
+        except AttributeError:
+            # Per-bucket counts (the last one is +Inf), then sum
+            state = self._local.state = self._shards.setdefault(get_ident(), [0] * (len(self._buckets) + 1) + [0.0])
+        state[bisect_left(self._buckets, value)] += 1
+        state[-1] += value
+
+    def value(self):
+        """Return per-bucket counts, then sum, then count."""
+        totals = [0] * (len(self._buckets) + 1) + [0.0]
+        for state in list(self._shards.values()):
+            for i, part in enumerate(state):
+                totals[i] += part
+        return [*totals, sum(totals[:-1])]
+
+
+class _Metric:
+    """A metric family: one child series per label-value tuple."""
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Return the child series for these label values; bind it once on hot paths."""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        return _Child()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, child in sorted(self._children.items(), key=lambda item: tuple(map(str, item[0]))):
+            lines.extend(self._render_sample(labels, child.value()))
+        return lines
+
+    def _render_sample(self, labels, value):
+        yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. requests or errors."""
+
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        self.labels(*labels).inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. requests currently in flight."""
+
+    kind = 'gauge'
+
+    def inc(self, *labels, amount=1):
+        self.labels(*labels).inc(amount)
+
+    def dec(self, *labels, amount=1):
+        self.labels(*labels).inc(-amount)
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observations, e.g. latencies."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value, *labels):
+        self.labels(*labels).observe(value)
+
+    def _render_sample(self, labels, value):
+        cumulative = 0
+        for bound, bucket_count in zip((*self.buckets, float('inf')), value):
+            cumulative += bucket_count
+            label_str = _format_labels(self.labelnames, labels, (('le', _format_value(bound)),))
+            yield f"{self.name}_bucket{label_str} {cumulative}"
+        label_str = _format_labels(self.labelnames, labels)
+        yield f"{self.name}_sum{label_str} {_format_value(value[-2])}"
+        yield f"{self.name}_count{label_str} {value[-1]}"
+
+
+class Registry:
+    """Metrics plus scrape-time collectors, rendered in the Prometheus text format.
+
+    Collectors are callables returning (name, kind, documentation, samples)
+    tuples, where samples is a list of (labels dict, value). They read
+    counters the components already keep, so they cost nothing until scraped.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        """Return the full exposition as text."""
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            for name, kind, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    if value is not None:
+                        lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'flight_stage_duration_seconds', 'Time spent in each stage of the lookup pipeline.', ('stage',)))
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'flight_http_request_duration_seconds', 'HTTP handler latency by server, route and status.',
+    ('server', 'route', 'status')))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    'flight_http_requests_in_flight', 'HTTP requests currently being handled.', ('server',)))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    'flight_cache_lookups_total', 'Flight lookups by cache outcome (hit, miss, stale, negative).', ('result',)))
+UPSTREAM_SECONDS = REGISTRY.register(Histogram(
+    'flight_upstream_request_duration_seconds', 'AviationStack request latency per attempt by outcome.',
+    ('outcome',)))
+UPSTREAM_IN_FLIGHT = REGISTRY.register(Gauge(
+    'flight_upstream_requests_in_flight', 'AviationStack requests currently awaiting a response.'))
+ERRORS = REGISTRY.register(Counter(
+    'flight_errors_total', 'Errors by pipeline stage and type.', ('stage', 'type')))
+
+# Pre-bound so the cache-hit path costs a single counter update
+CACHE_HIT = CACHE_LOOKUPS.labels('hit')
+CACHE_NEGATIVE = CACHE_LOOKUPS.labels('negative')
+CACHE_STALE = CACHE_LOOKUPS.labels('stale')
+CACHE_MISS = CACHE_LOOKUPS.labels('miss')
+
+# Per-request (stage, seconds) list while a request is being timed, else None
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+def start_request_timing():
+    """Begin collecting stage timings for the current request context."""
+    return _request_timings.set([])
+
+
+def finish_request_timing(token, total):
+    """Stop collecting and return the request's stage timings plus total as a Server-Timing value."""
+    timings = _request_timings.get() or []
+    _request_timings.reset(token)
+    return ', '.join(f"{stage};dur={elapsed * 1000:.2f}" for stage, elapsed in [*timings, ('total', total)])
+
+
+def record_stage(stage, elapsed):
+    """Record one stage duration in the histogram and the current request's timings."""
+    STAGE_SECONDS.labels(stage).observe(elapsed)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, elapsed))
+
+
+def timed(stage):
+    """Decorator recording a function's (or coroutine's) duration under stage."""
+    def decorator(fn):
+        # Bound once here so each call pays only for the clock, one observe and one context lookup
+        observe = STAGE_SECONDS.labels(stage).observe
+        current_timings = _request_timings.get
+        clock = time.perf_counter
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = clock()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    elapsed = clock() - start
+                    observe(elapsed)
+                    timings = current_timings()
+                    if timings is not None:
+                        timings.append((stage, elapsed))
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                observe(elapsed)
+                timings = current_timings()
+                if timings is not None:
+                    timings.append((stage, elapsed))
+        return wrapper
+    return decorator
@@ -0,0 +1,173 @@
+import re
+import string
+from dataclasses import dataclass
+from types import MappingProxyType
+
+# Airline designator followed by a 1-4 digit flight number. Designators are
+# 3-letter ICAO codes or 2-character IATA codes with at least one letter.
+FLIGHT_NUMBER_PATTERN = re.compile(
+    r'\b([A-Za-z]{3}|[A-Za-z][A-Za-z0-9]|[0-9][A-Za-z])([ -]?)(\d{1,4})\b'
+)
+# A whole flight number, allowing an operational suffix letter (BA117A)
+FLIGHT_NUMBER_FULL = re.compile(r'([A-Za-z]{3}|[A-Za-z][A-Za-z0-9]|[0-9][A-Za-z])(\d{1,4})[A-Za-z]?')
+# Aircraft types that look like designator + number (A320, B737)
+AIRCRAFT_TYPE = re.compile(r'(?:A[23]\d\d|B7[0-8]\d)', re.IGNORECASE)
+# Flight number following a full airline name: "Emirates 202", "Emirates flight #202"
+NAME_NUMBER = re.compile(r'\s*(?:flight\s*)?(?:no\.?\s*|number\s*|#\s*)?(\d{1,4})\b', re.IGNORECASE)
+# Flight number following a short alias, which needs an explicit marker: "Delta flight 100", not "level 3"
+ALIAS_NUMBER = re.compile(r'\s*(?:flight\s*(?:no\.?\s*|number\s*|#\s*)?|no\.\s*|number\s*|#\s*)(\d{1,4})\b',
+                          re.IGNORECASE)
+WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?", re.IGNORECASE)
+# Lower-cases ASCII letters and digits and blanks everything else, so split() yields WORD's words (or pieces of them)
+_ASCII_WORDS = str.maketrans({chr(c): chr(c).lower() if chr(c) in string.ascii_letters + string.digits else ' '
+                              for c in range(128)})
+# Trailing words dropped to form short aliases ("Delta Air Lines" -> "Delta"). Many aliases are
+# ordinary words ("Spring", "Level", "China"), so they only count when capitalized or followed by
+# a flight number marker (see ALIAS_NUMBER)
+NAME_SUFFIXES = (('air', 'lines'), ('airlines',), ('airways',))
+
+_END = object()  # Trie key marking the end of a name; its value is (airline code, whether it is a short alias)
+
+
+@dataclass(slots=True, frozen=True)
+class ParsedQuery:
+    """Flight numbers and airline codes mentioned in a query, in order of appearance."""
+
+    flight_numbers: tuple = ()
+    airlines: tuple = ()
+
+
+class QueryParser:
+    """Precompiled, read-only index over airline codes and names for chat queries.
+
+    Built once from an airline code -> name mapping plus optional extra
+    name -> code aliases. Names are matched with a word trie (longest match
+    wins), so lookups cost O(words in the query) regardless of how many
+    airlines are known. Short aliases derived by dropping NAME_SUFFIXES are
+    weaker than full names: see ALIAS_NUMBER.
+    """
+
+    def __init__(self, airline_codes, name_aliases=None):
+        self.airline_codes = MappingProxyType({code.upper(): name for code, name in airline_codes.items()})
+        self._names = self._build_name_trie(self.airline_codes, name_aliases or {})
+        self._first_words = frozenset(word for word in self._names if word is not _END)
+        # First words as the ASCII pre-check splits them ("d'ivoire" -> "d", "ivoire")
+        self._first_pieces = frozenset(piece for word in self._first_words for piece in word.split("'"))
+
+    @staticmethod
+    def _build_name_trie(airline_codes, name_aliases):
+        names = {}
+        aliases = {}
+        for code, name in [*airline_codes.items(), *((code, name) for name, code in name_aliases.items())]:
+            words = tuple(WORD.findall(name.casefold()))
+            if words:
+                names.setdefault(words, code)
+            for suffix in NAME_SUFFIXES:
+                if len(words) > len(suffix) and words[-len(suffix):] == suffix:
+                    aliases.setdefault(words[:-len(suffix)], code)
+        trie = {}
+        # Full names are inserted last so they win over aliases derived from other airlines
+        entries = [(words, code, True) for words, code in aliases.items()]
+        entries.extend((words, code, False) for words, code in names.items())
+        for words, code, short in entries:
+            node = trie
+            for word in words:
+                node = node.setdefault(word, {})
+            node[_END] = (code, short)
+        return trie
+
+    def split(self, flight_number):
+        """Return (airline_code, number) for a flight number, or None if malformed."""
+        match = FLIGHT_NUMBER_FULL.fullmatch(flight_number.strip())
+        if not match:
+            return None
+        return match.group(1).upper(), match.group(2)
+
+    def airline_code(self, flight_number):
+        """Return the airline designator of a flight number, or None."""
+        parts = self.split(flight_number)
+        return parts[0] if parts else None
+
+    def airline_name(self, flight_number, default='Unknown'):
+        """Return the airline name for a flight number's designator."""
+        return self.airline_codes.get(self.airline_code(flight_number), default)
+
+    def _may_name_airline(self, text):
+        """Cheap pre-check: False only if no word of text can start an airline name."""
+        if text.isascii():
+            return not self._first_pieces.isdisjoint(text.translate(_ASCII_WORDS).split())
+        return not self._first_words.isdisjoint(WORD.findall(text.casefold()))
+
+    def find_airlines(self, text):
+        """Return (code, start, end) for every airline name or alias in text; the longest name wins."""
+        return [(code, start, end) for code, start, end, _ in self._find_names(text)]
+
+    def _find_names(self, text):
+        # (code, start, end, short alias?) per name; most queries name no airline, and a set check skips them
+        if not self._may_name_airline(text):
+            return []
+        words = [(m.group().casefold(), m.start(), m.end()) for m in WORD.finditer(text)]
+        found = []
+        i = 0
+        while i < len(words):
+            node = self._names
+            match = None
+            j = i
+            while j < len(words) and words[j][0] in node:
+                node = node[words[j][0]]
+                j += 1
+                if _END in node:
+                    match = (*node[_END], words[i][1], words[j - 1][2], j)
+            if match:
+                code, short, start, end, i = match
+                found.append((code, start, end, short))
+            else:
+                i += 1
+        return found
+
+    def _flight_number_spans(self, text):
+        for match in FLIGHT_NUMBER_PATTERN.finditer(text):
+            code, separator, number = match.groups()
+            code = code.upper()
+            if separator and (code not in self.airline_codes or not match.group(1).isupper()):
+                # "BA 117" is fine, "at 10" is not
+                continue
+            if not separator and code[0] in 'AB' and AIRCRAFT_TYPE.fullmatch(match.group()):
+                continue
+            yield match.start(), code, number
+
+    def parse(self, text):
+        """Extract flight numbers (by designator or airline name) and airlines from a query."""
+        if not self._may_name_airline(text):
+            # Designator-only query: matches are already in text order and there are no names to merge
+            flight_numbers = {}
+            airlines = {}
+            for _, code, number in self._flight_number_spans(text):
+                flight_numbers[code + number] = None
+                airlines[code] = None
+            return ParsedQuery(flight_numbers=tuple(flight_numbers), airlines=tuple(airlines))
+        spans = [(start, code, code + number) for start, code, number in self._flight_number_spans(text)]
+        mentions = []
+        for code, start, end, short in self._find_names(text):
+            if short:
+                number = ALIAS_NUMBER.match(text, end)
+                if number is None and not text[start].isupper():
+                    # "on level 3", "my spring trip": an ordinary word, not an airline
+                    continue
+            else:
+                number = NAME_NUMBER.match(text, end)
+            if number:
+                spans.append((start, code, code + number.group(1)))
+            else:
+                mentions.append((start, code))
+        spans.sort()
+        mentions.extend((start, code) for start, code, _ in spans)
+        mentions.sort()
+        return ParsedQuery(
+            flight_numbers=tuple(dict.fromkeys(flight_number for _, _, flight_number in spans)),
+            airlines=tuple(dict.fromkeys(code for _, code in mentions)),
+        )
+
+    def extract_flight_numbers(self, text):
+        """Return every flight number mentioned in text, in order, without duplicates."""
+        return list(self.parse(text).flight_numbers)
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limit_bucket (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rate_limit_ledger (
+    name TEXT NOT NULL,
+    period TEXT NOT NULL,
+    calls INTEGER NOT NULL,
+    PRIMARY KEY (name, period)
+);
+"""
+
+
+class QuotaExhausted(Exception):
+    """Raised when an upstream call is refused by the rate limiter or quota ledger."""
+
+
+def period_key(period, now=None):
+    """Return the ledger bucket ('2026-10', '2026-10-18', ...) for a timestamp."""
+    moment = datetime.fromtimestamp(now if now is not None else time.time(), tz=timezone.utc)
+    return moment.strftime({'month': '%Y-%m', 'day': '%Y-%m-%d', 'hour': '%Y-%m-%dT%H'}[period])
+
+
+class RateLimiter:
+    """Token bucket plus per-period call quota for AviationStack requests.
+
+    rate tokens are added per second up to burst; each upstream call takes one
+    (rate=None disables throttling and only the quota applies).
+    quota caps calls per period ('month', 'day' or 'hour'); None only counts.
+    With path set, bucket and ledger live in a SQLite file shared by every
+    process on the host; otherwise they are per-process.
+    """
+
+    def __init__(self, rate=5.0, burst=10, quota=None, period='month', path=None, max_wait=2.0, name='aviationstack'):
+        self.rate = rate
+        self.burst = burst
+        self.quota = quota
+        self.period = period
+        self.path = path
+        self.max_wait = max_wait
+        self.name = name
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated_at = time.time()
+        self._ledger = {}
+        self._local = threading.local()
+        self.granted = 0
+        self.throttled = 0
+        self.rejected = 0
+        if path:
+            self._connect().executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls):
+        """Build a limiter from AVIATIONSTACK_RATE/_BURST/_QUOTA/_QUOTA_PERIOD and RATE_LIMIT_DB.
+
+        Unset variables leave the corresponding limit off; calls are still counted.
+        """
+        rate = os.getenv('AVIATIONSTACK_RATE')
+        quota = os.getenv('AVIATIONSTACK_QUOTA')
+        return cls(
+            rate=float(rate) if rate else None,
+            burst=int(os.getenv('AVIATIONSTACK_BURST', '10')),
+            quota=int(quota) if quota else None,
+            period=os.getenv('AVIATIONSTACK_QUOTA_PERIOD', 'month'),
+            path=os.getenv('RATE_LIMIT_DB') or None,
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _refill(self, tokens, updated_at, now):
+        if self.rate is None:
+            return float(self.burst)
+        return min(self.burst, tokens + max(0.0, now - updated_at) * self.rate)
+
+    def _try_acquire(self, now):
+        """Take a token if possible: 0 on success, seconds to wait, or None if over quota."""
+        if self.path:
+            return self._try_acquire_shared(now)
+        with self._lock:
+            period = period_key(self.period, now)
+            calls = self._ledger.get(period, 0)
+            if self.quota is not None and calls >= self.quota:
+                return None
+            tokens = self._refill(self._tokens, self._updated_at, now)
+            self._updated_at = now
+            if tokens < 1:
+                self._tokens = tokens
+                return (1 - tokens) / self.rate
+            self._tokens = tokens - 1
+            # Keep only the current period in memory
+            self._ledger = {period: calls + 1}
+            return 0
+
+    def _try_acquire_shared(self, now):
+        conn = self._connect()
+        period = period_key(self.period, now)
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT calls FROM rate_limit_ledger WHERE name = ? AND period = ?',
+                               (self.name, period)).fetchone()
+            calls = row[0] if row else 0
+            if self.quota is not None and calls >= self.quota:
+                return None
+            row = conn.execute('SELECT tokens, updated_at FROM rate_limit_bucket WHERE name = ?',
+                               (self.name,)).fetchone()
+            tokens, updated_at = row if row else (float(self.burst), now)
+            tokens = self._refill(tokens, updated_at, now)
+            wait = 0 if tokens >= 1 else (1 - tokens) / self.rate
+            if not wait:
+                tokens -= 1
+                conn.execute('INSERT OR REPLACE INTO rate_limit_ledger (name, period, calls) VALUES (?, ?, ?)',
+                             (self.name, period, calls + 1))
+            conn.execute('INSERT OR REPLACE INTO rate_limit_bucket (name, tokens, updated_at) VALUES (?, ?, ?)',
+                         (self.name, tokens, now))
+            return wait
+        finally:
+            conn.execute('COMMIT')
+
+    def _record(self, outcome):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def acquire(self, timeout=None):
+        """Block until a call is allowed; raise QuotaExhausted past the deadline or quota."""
+        deadline = time.monotonic() + (self.max_wait if timeout is None else timeout)
+        waited = False
+        while True:
+            wait = self._try_acquire(time.time())
+            if wait == 0:
+                self._record('granted')
+                return
+            if wait is None or time.monotonic() + wait > deadline:
+                self._record('rejected')
+                raise QuotaExhausted("AviationStack quota exhausted" if wait is None else "AviationStack rate limit reached")
+            if not waited:
+                self._record('throttled')
+                waited = True
+            time.sleep(wait)
+
+    async def acquire_async(self, timeout=None):
+        """asyncio variant of acquire() that waits without blocking the event loop.
+
+        With a shared SQLite file the transaction (which may wait on other
+        processes' locks) runs in a worker thread.
+        """
+        deadline = time.monotonic() + (self.max_wait if timeout is None else timeout)
+        waited = False
+        while True:
+            if self.path:
+                wait = await asyncio.to_thread(self._try_acquire, time.time())
+            else:
+                wait = self._try_acquire(time.time())
+            if wait == 0:
+                self._record('granted')
+                return
+            if wait is None or time.monotonic() + wait > deadline:
+                self._record('rejected')
+                raise QuotaExhausted("AviationStack quota exhausted" if wait is None else "AviationStack rate limit reached")
+            if not waited:
+                self._record('throttled')
+                waited = True
+            await asyncio.sleep(wait)
+
+    def usage(self):
+        """Return calls made in the current period."""
+        period = period_key(self.period)
+        if self.path:
+            row = self._connect().execute('SELECT calls FROM rate_limit_ledger WHERE name = ? AND period = ?',
+                                          (self.name, period)).fetchone()
+            return row[0] if row else 0
+        with self._lock:
+            return self._ledger.get(period, 0)
+
+    def stats(self):
+        """Return quota usage and limiter counters."""
+        used = self.usage()
+        with self._lock:
+            return {
+                "period": period_key(self.period),
+                "calls": used,
+                "quota": self.quota,
+                "remaining": None if self.quota is None else max(0, self.quota - used),
+                "rate_per_second": self.rate,
+                "granted": self.granted,
+                "throttled": self.throttled,
+                "rejected": self.rejected,
+                "shared": bool(self.path),
+            }
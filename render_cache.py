@@ -0,0 +1,45 @@
+import threading
+from collections import OrderedDict
+
+
+class RenderCache:
+    """LRU of pre-rendered payloads (chat answers, JSON bodies, ETags) per record version.
+
+    Each entry remembers the FlightRecord version it was built from; a lookup
+    with a different version rebuilds and replaces it, so refreshed records
+    never serve stale renderings.
+    """
+
+    def __init__(self, max_entries=20000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (version, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version, build):
+        """Return the value rendered for key at version, calling build() on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        value = build()
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Drop every rendering."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return occupancy and hit/miss counters."""
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
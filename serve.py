@@ -0,0 +1,165 @@
+"""Production entry point: the Flask API on gunicorn, or the FastAPI app on uvicorn.
+
+    python serve.py flask   [--workers N] [--threads T] [--bind 0.0.0.0:5000]
+    python serve.py fastapi [--workers N] [--bind 0.0.0.0:8000]
+
+Every option also reads an environment variable (WEB_CONCURRENCY, THREADS,
+BIND, KEEPALIVE, GRACEFUL_TIMEOUT, WORKER_TIMEOUT). With more than one
+worker, the flight cache and the AviationStack rate limiter are shared
+through SQLite files in --state-dir, unless FLIGHT_CACHE_DB / RATE_LIMIT_DB
+are already set. That keeps the quota global and lets a flight fetched by
+one worker serve them all. Flights in FLIGHT_WARMUP are fetched when each
+worker starts. Counters such as /metrics are still per worker, and so are
+live-tracking subscriptions: each worker polls the flights its own clients
+follow.
+"""
+import argparse
+import os
+import socket
+import sys
+import tempfile
+
+from dotenv import load_dotenv
+
+try:
+    from uvicorn.protocols.http.auto import AutoHTTPProtocol
+except ImportError:  # Optional: only `serve.py fastapi` needs uvicorn
+    AutoHTTPProtocol = object
+
+DEFAULT_PORTS = {'flask': 5000, 'fastapi': 8000}
+
+
+def default_workers():
+    """Workers to run when WEB_CONCURRENCY is unset: one per core, as the servers are CPU-bound on cache hits."""
+    return os.cpu_count() or 1
+
+
+def share_state(workers, state_dir):
+    """Point every worker at the same SQLite cache, quota and scheduler lock when running several."""
+    if workers <= 1:
+        return
+    os.makedirs(state_dir, exist_ok=True)
+    os.environ.setdefault('FLIGHT_CACHE_DB', os.path.join(state_dir, 'flight_cache.db'))
+    os.environ.setdefault('RATE_LIMIT_DB', os.path.join(state_dir, 'rate_limit.db'))
+    os.environ.setdefault('REFRESH_SCHEDULER_LOCK', os.path.join(state_dir, 'refresh_scheduler.lock'))
+    # Printed rather than logged: logging is configured inside each worker, after the fork
+    print(f"Sharing flight cache ({os.environ['FLIGHT_CACHE_DB']}) and rate limit "
+          f"({os.environ['RATE_LIMIT_DB']}) across {workers} workers", file=sys.stderr)
+
+
+def _warm_up_worker(worker):
+    """gunicorn post_worker_init hook: prefetch FLIGHT_WARMUP flights into this worker's cache."""
+    from agents import get_flight_records, warmup_flight_numbers
+
+    flight_numbers = warmup_flight_numbers()
+    if flight_numbers:
+        get_flight_records(flight_numbers)
+        worker.log.info("Warmed %d flights", len(flight_numbers))
+
+
+def serve_flask(args):
+    """Run api.py under gunicorn (preforking; gthread workers when threads > 1)."""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        sys.exit("gunicorn is required to serve the Flask app: pip install gunicorn")
+
+    class FlightAPIApplication(BaseApplication):
+        def load_config(self):
+            options = {
+                'bind': args.bind,
+                'workers': args.workers,
+                'threads': args.threads,
+                'worker_class': 'gthread' if args.threads > 1 else 'sync',
+                'keepalive': args.keepalive,
+                'graceful_timeout': args.graceful_timeout,
+                'timeout': args.timeout,
+                # Recycle workers now and then so slow leaks cannot accumulate
+                'max_requests': args.max_requests,
+                'max_requests_jitter': args.max_requests // 10,
+                'post_worker_init': _warm_up_worker,
+                # Workers import the app themselves: the logging queue thread and
+                # pooled connections must not be created before the fork
+                'preload_app': False,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from api import init_app
+            return init_app()
+
+    FlightAPIApplication().run()
+
+
+class NoDelayHTTPProtocol(AutoHTTPProtocol):
+    """uvicorn's HTTP protocol with Nagle disabled on every connection.
+
+    In multi-worker mode uvicorn binds the listening socket itself without
+    IPPROTO_TCP, so asyncio never sets TCP_NODELAY on accepted connections and
+    small keep-alive responses stall ~40ms waiting for delayed ACKs.
+    """
+
+    def connection_made(self, transport):
+        sock = transport.get_extra_info('socket')
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        super().connection_made(transport)
+
+
+def serve_fastapi(args):
+    """Run api_server.py under uvicorn's multi-process supervisor."""
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("uvicorn is required to serve the FastAPI app: pip install uvicorn")
+
+    host, _, port = args.bind.rpartition(':')
+    uvicorn.run(
+        'api_server:app',
+        host=host or '0.0.0.0',
+        port=int(port),
+        workers=args.workers,
+        http=NoDelayHTTPProtocol,
+        timeout_keep_alive=args.keepalive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        limit_max_requests=args.max_requests or None,
+        access_log=False,
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the flight API with multiple worker processes.')
+    parser.add_argument('app', choices=sorted(DEFAULT_PORTS), help='which server to run')
+    parser.add_argument('--bind', default=os.getenv('BIND'), help='host:port (default 0.0.0.0:5000 / 8000)')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WEB_CONCURRENCY', '0')) or default_workers())
+    parser.add_argument('--threads', type=int, default=int(os.getenv('THREADS', '4')),
+                        help='threads per worker (Flask only)')
+    parser.add_argument('--keepalive', type=int, default=int(os.getenv('KEEPALIVE', '5')),
+                        help='seconds to hold idle keep-alive connections')
+    parser.add_argument('--graceful-timeout', type=int, default=int(os.getenv('GRACEFUL_TIMEOUT', '30')),
+                        help='seconds in-flight requests get to finish on shutdown')
+    parser.add_argument('--timeout', type=int, default=int(os.getenv('WORKER_TIMEOUT', '60')),
+                        help='seconds before a silent worker is restarted (Flask only)')
+    parser.add_argument('--max-requests', type=int, default=int(os.getenv('MAX_REQUESTS', '0')),
+                        help='restart a worker after this many requests (0 disables)')
+    parser.add_argument('--state-dir', default=os.getenv('FLIGHT_STATE_DIR',
+                                                         os.path.join(tempfile.gettempdir(), 'flight-api')),
+                        help='where multi-worker runs keep the shared SQLite cache and quota')
+    args = parser.parse_args(argv)
+    args.bind = args.bind or f"0.0.0.0:{os.getenv('PORT', DEFAULT_PORTS[args.app])}"
+    return args
+
+
+def main(argv=None):
+    load_dotenv()
+    args = parse_args(argv)
+    share_state(args.workers, args.state_dir)
+    if args.app == 'flask':
+        serve_flask(args)
+    else:
+        serve_fastapi(args)
+
+
+if __name__ == '__main__':
+    main()
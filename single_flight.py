@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+
+class _Call:
+    """A single in-flight invocation that waiting callers share."""
+
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution (threads)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Run fn() once per key at a time; concurrent callers share its result."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def in_flight(self):
+        """Return the number of keys currently being fetched."""
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """Coalesce concurrent coroutine calls for the same key into one task (asyncio)."""
+
+    def __init__(self):
+        self._tasks = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key, coro_fn):
+        """Await coro_fn() once per key at a time; concurrent callers share its result."""
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coro_fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _, key=key: self._tasks.pop(key, None))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+        # Shield so a cancelled waiter does not cancel the fetch for everyone else
+        return await asyncio.shield(task)
+
+    def in_flight(self):
+        """Return the number of keys currently being fetched."""
+        return len(self._tasks)
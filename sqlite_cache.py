@@ -0,0 +1,166 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from flight_cache import CacheBackend
+from flight_record import dump_cached, load_cached
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS flight_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS flight_cache_expires_at ON flight_cache (expires_at);
+CREATE INDEX IF NOT EXISTS flight_cache_stored_at ON flight_cache (stored_at);
+"""
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """On-disk cache backend in SQLite (WAL) shared by every process using the same file.
+
+    Entries survive restarts. Limits are enforced on the amortized purge, oldest
+    entries first, so they are soft bounds between sweeps.
+    """
+
+    def __init__(self, path, max_entries=100000, max_bytes=256 * 1024 * 1024,
+                 default_ttl=300, status_ttls=None, purge_interval=60, stale_grace=0,
+                 encode=dump_cached, decode=load_cached):
+        super().__init__(max_entries, max_bytes, default_ttl, status_ttls, purge_interval, stale_grace)
+        self.path = path
+        self.encode = encode
+        self.decode = decode
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._last_purge = time.time()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        """Return this thread's connection, reopening after a fork."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, name, n=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def _read(self, key, grace=0):
+        row = self._connect().execute(
+            'SELECT value, expires_at FROM flight_cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or row[1] + grace <= time.time():
+            return None
+        return self.decode(row[0])
+
+    def get(self, key):
+        self._maybe_purge()
+        value = self._read(key)
+        self._count('hits' if value is not None else 'misses')
+        return value
+
+    def peek(self, key):
+        return self._read(key)
+
+    def get_stale(self, key, grace=None):
+        return self._read(key, self.stale_grace if grace is None else min(grace, self.stale_grace))
+
+    def set(self, key, value, ttl=None):
+        if ttl is None:
+            ttl = self.ttl_for(value)
+        encoded = self.encode(value)
+        now = time.time()
+        self._connect().execute(
+            'INSERT OR REPLACE INTO flight_cache (key, value, stored_at, expires_at, size) VALUES (?, ?, ?, ?, ?)',
+            (key, encoded, now, now + ttl, len(encoded))
+        )
+        self._maybe_purge()
+
+    def set_many(self, items, ttl=None):
+        now = time.time()
+        rows = []
+        for key, value in items:
+            encoded = self.encode(value)
+            rows.append((key, encoded, now, now + (self.ttl_for(value) if ttl is None else ttl), len(encoded)))
+        conn = self._connect()
+        # One transaction for the whole batch instead of one commit per row
+        with conn:
+            conn.execute('BEGIN')
+            conn.executemany(
+                'INSERT OR REPLACE INTO flight_cache (key, value, stored_at, expires_at, size) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+        self._maybe_purge()
+
+    def delete(self, key):
+        self._connect().execute('DELETE FROM flight_cache WHERE key = ?', (key,))
+
+    def clear(self):
+        self._connect().execute('DELETE FROM flight_cache')
+
+    def purge_expired(self):
+        conn = self._connect()
+        removed = conn.execute(
+            'DELETE FROM flight_cache WHERE expires_at <= ?', (time.time() - self.stale_grace,)
+        ).rowcount
+        self._count('expirations', removed)
+        self._enforce_limits(conn)
+        self._last_purge = time.time()
+        return removed
+
+    def _enforce_limits(self, conn):
+        entries, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM flight_cache').fetchone()
+        if entries > self.max_entries:
+            evicted = conn.execute(
+                'DELETE FROM flight_cache WHERE key IN '
+                '(SELECT key FROM flight_cache ORDER BY stored_at LIMIT ?)', (entries - self.max_entries,)
+            ).rowcount
+            self._count('evictions', evicted)
+            entries -= evicted
+        if size > self.max_bytes and entries:
+            # Drop the oldest entries in proportion to the overshoot
+            overshoot = max(1, int(entries * (size - self.max_bytes) / size) + 1)
+            evicted = conn.execute(
+                'DELETE FROM flight_cache WHERE key IN '
+                '(SELECT key FROM flight_cache ORDER BY stored_at LIMIT ?)', (overshoot,)
+            ).rowcount
+            self._count('evictions', evicted)
+
+    def _maybe_purge(self):
+        if time.time() - self._last_purge >= self.purge_interval:
+            try:
+                self.purge_expired()
+            except sqlite3.OperationalError as e:
+                # Another process holds the write lock; the next sweep will catch up
+                logger.warning(f"Skipping cache purge: {str(e)}")
+
+    def stats(self):
+        entries, size = self._connect().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM flight_cache WHERE expires_at > ?', (time.time(),)
+        ).fetchone()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "sqlite",
+                "path": self.path,
+                "entries": entries,
+                "bytes": size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
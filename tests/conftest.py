@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+os.environ.setdefault('AVIATIONSTACK_API_KEY', 'test-key')
+os.environ.setdefault('LOG_FILE', os.devnull)
+
+from stub_aviationstack import StubAviationStack  # noqa: E402
+
+
+@pytest.fixture
+def stub():
+    """A local AviationStack stand-in; latency keeps concurrent callers overlapping."""
+    with StubAviationStack(latency=0.05) as server:
+        yield server
+
+
+@pytest.fixture
+def make_flight_api(stub, monkeypatch):
+    """Build FlightAPIs pointed at the stub; by default with an in-process cache and no rate limit."""
+    from flight_api import FlightAPI
+
+    for name in ('FLIGHT_CACHE_DB', 'RATE_LIMIT_DB', 'AVIATIONSTACK_RATE', 'AVIATIONSTACK_QUOTA'):
+        monkeypatch.delenv(name, raising=False)
+    return lambda **kwargs: FlightAPI(api_key='test-key', base_url=stub.base_url, **kwargs)
+
+
+@pytest.fixture
+def flight_api(make_flight_api):
+    """A FlightAPI with an in-process cache and no rate limit, pointed at the stub."""
+    return make_flight_api()
+
+
+@pytest.fixture
+def shared_api(flight_api):
+    """Install flight_api as the process-wide FlightAPI used by agents and the servers."""
+    import agents
+
+    previous = agents._flight_api, agents._async_flight_api
+    agents.set_flight_api(flight_api)
+    yield flight_api
+    agents._flight_api, agents._async_flight_api = previous
@@ -0,0 +1,41 @@
+from flight_record import FlightRecord
+
+
+def test_get_flight_records_accepts_mixed_case_and_padded_input(stub, shared_api):
+    import agents
+
+    results = agents.get_flight_records(['ba5', ' AA6 ', 'BA5', 'XX1'])
+
+    assert list(results) == ['ba5', ' AA6 ', 'BA5', 'XX1']
+    assert isinstance(results['ba5'], FlightRecord) and results['ba5'].flight_number == 'BA5'
+    assert results['BA5'] is results['ba5']
+    assert isinstance(results[' AA6 '], FlightRecord)
+    assert results['XX1'] == {"error": "Unknown airline code: XX"}
+    # BA5 is fetched once however it was spelled; XX1 never goes upstream
+    assert stub.calls == 2
+
+
+def test_multi_flight_chat_query_with_lowercase_designators(stub, shared_api):
+    import agents
+
+    answer = agents.qa_agent_respond("compare ba5 and aa6")
+
+    assert "error" not in answer.lower()
+    assert stub.calls == 2
+
+
+def test_flight_api_is_built_with_dotenv_settings(monkeypatch):
+    import dotenv
+
+    import agents
+
+    def load_dotenv():
+        # Stands in for a .env file next to the app, as gunicorn api:app would see it
+        monkeypatch.setenv('AVIATIONSTACK_API_KEY', 'from-dotenv')
+
+    monkeypatch.delenv('AVIATIONSTACK_API_KEY')
+    monkeypatch.setattr(dotenv, 'load_dotenv', load_dotenv)
+    monkeypatch.setattr(agents, '_flight_api', None)
+    monkeypatch.setattr(agents, '_async_flight_api', None)
+
+    assert agents.get_flight_api().api_key == 'from-dotenv'
@@ -0,0 +1,75 @@
+import pytest
+
+
+@pytest.fixture
+def client(shared_api):
+    import api
+
+    return api.app.test_client()
+
+
+def test_batch_validates_entries_before_going_upstream(stub, client):
+    junk = ['hello', 'XX1'] + [f'QQ{n}' for n in range(50)]
+
+    response = client.post('/api/flights/batch', json={'flight_numbers': junk + ['ba117']})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["count"] == len(junk) + 1
+    assert body["errors"] == len(junk)
+    assert body["flights"]["hello"] == {"error": "Invalid flight number format"}
+    assert body["flights"]["QQ7"] == {"error": "Unknown airline code: QQ"}
+    assert body["flights"]["ba117"]["flight_number"] == 'BA117'
+    assert stub.calls == 1
+
+
+@pytest.fixture
+def scheduler(shared_api, monkeypatch):
+    import api
+    from flight_scheduler import RefreshScheduler
+
+    scheduler = RefreshScheduler(shared_api)
+    monkeypatch.setattr(api, '_refresh_scheduler', scheduler)
+    yield scheduler
+    scheduler.stop()
+
+
+def test_watchlist_rejects_invalid_flights(stub, client, scheduler):
+    response = client.post('/api/watchlist', json={'flight_numbers': ['ba117', 'HELLO WORLD', 'X' * 50]})
+
+    assert response.status_code == 400
+    assert set(response.get_json()["details"]) == {'HELLO WORLD', 'X' * 50}
+    assert scheduler.watchlist() == []
+    assert stub.calls == 0
+
+
+def test_watchlist_is_capped(client, scheduler, monkeypatch):
+    import api
+
+    monkeypatch.setattr(api, 'MAX_WATCHLIST_SIZE', 2)
+    scheduler.watch('BA117', refresh_in=60)
+
+    assert client.post('/api/watchlist', json={'flight_numbers': ['BA117', 'ba118']}).status_code == 200
+    response = client.post('/api/watchlist', json={'flight_numbers': ['BA119']})
+
+    assert response.status_code == 400
+    assert scheduler.watchlist() == ['BA117', 'BA118']
+
+
+def test_flight_route_shares_one_lookup_across_spellings(stub, client):
+    for path in ('/api/flight/ba117', '/api/flight/BA117', '/api/flight/%20Ba117%20'):
+        assert client.get(path).get_json()["flight_number"] == 'BA117'
+
+    assert stub.calls == 1
+
+
+def test_fastapi_flight_route_normalizes_the_path(stub, shared_api):
+    from starlette.testclient import TestClient
+
+    import api_server
+
+    client = TestClient(api_server.app)
+    etags = {client.get(path).headers['etag'] for path in ('/flight/ba117', '/flight/BA117')}
+
+    assert len(etags) == 1
+    assert stub.calls == 1
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+from async_flight_api import AsyncFlightAPI
+from flight_api import FlightAPI
+from rate_limiter import RateLimiter
+from sqlite_cache import SQLiteCacheBackend
+
+
+def test_sqlite_cache_and_limiter_stay_off_the_event_loop(stub, tmp_path):
+    api = FlightAPI(api_key='test-key', base_url=stub.base_url,
+                    cache_backend=SQLiteCacheBackend(str(tmp_path / 'cache.db')),
+                    limiter=RateLimiter(rate=None, path=str(tmp_path / 'limit.db')))
+    loop_threads = set()
+    sqlite_threads = []
+
+    def spy(fn):
+        def wrapper(*args, **kwargs):
+            sqlite_threads.append(threading.get_ident())
+            return fn(*args, **kwargs)
+        return wrapper
+
+    api.cache._connect = spy(api.cache._connect)
+    api.limiter._connect = spy(api.limiter._connect)
+
+    async def run():
+        loop_threads.add(threading.get_ident())
+        async_api = AsyncFlightAPI(api)
+        try:
+            first = await async_api.get_flight_record('BA117')  # Miss: limiter, fetch, cache write
+            again = await async_api.get_flight_record('BA117')  # Hit
+        finally:
+            await async_api.aclose()
+        return first, again
+
+    first, again = asyncio.run(run())
+
+    assert first.flight_number == again.flight_number == 'BA117'
+    assert stub.calls == 1
+    assert sqlite_threads
+    assert loop_threads.isdisjoint(sqlite_threads)
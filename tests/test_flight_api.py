@@ -0,0 +1,142 @@
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from flight_record import NO_FLIGHT_DATA, FlightRecord
+from flight_transport import FlightTransport
+from rate_limiter import QuotaExhausted, RateLimiter
+from stub_aviationstack import make_flight
+
+
+def listed(flight_iata, flight_date, status):
+    flight = make_flight(flight_iata)
+    flight["flight_date"] = flight_date.isoformat()
+    flight["flight_status"] = status
+    return flight
+
+
+def test_ingest_caches_and_samples_one_entry_per_flight(flight_api):
+    today = date.today()
+    page = [
+        listed('BA117', today - timedelta(days=2), 'landed'),
+        listed('BA117', today, 'scheduled'),
+        listed('AA100', today - timedelta(days=1), 'landed'),
+    ]
+
+    records = flight_api.ingest_flights(page)
+
+    # The stream still sees every listed entry
+    assert [record.status for record in records] == ['landed', 'scheduled', 'landed']
+    # Only today's BA117 becomes the cached answer, with its own TTL
+    cached = flight_api.cache.peek(flight_api._cache_key('BA117'))
+    assert cached.status == 'scheduled'
+    assert flight_api.cache.peek(flight_api._cache_key('AA100')).status == 'landed'
+    assert len(flight_api.historical_data.get('BA117')) == 1
+    assert len(flight_api.analytics) == 2
+
+
+def test_batch_counts_each_miss_once(stub, flight_api):
+    flight_api.get_flight_records(['BA1', 'BA2', 'BA3', 'BA4'])
+    flight_api.get_flight_records(['BA1', 'BA2'])
+
+    stats = flight_api.cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 4)
+    assert stub.calls == 4
+
+
+def expire(api, flight_number):
+    """Make the cached record for flight_number expire now, keeping it within the stale grace."""
+    key = api._cache_key(flight_number)
+    api.cache.set(key, api.cache.peek(key), ttl=0.01)
+    time.sleep(0.02)
+
+
+def test_token_bucket_throttles_bursts():
+    limiter = RateLimiter(rate=20, burst=2, max_wait=1)
+
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.acquire()
+
+    # The burst goes straight through; the third call waits for a token (1/20s)
+    assert time.monotonic() - start >= 0.04
+    assert (limiter.granted, limiter.throttled, limiter.rejected) == (3, 1, 0)
+
+
+def test_token_bucket_rejects_waits_past_the_deadline():
+    limiter = RateLimiter(rate=1, burst=1, max_wait=0.05)
+    limiter.acquire()
+
+    with pytest.raises(QuotaExhausted, match='rate limit'):
+        limiter.acquire()
+    assert limiter.rejected == 1
+
+
+def test_quota_ledger_is_shared_through_sqlite(tmp_path):
+    path = str(tmp_path / 'rate_limit.db')
+    first = RateLimiter(rate=None, quota=3, path=path)
+    second = RateLimiter(rate=None, quota=3, path=path)
+
+    first.acquire()
+    second.acquire()
+    first.acquire()
+
+    with pytest.raises(QuotaExhausted, match='quota'):
+        second.acquire()
+    assert first.usage() == second.usage() == 3
+    assert second.stats()["remaining"] == 0
+
+
+def test_quota_exhaustion_serves_stale_records(stub, make_flight_api):
+    api = make_flight_api(limiter=RateLimiter(rate=None, quota=1))
+    assert isinstance(api.get_flight_record('BA117'), FlightRecord)
+    # Past the revalidate window, so the lookup goes upstream and is refused
+    api.revalidate_window = timedelta(0)
+    expire(api, 'BA117')
+
+    stale = api.get_flight_record('BA117')
+    missing = api.get_flight_record('BA118')
+
+    assert isinstance(stale, FlightRecord) and stale.flight_number == 'BA117'
+    assert api.stale_served == 1
+    assert missing == {"error": "Upstream rate limit reached, please retry shortly"}
+    assert stub.calls == 1
+    assert api.limiter.stats()["rejected"] == 2
+
+
+def test_no_data_answers_are_cached_for_negative_ttl(stub, flight_api):
+    flight_api.negative_ttl = timedelta(seconds=0.2)
+
+    assert flight_api.get_flight_record('ZZ1') == {"error": NO_FLIGHT_DATA}
+    assert flight_api.get_flight_record('ZZ1') == {"error": NO_FLIGHT_DATA}
+    assert stub.calls == 1
+
+    time.sleep(0.25)
+    flight_api.get_flight_record('ZZ1')
+    assert stub.calls == 2
+
+
+def test_upstream_failures_are_cached_for_error_ttl(stub, make_flight_api):
+    api = make_flight_api(transport=FlightTransport(max_retries=0))
+    stub.error_rate = 1.0
+
+    assert api.get_flight_record('BA117') == {"error": "Failed to fetch flight information"}
+    assert api.get_flight_record('BA117') == {"error": "Failed to fetch flight information"}
+    assert stub.calls == 1
+
+
+def test_expired_records_are_served_while_one_background_refresh_runs(stub, flight_api):
+    first = flight_api.get_flight_record('BA117')
+    expire(flight_api, 'BA117')
+
+    answers = [flight_api.get_flight_record('BA117') for _ in range(5)]
+
+    # Answered from the stale copy without waiting for upstream
+    assert all(answer is first for answer in answers)
+    assert flight_api.revalidations == 1
+    deadline = time.monotonic() + 2
+    while flight_api.cache.peek(flight_api._cache_key('BA117')) is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert flight_api.cache.peek(flight_api._cache_key('BA117')) is not None
+    assert stub.calls == 2
@@ -0,0 +1,43 @@
+from flight_record import NO_FLIGHT_DATA, FlightRecord
+from flight_scheduler import RefreshScheduler
+
+
+class FakeFlightAPI:
+    """Answers refreshes from a fixed table of results."""
+
+    def __init__(self, results):
+        self.results = results
+        self.refreshed = []
+
+    def refresh_flight_info(self, flight_number):
+        self.refreshed.append(flight_number)
+        return self.results[flight_number]
+
+
+def test_flights_without_data_are_dropped_after_max_misses():
+    api = FakeFlightAPI({'BA117': {"error": NO_FLIGHT_DATA}, 'BA118': {"error": "Failed to fetch flight information"}})
+    scheduler = RefreshScheduler(api, max_misses=3)
+    scheduler.watch('BA117', 'BA118')
+
+    for _ in range(3):
+        scheduler._refresh('BA117')
+        scheduler._refresh('BA118')
+
+    # Upstream failures are retried; flights upstream has never heard of are not
+    assert scheduler.watchlist() == ['BA118']
+    assert scheduler.stats()["dropped"] == 1
+
+
+def test_a_successful_refresh_resets_the_miss_count():
+    api = FakeFlightAPI({'BA117': {"error": NO_FLIGHT_DATA}})
+    scheduler = RefreshScheduler(api, max_misses=2)
+    scheduler.watch('BA117')
+
+    scheduler._refresh('BA117')
+    api.results['BA117'] = FlightRecord(flight_number='BA117', status='scheduled')
+    scheduler.next_interval = lambda record: 60
+    scheduler._refresh('BA117')
+    api.results['BA117'] = {"error": NO_FLIGHT_DATA}
+    scheduler._refresh('BA117')
+
+    assert scheduler.watchlist() == ['BA117']
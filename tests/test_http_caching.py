@@ -0,0 +1,105 @@
+import gzip
+
+import pytest
+
+from http_caching import brotli
+
+ENCODINGS = ['gzip', pytest.param('br', marks=pytest.mark.skipif(brotli is None, reason='brotli is optional'))]
+
+
+def decode(body, encoding):
+    if encoding == 'br':
+        import brotli
+        return brotli.decompress(body)
+    return gzip.decompress(body)
+
+
+@pytest.fixture
+def flask_client(shared_api, monkeypatch):
+    import api
+
+    # A single flight's JSON is below the default threshold; compress it so ETags per encoding show up
+    monkeypatch.setattr(api, 'MIN_COMPRESS_SIZE', 64)
+    return api.app.test_client()
+
+
+@pytest.fixture
+def fastapi_client(shared_api, monkeypatch):
+    from starlette.testclient import TestClient
+
+    import api_server
+
+    monkeypatch.setattr(api_server, 'MIN_COMPRESS_SIZE', 64)
+    return TestClient(api_server.app)
+
+
+def test_flask_if_none_match_returns_empty_304(flask_client):
+    first = flask_client.get('/api/flight/BA117')
+    assert first.status_code == 200 and first.headers['ETag']
+
+    again = flask_client.get('/api/flight/BA117', headers={'If-None-Match': first.headers['ETag']})
+
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == first.headers['ETag']
+
+
+@pytest.mark.parametrize('encoding', ENCODINGS)
+def test_flask_compresses_with_a_per_encoding_etag(flask_client, encoding):
+    identity = flask_client.get('/api/flight/BA117', headers={'Accept-Encoding': 'identity'})
+    encoded = flask_client.get('/api/flight/BA117', headers={'Accept-Encoding': encoding})
+
+    assert 'Content-Encoding' not in identity.headers
+    assert encoded.headers['Content-Encoding'] == encoding
+    assert 'Accept-Encoding' in encoded.headers['Vary']
+    assert encoded.headers['ETag'] != identity.headers['ETag']
+    assert len(encoded.data) < len(identity.data)
+    assert decode(encoded.data, encoding) == identity.data
+    # The client's cached compressed copy still validates
+    revalidated = flask_client.get('/api/flight/BA117', headers={
+        'Accept-Encoding': encoding, 'If-None-Match': encoded.headers['ETag']})
+    assert revalidated.status_code == 304 and revalidated.data == b''
+    # Caches match the 304 to the stored variant by its validator
+    assert revalidated.headers['ETag'] == encoded.headers['ETag']
+    assert 'Accept-Encoding' in revalidated.headers['Vary']
+
+
+def test_flask_batch_response_is_compressed_at_the_default_threshold(shared_api):
+    import api
+
+    client = api.app.test_client()
+    body = {'flight_numbers': [f'BA{n}' for n in range(1, 6)]}
+    identity = client.post('/api/flights/batch', json=body)
+    encoded = client.post('/api/flights/batch', json=body, headers={'Accept-Encoding': 'gzip'})
+
+    assert encoded.headers['Content-Encoding'] == 'gzip'
+    assert len(encoded.data) < len(identity.data)
+    assert gzip.decompress(encoded.data) == identity.data
+
+
+def test_fastapi_if_none_match_returns_empty_304(fastapi_client):
+    first = fastapi_client.get('/flight/BA117')
+    assert first.status_code == 200 and first.headers['etag']
+
+    again = fastapi_client.get('/flight/BA117', headers={'If-None-Match': first.headers['etag']})
+
+    assert again.status_code == 304
+    assert again.content == b''
+
+
+@pytest.mark.parametrize('encoding', ENCODINGS)
+def test_fastapi_compresses_with_a_per_encoding_etag(fastapi_client, encoding):
+    identity = fastapi_client.get('/flight/BA117', headers={'Accept-Encoding': 'identity'})
+    encoded = fastapi_client.get('/flight/BA117', headers={'Accept-Encoding': encoding})
+
+    assert 'content-encoding' not in identity.headers
+    assert encoded.headers['content-encoding'] == encoding
+    assert encoded.headers['etag'] != identity.headers['etag']
+    # httpx decodes the body; content-length is the size on the wire
+    assert int(encoded.headers['content-length']) < int(identity.headers['content-length'])
+    assert encoded.content == identity.content
+    revalidated = fastapi_client.get('/flight/BA117', headers={
+        'Accept-Encoding': encoding, 'If-None-Match': encoded.headers['etag']})
+    assert revalidated.status_code == 304 and revalidated.content == b''
+    assert revalidated.headers['etag'] == encoded.headers['etag']
+    assert 'Accept-Encoding' in revalidated.headers['vary']
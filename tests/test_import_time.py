@@ -0,0 +1,10 @@
+import pytest
+
+from check_import_time import DEFAULT_BUDGETS, check
+
+
+@pytest.mark.parametrize('module, budget', DEFAULT_BUDGETS.items())
+def test_entry_point_imports_within_budget_and_without_side_effects(module, budget):
+    median, problems = check(module, budget, runs=3)
+
+    assert problems == [], f'{module}: {median}ms'
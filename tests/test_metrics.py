@@ -0,0 +1,51 @@
+import threading
+
+from metrics import Histogram, timed
+
+
+def test_histogram_sums_observations_from_every_thread():
+    histogram = Histogram('test_seconds', 'Test.', buckets=(0.01, 0.1))
+    series = histogram.labels()
+
+    def observe():
+        for value in (0.005, 0.05, 0.5):
+            series.observe(value)
+
+    threads = [threading.Thread(target=observe) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    observe()
+
+    lines = histogram.render()
+    assert 'test_seconds_bucket{le="0.01"} 5' in lines
+    assert 'test_seconds_bucket{le="0.1"} 10' in lines
+    assert 'test_seconds_bucket{le="+Inf"} 15' in lines
+    assert 'test_seconds_count 15' in lines
+    assert any(line.startswith('test_seconds_sum 2.77') for line in lines)
+
+
+def test_timed_records_a_failing_call():
+    from metrics import STAGE_SECONDS
+
+    @timed('test-failing')
+    def fail():
+        raise ValueError
+
+    try:
+        fail()
+    except ValueError:
+        pass
+    assert STAGE_SECONDS.labels('test-failing').value()[-1] == 1
+
+
+def test_batch_lookups_reach_the_request_timings(flight_api):
+    from metrics import finish_request_timing, start_request_timing
+
+    token = start_request_timing()
+    flight_api.get_flight_records(['BA1', 'BA2', 'BA3'])
+    header = finish_request_timing(token, 0.1)
+
+    # One lookup stage per flight, each timed on a batch pool thread
+    assert header.count('lookup;dur=') == 3
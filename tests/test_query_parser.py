@@ -0,0 +1,35 @@
+import pytest
+
+from query_parser import QueryParser
+
+CODES = {'BA': 'British Airways', 'EK': 'Emirates', 'QF': 'Qantas', 'HF': "Air Cote d'Ivoire",
+         'DL': 'Delta Air Lines', 'CI': 'China Airlines', '9C': 'Spring Airlines', 'LV': 'Level Airlines'}
+
+
+@pytest.fixture(scope='module')
+def parser():
+    return QueryParser(CODES)
+
+
+@pytest.mark.parametrize('text, flight_numbers, airlines', [
+    # Designator-only queries take the fast path
+    ("status of ba117 and EK 202?", ('BA117', 'EK202'), ('BA', 'EK')),
+    ("I'm on an A320 to Dubai, is it late?", (), ()),
+    ("BA117, BA117 and QF1", ('BA117', 'QF1'), ('BA', 'QF')),
+    # Airline names go through the trie
+    ("is Emirates flight 202 on time, and BA117?", ('EK202', 'BA117'), ('EK', 'BA')),
+    ("Qantas", (), ('QF',)),
+    ("Air Cote d'Ivoire 5", ('HF5',), ('HF',)),
+    ("Émirats EK5 via Qantas 1", ('EK5', 'QF1'), ('EK', 'QF')),
+    ("China Airlines 5", ('CI5',), ('CI',)),
+    # Short aliases need a flight number marker, and are ordinary words unless capitalized
+    ("is delta flight 100 late?", ('DL100',), ('DL',)),
+    ("Delta #100 and China no. 7", ('DL100', 'CI7'), ('DL', 'CI')),
+    ("Departures are on level 3, is BA117 boarding?", ('BA117',), ('BA',)),
+    ("Is my spring 2026 trip on Delta 100 ok?", (), ('DL',)),
+    ("any flights to china 2 days from now", (), ()),
+])
+def test_parse(parser, text, flight_numbers, airlines):
+    parsed = parser.parse(text)
+    assert parsed.flight_numbers == flight_numbers
+    assert parsed.airlines == airlines
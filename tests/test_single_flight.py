@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flight_record import FlightRecord
+
+CALLERS = 20
+
+
+def test_concurrent_sync_lookups_make_one_upstream_call(stub, flight_api):
+    start = threading.Barrier(CALLERS)
+
+    def lookup(_):
+        start.wait()
+        return flight_api.get_flight_record('BA117')
+
+    with ThreadPoolExecutor(max_workers=CALLERS) as pool:
+        results = list(pool.map(lookup, range(CALLERS)))
+
+    assert stub.calls == 1
+    assert all(isinstance(result, FlightRecord) for result in results)
+    assert flight_api.inflight.executions == 1
+
+
+def test_concurrent_async_lookups_make_one_upstream_call(stub, flight_api):
+    from async_flight_api import AsyncFlightAPI
+
+    async def lookups():
+        api = AsyncFlightAPI(flight_api)
+        try:
+            return await asyncio.gather(*(api.get_flight_record('AA100') for _ in range(CALLERS)))
+        finally:
+            await api.aclose()
+
+    results = asyncio.run(lookups())
+
+    assert stub.calls == 1
+    assert all(isinstance(result, FlightRecord) for result in results)
+    assert len({result.fetched_at for result in results}) == 1
+
+
+def test_large_batch_does_not_starve_revalidation(stub, flight_api):
+    # A slow 400-flight batch is running while a stale record is revalidated
+    batch = threading.Thread(target=flight_api.get_flight_records, args=([f'BA{n}' for n in range(400)],))
+    batch.start()
+    while stub.calls == 0:
+        time.sleep(0.005)
+    try:
+        flight_api._revalidate_in_background('AA100', flight_api._cache_key('AA100'))
+        deadline = time.monotonic() + 1
+        while flight_api._revalidating and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert flight_api._revalidating == set()
+        assert isinstance(flight_api.cache.peek(flight_api._cache_key('AA100')), FlightRecord)
+        assert batch.is_alive()
+    finally:
+        batch.join()